@@ -25,6 +25,9 @@ enum class ProfilerPhase : int {
     InitAccel,                  /* Acceleration data structure creation */
     Render,                     /* Integrator::render() */
     SamplingIntegratorSample,   /* SamplingIntegrator::sample() */
+    PLTSamplePhase,             /* PLT integrator sample phase */
+    PLTSolvePhase,              /* PLT integrator solve phase */
+    PLTReplayPath,              /* PLT integrator subpath replay */
     SampleEmitter,              /* Scene::sample_emitter() */
     SampleEmitterRay,           /* Scene::sample_emitter_ray() */
     SampleEmitterDirection,     /* Scene::sample_emitter_direction() */
@@ -44,6 +47,8 @@ enum class ProfilerPhase : int {
     EndpointSamplePosition,     /* Endpoint::sample_position() */
     TextureSample,              /* Texture::sample() */
     TextureEvaluate,            /* Texture::eval() and Texture::pdf() */
+    GratingSampleLobe,          /* DiffractionGrating::sample_lobe() */
+    CoherenceUpdate,            /* Coherence::propagate() */
 
     ProfilerPhaseCount
 };
@@ -57,6 +62,9 @@ constexpr const char
         "Acceleration data structure creation",
         "Integrator::render()",
         "SamplingIntegrator::sample()",
+        "PLT sample phase",
+        "PLT solve phase",
+        "PLT replay_path()",
         "Scene::sample_emitter()",
         "Scene::sample_emitter_ray()",
         "Scene::sample_emitter_direction()",
@@ -75,7 +83,9 @@ constexpr const char
         "Endpoint::sample_direction()",
         "Endpoint::sample_position()",
         "Texture::sample()",
-        "Texture::eval()"
+        "Texture::eval()",
+        "DiffractionGrating::sample_lobe()",
+        "Coherence::propagate()"
     };
 
 #if defined(MI_ENABLE_ITTNOTIFY)
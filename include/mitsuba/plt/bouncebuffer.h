@@ -15,7 +15,12 @@ NAMESPACE_BEGIN(mitsuba)
 /**
  * \brief Structure that stores one bounce of some path traversing the scene.
  * 
- * A bounce data object contains all the necessary information to compute both forwards and backwards light transport.
+ * A bounce data object contains all the necessary information to compute both
+ * forwards and backwards light transport. Since one record is stored per depth
+ * and per lane, only the fields used to replay the bounce are kept: the
+ * surface interaction is stored in a compact form and rebuilt on demand with
+ * `interaction()`. Its normal partials and screen-space UV partials are not
+ * stored and are zero in the rebuilt interaction.
  */
 template <typename Float_, typename Spectrum_>
 struct BounceData {
@@ -25,30 +30,44 @@ struct BounceData {
     MI_IMPORT_TYPES()
     MI_IMPORT_OBJECT_TYPES()
 
-    /// \brief The id of the vertex in the path (mainly for debug purposes)
-    UInt32 id;
+    /// \brief Distance traveled along the ray (infinite if there was no intersection)
+    Float t;
 
-    /// \brief Information about the interaction at this vertex
-    SurfaceInteraction3f interaction;
+    /// \brief Time value associated with the interaction
+    Float time;
 
-    /// \brief The incident and outgoing direction, from the camera's perspective
-    Vector3f wi, wo;
+    /// \brief Wavelengths associated with the interaction
+    Wavelength wavelengths;
 
-    /// \brief Information about the type of interaction. This is a vectorized array
-    ///        of BSDFFlags. Use has_flag(...) to query the information.
-    UInt32 bsdf_flags;
+    /// \brief Position and geometric normal of the interaction
+    Point3f p;
+    Normal3f n;
+
+    /// \brief UV surface coordinates
+    Point2f uv;
+
+    /// \brief Normal and first tangent of the shading frame (the second tangent is recomputed)
+    Normal3f sh_n;
+    Vector3f sh_s;
+
+    /// \brief Position partials wrt. the UV parameterization
+    Vector3f dp_du, dp_dv;
 
-    /// \brief The factor due to russian roulette early path termination.
-    Float rr_thp;
+    /// \brief Incident direction in the local shading frame
+    Vector3f wi;
 
-    /// \brief The throughput of the path sampled from the camera up to this vertex.
-    Spectrum throughput;
+    /// \brief Pointer to the intersected shape
+    ShapePtr shape = nullptr;
 
-    /// \brief The weight of the sample used to get a new path direction.
-    Spectrum bsdf_weight;
+    /// \brief Primitive index, e.g. the triangle ID (if applicable)
+    UInt32 prim_index;
 
-    /// \brief Whether this vertex is on an emitter.
-    Mask is_emitter;
+    /// \brief The outgoing direction, from the camera's perspective (in world space)
+    Vector3f wo;
+
+    /// \brief Information about the type of interaction. This is a vectorized array
+    ///        of BSDFFlags. Use has_flag(...) to query the information.
+    UInt32 bsdf_flags;
 
     /// \brief The PDF of the last non-delta interaction (otherwise would be 0, check the `bsdf_flags` field first!)
     Float last_nd_pdf;
@@ -68,30 +87,49 @@ struct BounceData {
     Mask active;
     
     explicit BounceData(
-        const UInt32 id_,
         const SurfaceInteraction3f& it_, 
-        const Vector3f& wi_, const Vector3f& wo_, const UInt32& bf_,
-        const Float& rr_thp_, const Spectrum& throughput_, 
-        const Spectrum& bsdf_weight_, const Mask& is_emitter_, 
+        const Vector3f& wo_, const UInt32& bf_,
         const Float& ld_, const Vector2i& sl_, const UnpolarizedSpectrum& swl_, const Mask& active_)
 
-        : id(id_),
-          interaction(it_), 
-          wi(wi_), wo(wo_),
+        : t(it_.t),
+          time(it_.time),
+          wavelengths(it_.wavelengths),
+          p(it_.p), n(it_.n),
+          uv(it_.uv),
+          sh_n(it_.sh_frame.n), sh_s(it_.sh_frame.s),
+          dp_du(it_.dp_du), dp_dv(it_.dp_dv),
+          wi(it_.wi),
+          shape(it_.shape),
+          prim_index(it_.prim_index),
+          wo(wo_),
           bsdf_flags(bf_), 
-          rr_thp(rr_thp_),
-          throughput(throughput_),
-          bsdf_weight(bsdf_weight_),
-          is_emitter(is_emitter_),
           last_nd_pdf(ld_), 
           sampled_lobe(sl_),
           sampling_wavelengths(swl_),
           active(active_) {}
 
+    /// \brief Rebuild the surface interaction of this bounce
+    SurfaceInteraction3f interaction() const {
+        SurfaceInteraction3f si = dr::zeros<SurfaceInteraction3f>(dr::width(t));
+        si.t           = t;
+        si.time        = time;
+        si.wavelengths = wavelengths;
+        si.p           = p;
+        si.n           = n;
+        si.uv          = uv;
+        si.sh_frame    = Frame3f(sh_s, dr::cross(sh_n, sh_s), sh_n);
+        si.dp_du       = dp_du;
+        si.dp_dv       = dp_dv;
+        si.wi          = wi;
+        si.shape       = shape;
+        si.prim_index  = prim_index;
+        return si;
+    }
+
     // This macro already defines a suitable copy constructor
-    DRJIT_STRUCT(BounceData, id, interaction, wi, wo, 
-        bsdf_flags, rr_thp, throughput, bsdf_weight, 
-        is_emitter, last_nd_pdf, sampled_lobe, sampling_wavelengths, active);
+    DRJIT_STRUCT(BounceData, t, time, wavelengths, p, n, uv, sh_n, sh_s, 
+        dp_du, dp_dv, wi, shape, prim_index, wo, bsdf_flags, 
+        last_nd_pdf, sampled_lobe, sampling_wavelengths, active);
 };
 
 template <typename Float, typename Spectrum>
@@ -101,15 +139,18 @@ extern std::ostream &operator<<(std::ostream &os,
 template <typename Float, typename Spectrum>
 std::ostream &operator<<(std::ostream &os, const BounceData<Float, Spectrum>& bd) {
     os << "BounceData[" << std::endl
-       << "  id = " << string::indent(bd.id) << "," << std::endl
+       << "  t = " << string::indent(bd.t) << "," << std::endl
+       << "  p = " << string::indent(bd.p) << "," << std::endl
+       << "  n = " << string::indent(bd.n) << "," << std::endl
+       << "  uv = " << string::indent(bd.uv) << "," << std::endl
+       << "  sh_n = " << string::indent(bd.sh_n) << "," << std::endl
+       << "  sh_s = " << string::indent(bd.sh_s) << "," << std::endl
        << "  wi = " << string::indent(bd.wi) << "," << std::endl
        << "  wo = " << string::indent(bd.wo) << "," << std::endl
+       << "  prim_index = " << string::indent(bd.prim_index) << "," << std::endl
        << "  bsdf_flags = " << string::indent(bd.bsdf_flags) << "," << std::endl
-       << "  rr_thp = " << string::indent(bd.rr_thp) << "," << std::endl
-       << "  throughput = " << string::indent(bd.throughput) << "," << std::endl
-       << "  bsdf_weight = " << string::indent(bd.bsdf_weight) << "," << std::endl
-       << "  is_emitter = " << string::indent(bd.is_emitter) << "," << std::endl
        << "  last_nd_pdf = " << string::indent(bd.last_nd_pdf) << "," << std::endl
+       << "  sampled_lobe = " << string::indent(bd.sampled_lobe) << "," << std::endl
        << "  active = " << string::indent(bd.active) << "," << std::endl 
        << "]";
     return os;
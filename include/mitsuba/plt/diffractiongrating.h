@@ -3,6 +3,7 @@
 #include <mitsuba/core/frame.h>
 #include <mitsuba/core/fwd.h>
 #include <mitsuba/core/math.h>
+#include <mitsuba/core/profiler.h>
 #include <mitsuba/core/spectrum.h>
 #include <mitsuba/core/vector.h>
 
@@ -91,6 +92,39 @@ public:
         return Frame3f(n, m_grating_dir, bit);
     }
 
+    /**
+     * \brief Number of distinct lobe intensities along one dimension. Due to
+     * the symmetry of the grating, lobes -l and l have the same intensity.
+     */
+    uint32_t lobe_pmf_size() const { return m_lobe_count / 2 + 1; }
+
+    /**
+     * \brief Compute the discrete distribution of the lobe indices along one
+     * dimension of the grating.
+     *
+     * \param wi The incident direction
+     * \param wl The sampling wavelength (normally the hero wavelength of the
+     * beam)
+     * \param pmf Output array of \ref lobe_pmf_size() entries. Entry l holds
+     * the probability of sampling lobe l (and -l), where the central lobe is
+     * counted only once.
+     */
+    void lobe_pmf(const Vector3f &wi, const Float wl, Float *pmf) {
+        Float total = 0.0f;
+
+        for (uint32_t l = 0; l < lobe_pmf_size(); ++l) {
+            Float li = lobe_intensity(Vector2i(l, 0), wi, wl);
+            if (l == 0) {
+                li /= 2.0f;
+            }
+            total += li;
+            pmf[l] = li;
+        }
+
+        for (uint32_t l = 0; l < lobe_pmf_size(); ++l)
+            pmf[l] /= total;
+    }
+
     /**
      * \brief Given a 2D uniform sample, an inciding direction and wavelength,
      * sample a lobe and its pdf.
@@ -104,19 +138,27 @@ public:
      */
     std::pair<Vector2i, Vector2f>
     sample_lobe(const Vector2f &sample2, const Vector3f &wi, const Float wl) {
+        ScopedPhase sp(ProfilerPhase::GratingSampleLobe);
+
         // compute intensity of each lobe;
-        Float intensities[diffractionGratingsMaxLobes];
-        Float total = 0.0f;
+        Float pmf[diffractionGratingsMaxLobes];
+        lobe_pmf(wi, wl, pmf);
 
-        for (uint32_t l = 0; l < m_lobe_count / 2 + 1; ++l) {
-            Float li = lobe_intensity(Vector2i(l, 0), wi, wl);
-            if (l == 0) {
-                li /= 2.0f;
-            }
-            total += li;
-            intensities[l] = li;
-        }
+        return sample_lobe(sample2, pmf);
+    }
 
+    /**
+     * \brief Given a 2D uniform sample and a precomputed lobe distribution
+     * (see \ref lobe_pmf() and \ref DiffractionLobeTable), sample a lobe and
+     * its pdf.
+     *
+     * \param sample2 The random sample to compute a lobe
+     * \param pmf The discrete distribution of the lobe indices
+     * \return std::pair<Vector2i, Vector2f> The integer lobe index in both
+     * dimensions and its PDF
+     */
+    std::pair<Vector2i, Vector2f>
+    sample_lobe(const Vector2f &sample2, const Float *pmf) const {
         // choose lobe based on its probability
         // TODO: Study if these loops can be vectorized more with drjit.
         Float cdf(0.0f);
@@ -125,8 +167,8 @@ public:
         Vector2f rn       = (sample2 - 0.5f) * 2.0f;
         Vector2f rnd_sign = dr::sign(rn);
 
-        for (uint32_t l = 0; l < m_lobe_count / 2 + 1; ++l) {
-            Float p = intensities[l] / total;
+        for (uint32_t l = 0; l < lobe_pmf_size(); ++l) {
+            Float p = pmf[l];
 
             Mask s1 = dr::abs(rn.x()) > cdf;
             Mask s2 = dr::abs(rn.y()) > cdf;
@@ -138,9 +180,6 @@ public:
             lobe = Vector2f(dr::select(s1, l, lobe.x()),
                             dr::select(s2, l, lobe.y()));
 
-            // std::cout << pdf << "(" << pdf.x() * pdf.y() << ")" << "," <<
-            // lobe << std::endl;
-
             cdf += p;
         }
 
@@ -158,34 +197,34 @@ public:
      * \param wi The incident direction
      * \param wl The sampling wavelength (normally the hero wavelength of the
      * beam)
-     * \return std::pair<Vector2i, Vector2f> The integer lobe index in both
-     * dimensions and its PDF
+     * \return Float The PDF of the lobe
      */
     Float lobe_pdf(const Vector2i &lobe, const Vector3f &wi, const Float wl) {
+        Float pmf[diffractionGratingsMaxLobes];
+        lobe_pmf(wi, wl, pmf);
 
-        // Allocate dynamic array of intensities
-        dr::DynamicArray<Float> intensities =
-            dr::zeros<dr::DynamicArray<Float>>(diffractionGratingsMaxLobes);
-
-        // Accumulate total intensity and scatter values
-        Float total = dr::zeros<Float>();
-        Float ix(0.0f), iy(0.0f);
-        for (uint32_t l = 0; l <= m_lobe_count / 2; ++l) {
-            Float li = lobe_intensity(Vector2i(l, 0), wi, wl);
-            if (l == 0)
-                li *= 0.5f;
-            total += li;
+        return lobe_pdf(lobe, pmf);
+    }
 
-            // if lobe matches then assign to pdf
-            // incrementally fills the pdf values without needing to gather the intensity afterwards
-            // for pdf computation
-            ix = dr::select(dr::abs(lobe.x()) == l, li, ix);
-            iy = dr::select(dr::abs(lobe.y()) == l, li, iy);
+    /**
+     * \brief Given a diffraction lobe and a precomputed lobe distribution
+     * (see \ref lobe_pmf() and \ref DiffractionLobeTable), return its pdf.
+     *
+     * \param lobe The diffraction lobe indices
+     * \param pmf The discrete distribution of the lobe indices
+     * \return Float The PDF of the lobe
+     */
+    Float lobe_pdf(const Vector2i &lobe, const Float *pmf) const {
+        // incrementally fills the pdf values without needing to gather the
+        // intensity afterwards. Lobes l and -l share the probability of
+        // entry l, as in sample_lobe()
+        Float pdf_x(0.0f), pdf_y(0.0f);
+        for (uint32_t l = 0; l < lobe_pmf_size(); ++l) {
+            Float p = l == 0 ? pmf[l] : pmf[l] / 2.0f;
+            pdf_x = dr::select(dr::abs(lobe.x()) == l, p, pdf_x);
+            pdf_y = dr::select(dr::abs(lobe.y()) == l, p, pdf_y);
         }
 
-        Float pdf_x = ix / total;
-        Float pdf_y = iy / total;
-
         return pdf_x * pdf_y;
     }
 
@@ -271,6 +310,34 @@ public:
         return m_multiplier * ix * iy;
     }
 
+    /**
+     * \brief Given a diffraction lobe and a precomputed lobe distribution
+     * (see \ref lobe_pmf() and \ref DiffractionLobeTable), return its
+     * intensity.
+     *
+     * The central lobe has unit intensity along each dimension and half of
+     * its intensity is used for the distribution, so the intensity of lobe l
+     * is recovered as pmf[l] / (2 pmf[0]).
+     *
+     * \param lobe The diffraction lobe indices
+     * \param pmf The discrete distribution of the lobe indices
+     * \return Float The intensity of the lobe
+     */
+    Float lobe_intensity(const Vector2i &lobe, const Float *pmf) {
+        Float rcp_central = dr::rcp(2.0f * pmf[0]);
+
+        Float ix(1.0f), iy(1.0f);
+        for (uint32_t l = 1; l < lobe_pmf_size(); ++l) {
+            Float li = pmf[l] * rcp_central;
+            ix = dr::select(dr::abs(lobe.x()) == l, li, ix);
+            iy = dr::select(dr::abs(lobe.y()) == l, li, iy);
+        }
+
+        iy = dr::select(is_1D_grating(), ix, iy);
+
+        return m_multiplier * ix * iy;
+    }
+
 private:
     /// \brief The normalized direction of the grating in local coordinate
     /// space.
@@ -289,4 +356,119 @@ private:
     Float m_multiplier = 1.0f;
 };
 
-NAMESPACE_END(mitsuba)
\ No newline at end of file
+/**
+ * \brief Tabulated lobe distribution of a diffraction grating
+ *
+ * The lobe intensities of a grating with a constant height only depend on the
+ * elevation of the incident direction and on the wavelength. This class
+ * evaluates \ref DiffractionGrating::lobe_pmf() once on a regular grid over
+ * (|cos theta_i|, wavelength) and stores it in a multi-channel texture, so
+ * that lobe selection and lobe PDFs only cost one bilinear lookup instead of
+ * evaluating every lobe intensity (including the Bessel functions of
+ * sinusoidal gratings). As every texel holds a normalized distribution, the
+ * interpolated distribution is normalized as well.
+ *
+ * \tparam Float
+ * \tparam Spectrum
+ */
+template <typename Float, typename Spectrum> class DiffractionLobeTable {
+public:
+    MI_IMPORT_CORE_TYPES()
+    MI_IMPORT_TYPES()
+
+    DiffractionLobeTable() = default;
+
+    /**
+     * \brief Tabulate the lobe distribution of a grating.
+     *
+     * \param inv_period The inverse period of the grating, in um^(-1)
+     * \param q The height of the grating, in um
+     * \param lobes The number of lobes to consider for sampling
+     * \param type The type of grating (linear, sinusoidal or rectangular)
+     * \param resolution The number of texels along |cos theta_i| and the
+     * wavelength, respectively
+     * \param wl_range The tabulated wavelength range, in um
+     */
+    DiffractionLobeTable(const ScalarVector2f &inv_period, const ScalarFloat q,
+                         const uint32_t lobes,
+                         const DiffractionGratingType type,
+                         const ScalarVector2u &resolution,
+                         const ScalarVector2f &wl_range)
+        : m_wl_range(wl_range) {
+        using FloatX    = DynamicBuffer<ScalarFloat>;
+        using UInt32X   = DynamicBuffer<ScalarUInt32>;
+        using GratingX  = DiffractionGrating<FloatX, Spectrum>;
+        using Vector2fX = typename GratingX::Vector2f;
+        using Vector3fX = typename GratingX::Vector3f;
+
+        if (lobes / 2 + 1 > diffractionGratingsMaxLobes)
+            Throw("DiffractionLobeTable: can't tabulate more than %u lobes!",
+                  2 * diffractionGratingsMaxLobes - 1);
+
+        const size_t n = (size_t) resolution.x() * resolution.y();
+
+        // evaluate the lobe distribution at the texel centers (vectorized)
+        UInt32X idx = dr::arange<UInt32X>((uint32_t) n);
+        FloatX cos_theta =
+            (FloatX(idx % resolution.x()) + .5f) / (ScalarFloat) resolution.x();
+        FloatX wl = dr::fmadd(
+            (FloatX(idx / resolution.x()) + .5f) / (ScalarFloat) resolution.y(),
+            wl_range.y() - wl_range.x(), wl_range.x());
+
+        Vector3fX wi(dr::safe_sqrt(1.f - dr::square(cos_theta)),
+                     dr::zeros<FloatX>(n), cos_theta);
+
+        GratingX grating(FloatX(0.f),
+                         Vector2fX(inv_period.x(), inv_period.y()),
+                         FloatX(q), lobes, type);
+
+        FloatX pmf[diffractionGratingsMaxLobes];
+        grating.lobe_pmf(wi, wl, pmf);
+
+        // interleave the lobe probabilities as texture channels
+        const uint32_t channels = grating.lobe_pmf_size();
+        std::unique_ptr<ScalarFloat[]> data(new ScalarFloat[n * channels]);
+        for (size_t i = 0; i < n; ++i)
+            for (uint32_t l = 0; l < channels; ++l)
+                data[i * channels + l] = pmf[l][i];
+
+        size_t shape[3] = { (size_t) resolution.y(), (size_t) resolution.x(),
+                            (size_t) channels };
+        m_table = Texture2f(TensorXf(data.get(), 3, shape), false, false,
+                            dr::FilterMode::Linear, dr::WrapMode::Clamp);
+    }
+
+    /**
+     * \brief Look up the lobe distribution for an incident direction and
+     * wavelength.
+     *
+     * \param wi The incident direction
+     * \param wl The sampling wavelength, in um
+     * \param pmf Output array, see \ref DiffractionGrating::lobe_pmf()
+     */
+    void eval(const Vector3f &wi, const Float wl, Float *pmf,
+              Mask active = true) const {
+        Point2f pos(dr::abs(Frame<Float>::cos_theta(wi)),
+                    (wl - m_wl_range.x()) / (m_wl_range.y() - m_wl_range.x()));
+
+        m_table.template eval<Float>(pos, pmf, active);
+    }
+
+    /// Return the number of tabulated lobe probabilities
+    uint32_t channels() const { return (uint32_t) m_table.shape()[2]; }
+
+    /// Return the number of texels along |cos theta_i| and the wavelength
+    ScalarVector2u resolution() const {
+        return ScalarVector2u((uint32_t) m_table.shape()[1],
+                              (uint32_t) m_table.shape()[0]);
+    }
+
+private:
+    /// \brief Lobe distributions, one channel per distinct lobe intensity
+    Texture2f m_table;
+
+    /// \brief Tabulated wavelength range, in um
+    ScalarVector2f m_wl_range;
+};
+
+NAMESPACE_END(mitsuba)
@@ -10,6 +10,7 @@ template <typename Float, typename Spectrum> struct PLTInteraction;
 template <typename Float, typename Spectrum> struct GeneralizedRadiance;
 template <typename Float, typename Spectrum> class Coherence;
 template <typename Float, typename Spectrum> class DiffractionGrating;
+template <typename Float, typename Spectrum> class DiffractionLobeTable;
 template <typename Float, typename Spectrum> struct BounceData;
 template <typename Float, typename Spectrum> struct PLTBeam;
 template <typename Float, typename Spectrum> struct PLTSamplePhaseData;
@@ -22,6 +23,7 @@ template <typename Float_, typename Spectrum_> struct PLTAliases {
     using Coherence3f           = Coherence<Float, Spectrum>;
     using GeneralizedRadiance3f = GeneralizedRadiance<Float, Spectrum>;
     using DiffractionGrating3f  = DiffractionGrating<Float, Spectrum>;
+    using DiffractionLobeTable3f = DiffractionLobeTable<Float, Spectrum>;
     using BounceData3f          = BounceData<Float, Spectrum>;
     using PLTBeam3f             = PLTBeam<Float, Spectrum>;
     using PLTSamplePhaseData3f  = PLTSamplePhaseData<Float, Spectrum>;
@@ -33,6 +35,7 @@ template <typename Float_, typename Spectrum_> struct PLTAliases {
     using GeneralizedRadiance3f = typename PLTAliases::GeneralizedRadiance3f;  \
     using PLTInteraction3f      = typename PLTAliases::PLTInteraction3f;       \
     using DiffractionGrating3f  = typename PLTAliases::DiffractionGrating3f;   \
+    using DiffractionLobeTable3f = typename PLTAliases::DiffractionLobeTable3f; \
     using BounceData3f          = typename PLTAliases::BounceData3f;           \
     using PLTBeam3f             = typename PLTAliases::PLTBeam3f;              \
     using PLTSamplePhaseData3f  = typename PLTAliases::PLTSamplePhaseData3f;        
@@ -2,6 +2,7 @@
 
 #include <mitsuba/core/vector.h>
 #include <mitsuba/core/math.h>
+#include <mitsuba/core/profiler.h>
 #include <mitsuba/core/spectrum.h>
 
 #include <mitsuba/render/fwd.h>
@@ -55,6 +56,7 @@ public:
     Float rmm() const { return opl * 1e+3f; }
 
     void propagate(Float rd, const Mask& mask = true) {
+        ScopedPhase sp(ProfilerPhase::CoherenceUpdate);
         dr::masked(opl, mask) += rd;
     }
 
@@ -5708,6 +5708,8 @@ static const char *__doc_mitsuba_ProfilerPhase_BitmapRead = R"doc()doc";
 
 static const char *__doc_mitsuba_ProfilerPhase_BitmapWrite = R"doc()doc";
 
+static const char *__doc_mitsuba_ProfilerPhase_CoherenceUpdate = R"doc()doc";
+
 static const char *__doc_mitsuba_ProfilerPhase_CreateSurfaceInteraction = R"doc()doc";
 
 static const char *__doc_mitsuba_ProfilerPhase_EndpointEvaluate = R"doc()doc";
@@ -5718,6 +5720,8 @@ static const char *__doc_mitsuba_ProfilerPhase_EndpointSamplePosition = R"doc()d
 
 static const char *__doc_mitsuba_ProfilerPhase_EndpointSampleRay = R"doc()doc";
 
+static const char *__doc_mitsuba_ProfilerPhase_GratingSampleLobe = R"doc()doc";
+
 static const char *__doc_mitsuba_ProfilerPhase_ImageBlockPut = R"doc()doc";
 
 static const char *__doc_mitsuba_ProfilerPhase_InitAccel = R"doc()doc";
@@ -5726,6 +5730,12 @@ static const char *__doc_mitsuba_ProfilerPhase_InitScene = R"doc()doc";
 
 static const char *__doc_mitsuba_ProfilerPhase_LoadGeometry = R"doc()doc";
 
+static const char *__doc_mitsuba_ProfilerPhase_PLTReplayPath = R"doc()doc";
+
+static const char *__doc_mitsuba_ProfilerPhase_PLTSamplePhase = R"doc()doc";
+
+static const char *__doc_mitsuba_ProfilerPhase_PLTSolvePhase = R"doc()doc";
+
 static const char *__doc_mitsuba_ProfilerPhase_MediumEvaluate = R"doc()doc";
 
 static const char *__doc_mitsuba_ProfilerPhase_MediumSample = R"doc()doc";
@@ -12572,14 +12582,38 @@ static const char *__doc_mitsuba_DiffractionGrating_alpha_2 = R"doc()doc";
 
 static const char *__doc_mitsuba_DiffractionGrating_sample_lobe = R"doc()doc";
 
+static const char *__doc_mitsuba_DiffractionGrating_sample_lobe_2 = R"doc()doc";
+
+static const char *__doc_mitsuba_DiffractionGrating_lobe_pmf = R"doc()doc";
+
+static const char *__doc_mitsuba_DiffractionGrating_lobe_pmf_size = R"doc()doc";
+
+static const char *__doc_mitsuba_DiffractionGrating_lobe_pdf = R"doc()doc";
+
+static const char *__doc_mitsuba_DiffractionGrating_lobe_pdf_2 = R"doc()doc";
+
 static const char *__doc_mitsuba_DiffractionGrating_diffract = R"doc()doc";
 
 static const char *__doc_mitsuba_DiffractionGrating_lobe_intensity = R"doc()doc";
 
+static const char *__doc_mitsuba_DiffractionGrating_lobe_intensity_2 = R"doc()doc";
+
+static const char *__doc_mitsuba_DiffractionLobeTable = R"doc()doc";
+
+static const char *__doc_mitsuba_DiffractionLobeTable_DiffractionLobeTable = R"doc()doc";
+
+static const char *__doc_mitsuba_DiffractionLobeTable_eval = R"doc()doc";
+
+static const char *__doc_mitsuba_DiffractionLobeTable_channels = R"doc()doc";
+
+static const char *__doc_mitsuba_DiffractionLobeTable_resolution = R"doc()doc";
+
 static const char *__doc_mitsuba_BounceData = R"doc()doc";
 
 static const char *__doc_mitsuba_BounceData_BounceData = R"doc()doc";
 
+static const char *__doc_mitsuba_BounceData_interaction = R"doc()doc";
+
 
 static const char *__doc_mitsuba_PLTBeam = R"doc()doc";
 
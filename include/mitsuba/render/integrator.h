@@ -460,6 +460,16 @@ protected:
      * If set to (uint32_t) -1, all the work is done in a single pass (default).
      */
     uint32_t m_samples_per_pass;
+
+    /**
+     * \brief Maximum number of samples traced at once (JIT variants only).
+     *
+     * Larger renders are split into passes over batches of samples per pixel,
+     * which must divide the total sample count per pixel. This bounds the
+     * memory used by the wavefront, including the state of nested
+     * integrators. If set to 0, no limit applies (default).
+     */
+    uint32_t m_wavefront_budget;
 };
 
 /** \brief Abstract integrator that performs *recursive* Monte Carlo sampling
@@ -10,7 +10,8 @@ from matplotlib.widgets import Slider
 from utils import *
 
 # initialize variant
-mi.set_variant("cuda_ad_rgb_polarized")
+from scripts.utils.backend import set_backend
+set_backend()
 
 nlobesx = 9
 nlobesy = 9
@@ -40,7 +41,7 @@ def compute_metrics(periodx, periody, angle, h, wi, wl):
     lobes_xv = lobes_xv.ravel()
     lobes_yv = lobes_yv.ravel()
     
-    lobevec = mi.Vector2i(dr.cuda.Int(lobes_xv), dr.cuda.Int(lobes_yv))
+    lobevec = mi.Vector2i(mi.Int(lobes_xv), mi.Int(lobes_yv))
         
     start = time.perf_counter_ns()
     ddiff, active = grating.diffract(
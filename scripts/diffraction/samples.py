@@ -10,7 +10,8 @@ import argparse
 from utils import *
 
 # initialize variant
-mi.set_variant("cuda_ad_rgb_polarized")
+from scripts.utils.backend import set_backend
+set_backend()
 
 def compute_intensity_grid(grating, wi, wl, lobes):
 
@@ -23,32 +24,67 @@ def compute_intensity_grid(grating, wi, wl, lobes):
     lobes_xv = lobes_xv.ravel()
     lobes_yv = lobes_yv.ravel()
     
-    lobevec = mi.Vector2i(dr.cuda.Int(lobes_xv), dr.cuda.Int(lobes_yv))
+    lobevec = mi.Vector2i(mi.Int(lobes_xv), mi.Int(lobes_yv))
 
     it = grating.lobe_intensity(lobevec, wi, wl)
 
     return np.array(it).reshape(nlobesx, nlobesy)
 
 
-def compute_samples(grating, wi, wl, samples, lobes) -> tuple:
+def compute_samples(grating, wi, wl, samples, lobes, seed=0) -> tuple:
+    """Sample lobes of a grating and histogram them on the device
 
-    freqs = np.zeros((lobes, lobes))
-    avg_pdf = np.zeros((lobes, lobes))
+    Returns:
+        tuple: The averaged pdf and the amount of samples of each lobe, as (lobes x lobes) grids
+    """
+    half = lobes // 2
+    n = 2 * half + 1
 
-    sample = np.random.rand(2, samples)
-    r, p = grating.sample_lobe(mi.Vector2f(sample[0,:], sample[1,:]), wi, wl)
+    rng = mi.PCG32(size=samples, initstate=seed)
+    sample = mi.Vector2f(rng.next_float32(), rng.next_float32())
+    r, p = grating.sample_lobe(sample, wi, wl)
 
-    r = np.array(r).T
-    p = np.array(p).T
-    np.add.at(freqs, (r[:, 0] - lobes//2 - 1, r[:, 1] - lobes//2 - 1), 1)
+    # accumulate the frequency and pdf of each lobe
+    r += half
+    active = dr.all((r >= 0) & (r < n))
+    cell = mi.UInt32(r.x) * n + mi.UInt32(r.y)
 
-    for i in range(r.shape[0]):
-        avg_pdf[r[i, 0] - lobes//2 - 1, r[i, 1] - lobes//2 - 1] += p[i, 0] * p[i, 1]
+    freqs = dr.zeros(mi.Float, n * n)
+    avg_pdf = dr.zeros(mi.Float, n * n)
+    dr.scatter_reduce(dr.ReduceOp.Add, freqs, mi.Float(1.0), cell, active)
+    dr.scatter_reduce(dr.ReduceOp.Add, avg_pdf, p.x * p.y, cell, active)
 
-    avg_pdf = np.where(freqs != 0, avg_pdf / freqs, 0)
+    freqs = freqs.numpy().reshape(n, n)
+    avg_pdf = avg_pdf.numpy().reshape(n, n)
+    avg_pdf = np.where(freqs != 0, avg_pdf / np.maximum(freqs, 1), 0)
     
     return avg_pdf, freqs
 
+def sph_to_dir_np(theta, phi):
+    """Map spherical to Euclidean coordinates (as a plain tuple)"""
+    return (np.cos(phi) * np.sin(theta), np.sin(phi) * np.sin(theta), np.cos(theta))
+
+def validate_lobe_sampling(args, lobes, samples):
+    """Run the chi^2 test of the lobe sampling routine over a grid of grating configurations"""
+
+    configs = [
+        (inv_period, q, wl, sph_to_dir_np(np.deg2rad(theta), 0.0))
+        for inv_period in args.inv_periods
+        for q in args.heights
+        for wl in args.wavelengths
+        for theta in args.thetas
+    ]
+
+    batch = mi.chi2.LobeChiSquareBatch(configs, lobes=lobes, sample_count=samples)
+    results = batch.run()
+
+    for config, result, p_value in zip(configs, results, batch.p_values):
+        inv_period, q, wl, _ = config
+        print(f"inv_period = {inv_period}, q = {q}, wl = {wl}: "
+              f"{'accepted' if result else 'REJECTED'} (p-value = {p_value:.4f})")
+
+    return all(results)
+
 def compare_samples(grating, wi, wl, samples, lobes):
     fig, (ax1, ax2, ax3) = plt.subplots(1, 3)
 
@@ -94,7 +130,9 @@ def show_sampling_error(grating, wi, wl, min_samples, max_samples, lobes, steps=
 
 def main(args):
 
-    np.random.seed(35122)
+    if args.chi2:
+        validate_lobe_sampling(args, args.lobes, args.samples)
+        return
 
     grating = mi.DiffractionGrating3f(
         45, 
@@ -115,6 +153,11 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Sample diffraction grating")
     parser.add_argument("--samples", type=int, default=10, help="Number of samples")
     parser.add_argument("--lobes", type=int, default=5, help="Number of lobes of the diffraction grating")
+    parser.add_argument("--chi2", action="store_true", help="Validate the lobe sampling with a chi^2 test over a grid of configurations")
+    parser.add_argument("--inv_periods", type=float, nargs="+", default=[0.4, 1.0, 2.0], help="Inverse periods of the chi^2 grid (in um^-1)")
+    parser.add_argument("--heights", type=float, nargs="+", default=[0.084, 0.2], help="Heights of the chi^2 grid (in um)")
+    parser.add_argument("--wavelengths", type=float, nargs="+", default=[0.45, 0.55, 0.65], help="Wavelengths of the chi^2 grid (in um)")
+    parser.add_argument("--thetas", type=float, nargs="+", default=[0.0, 30.0, 60.0], help="Incident elevations of the chi^2 grid (in degrees)")
 
     args = parser.parse_args()
 
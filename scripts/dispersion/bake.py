@@ -0,0 +1,71 @@
+import argparse
+import json
+import time
+
+import mitsuba as mi
+
+import numpy as np
+
+from scripts.utils import format_time
+from scripts.utils.backend import add_backend_arguments, setup_backend
+
+# Default material: the grating of `main_image.py`
+DEFAULT_BSDF = {
+    'type': 'roughgrating',
+    'distribution': 'ggx',
+    'material': 'Au',
+    'lobe_type' : 'sinusoidal',
+    'height' : 0.05,
+    'inv_period_x' : 0.65,
+    'inv_period_y' : 0.65,
+    'radial' : False,
+    'lobes' : 5,
+    'grating_angle' : 45.0,
+    'coherence' : 2e+3,
+    'alpha' : 0.05
+}
+
+def main(args):
+    bsdf = mi.load_dict(json.loads(args.bsdf) if args.bsdf else DEFAULT_BSDF)
+
+    # the azimuth wraps around, so both ends of its range are included
+    phi_i = np.linspace(-np.pi, np.pi, args.res_phi_i, dtype=np.float32)
+    theta_i = np.linspace(0, np.deg2rad(args.max_theta_i), args.res_theta_i, dtype=np.float32)
+    wavelengths = np.linspace(args.min_wavelength, args.max_wavelength, args.res_wavelengths, dtype=np.float32)
+
+    print(f"Baking {len(phi_i)} x {len(theta_i)} x {len(wavelengths)} x {args.res_theta} x {args.res_phi} table...")
+    start = time.perf_counter_ns()
+    table = mi.util.bake_wbsdf(bsdf, phi_i, theta_i, wavelengths, args.res_theta, args.res_phi)
+    el = time.perf_counter_ns() - start
+    print(f"...done. ({format_time(el)})")
+
+    mi.util.write_tensor_file(args.output, {
+        "phi_i" : phi_i,
+        "theta_i" : theta_i,
+        "wavelengths" : wavelengths,
+        # half precision halves the size of the table, saturating at its largest value
+        "values" : table if args.full_precision else np.minimum(table, np.finfo(np.float16).max).astype(np.float16)
+    })
+    print(f"Table written to '{args.output}'")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bake a wBSDF into a table for the 'tabulatedwbsdf' plugin.")
+    parser.add_argument("output", help="Output tensor file")
+    parser.add_argument("--bsdf", type=str, help="Dictionary of the BSDF to bake, in JSON (default: a sinusoidal gold grating)")
+    parser.add_argument("--res_phi_i", type=int, help="Amount of incident azimuths", default=33)
+    parser.add_argument("--res_theta_i", type=int, help="Amount of incident elevations", default=16)
+    parser.add_argument("--max_theta_i", type=float, help="Maximum incident elevation, in degrees (above 90 bakes both sides)", default=89.0)
+    parser.add_argument("--res_wavelengths", type=int, help="Amount of wavelengths", default=16)
+    parser.add_argument("--min_wavelength", type=float, help="Minimum wavelength (nm)", default=360.0)
+    parser.add_argument("--max_wavelength", type=float, help="Maximum wavelength (nm)", default=830.0)
+    parser.add_argument("--res_theta", type=int, help="Amount of outgoing elevations", default=64)
+    parser.add_argument("--res_phi", type=int, help="Amount of outgoing azimuths", default=128)
+    parser.add_argument("--full_precision", action="store_true", help="Store the values as 32-bit floats instead of 16-bit ones.")
+    add_backend_arguments(parser, passes=False)
+
+    args = parser.parse_args()
+
+    # every wavelength of the table must be evaluated on its own
+    setup_backend(args, spectral=True)
+
+    main(args)
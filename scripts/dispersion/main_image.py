@@ -3,7 +3,8 @@ import argparse
 import mitsuba as mi
 import drjit as dr
 
-mi.set_variant("cuda_ad_spectral_polarized")
+from scripts.utils.backend import set_backend
+set_backend(spectral=True)
 
 import numpy as np
 import matplotlib.pyplot as plt
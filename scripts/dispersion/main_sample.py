@@ -3,7 +3,8 @@ import argparse
 import mitsuba as mi
 import drjit as dr
 
-mi.set_variant("cuda_ad_rgb_polarized")
+from scripts.utils.backend import set_backend
+set_backend()
 
 import numpy as np
 import matplotlib.pyplot as plt
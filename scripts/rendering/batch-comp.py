@@ -0,0 +1,49 @@
+import argparse
+import csv
+import time
+
+from utils.compare import ComparisonEngine
+
+def main(args):
+
+    engine = ComparisonEngine(args.cache_dir, args.tile_size, args.workers, args.cache_entries)
+
+    start = time.perf_counter()
+    comparison = engine.compare(args.reference, args.results)
+    print(f"Compared {len(args.results)} results in {time.perf_counter() - start:.3f} s.")
+
+    rows = []
+    for result, layers in comparison.items():
+        for layer, metrics in layers.items():
+            rows.append({
+                "result" : result,
+                "layer" : layer,
+                "rmse" : f"{metrics['rmse']:.6g}",
+                "relmse" : f"{metrics['relmse']:.6g}",
+                "flip" : f"{metrics['flip']:.6g}" if "flip" in metrics else "",
+                "worst_tile_rmse" : f"{max(max(r) for r in metrics['tile_rmse']):.6g}"
+            })
+
+    print(f"{'result':<40}{'layer':>6}{'RMSE':>14}{'relMSE':>14}{'FLIP':>14}{'worst tile RMSE':>18}")
+    for row in rows:
+        print(f"{row['result']:<40}{row['layer']:>6}{row['rmse']:>14}{row['relmse']:>14}{row['flip']:>14}{row['worst_tile_rmse']:>18}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()), delimiter=";")
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Results written to '{args.csv}'")
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Compare many renders against a reference, per stokes layer and per tile")
+    parser.add_argument("reference", help="Reference EXR file or result folder")
+    parser.add_argument("results", nargs="+", help="EXR files or result folders to compare")
+    parser.add_argument("--tile_size", type=int, help="Size of the tiles of the per-tile metrics", default=64)
+    parser.add_argument("--cache_dir", type=str, help="Folder where decoded images and metrics are cached", default=".compare_cache")
+    parser.add_argument("--cache_entries", type=int, help="Amount of decoded EXR files kept in the cache", default=64)
+    parser.add_argument("--workers", type=int, help="Amount of decoding processes (default: CPU count)")
+    parser.add_argument("--csv", type=str, help="Write the metrics to a CSV file")
+
+    main(parser.parse_args())
@@ -7,6 +7,8 @@ import json
 import time
 import os
 
+from concurrent.futures import ThreadPoolExecutor
+
 from utils import *
 
 import numpy as np
@@ -17,56 +19,12 @@ import argparse
 from scripts.utils import *
 # from scripts.rendering.integrators.plt import PLTIntegrator
 
-def render_scene(scene, samples, integrator="path", denoise=False):
-    """Render scene with any given number of samples and integrator type.
-    Optionally denoise the image.
-
-    Args:
-        scene (mi.Scene): The scene loaded from a dict/xml file
-        samples (int): The number of samples for the image
-        integrator (str, optional): The integrator to use. Defaults to "path".
-        denoise (bool, optional): Optionally denoise the image if True. Defaults to False.
-
-    Returns:
-        L, sp, result: The captured image, 4 stokes parameters and raw tensor data respectively.
-    """
-    
-    #render scene using the desired integrator
-    integrator = mi.load_dict({
-        "type" : "stokes",
-        "nested" : {
-            "type" : integrator,
-            "max_depth": 7,
-            "rr_depth": 50,
-            # 'samples_per_pass': 512
-        }
-    })
-    result = integrator.render(scene, spp=samples)
-    bmp = mi.Bitmap(result).convert()
-
-    L, sp = stokes_to_bitmaps(bmp)
-    
-    if denoise:
-        print("Denoising...")
-        print(L.size())
-        # Denoise the rendered image
-        denoiser = mi.OptixDenoiser(input_size=L.size(), albedo=False, normals=False, temporal=False)
-        L = denoiser(L)
-
-        for i, s in enumerate(sp):
-            sp[i] = denoiser(s)
-
-    return L, sp, result
-
 def write_data(folder_path, L, sp, el):
     
-    mi.util.write_bitmap(os.path.join(folder_path, f'result.exr'), L, write_async=True)
+    # all stokes components are stored as layers of a single EXR file
+    write_stokes_exr(os.path.join(folder_path, f'result.exr'), sp)
     mi.util.write_bitmap(os.path.join(folder_path, f'result.png'), L, write_async=True)
 
-    for i, si in enumerate(sp):
-        mi.util.write_bitmap(os.path.join(folder_path, f'result_s{i}.exr'), si, write_async=True)
-        mi.util.write_bitmap(os.path.join(folder_path, f'result_s{i}.png'), si, write_async=True)
-
     # write data about the render
     render_data = {
         "bitmap_size" : {
@@ -80,6 +38,48 @@ def write_data(folder_path, L, sp, el):
     with open(os.path.join(folder_path, "params.json"), "w") as f:
         json.dump(render_data, f)
 
+# name of the file that records the last completed frame
+PROGRESS_FILE = "progress.json"
+
+def keyframe(initial_pos, t, move_vector=mi.Point3f(-2.7, 0, 2.1), max_rotation=-90):
+    """Transform of the animated object at time t in [0, 1]"""
+    easing = mi.Float(np.sin(np.pi * t - np.pi / 2.0) / 2.0 + 0.5)
+    return mi.Transform4f() \
+        .rotate(axis=[0, 1, 0], angle=max_rotation * easing) \
+        .translate(easing * move_vector) \
+        @ initial_pos
+
+def bitmap_to_frame(bitmap):
+    """Convert a bitmap into an 8-bit BGR frame for OpenCV"""
+    frame = bitmap.convert(mi.Bitmap.PixelFormat.RGB, mi.Struct.Type.UInt8, srgb_gamma=True)
+    return cv2.cvtColor(np.array(frame, copy=False), cv2.COLOR_RGB2BGR)
+
+def load_progress(folder_path, frames, spp):
+    """Return the index of the first frame that has not been rendered yet"""
+    try:
+        with open(os.path.join(folder_path, PROGRESS_FILE)) as f:
+            progress = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+
+    # a different animation was rendered in this folder
+    if progress["frames"] != frames or progress["spp"] != spp:
+        return 0
+
+    # make sure that all the completed frames are still on disk
+    done = progress["last_frame"] + 1
+    for i in range(done):
+        if not os.path.exists(os.path.join(folder_path, f'frame{i}.png')):
+            return i
+
+    return done
+
+def save_progress(folder_path, frame, frames, spp):
+    tmp_path = os.path.join(folder_path, PROGRESS_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({ "last_frame" : frame, "frames" : frames, "spp" : spp }, f)
+    os.replace(tmp_path, os.path.join(folder_path, PROGRESS_FILE))
+
 def main(args):
     
     # folder to store data
@@ -103,34 +103,53 @@ def main(args):
     if args.verbose:
         print(scene_params)
 
-    # set up the total relative transformation
+    # only the keyframed transform changes between frames
+    initial_pos = mi.Transform4f(scene_params[args.key])
+    scene_params.keep(args.key)
+
+    # the integrator (and its kernels) are reused for all frames
+    integrator = load_integrator(args.integrator, args.samples_per_pass, args.wavefront_budget)
+
+    first_frame = load_progress(folder_path, args.frames, args.spp) if args.resume else 0
+    if first_frame > 0:
+        print(f"Resuming from frame {first_frame}")
+
     # video generation
-    video_result = cv2.VideoWriter('filename.avi', 
+    film_size = scene.sensors()[0].film().crop_size()
+    video_result = cv2.VideoWriter(os.path.join(folder_path, args.video), 
                             cv2.VideoWriter_fourcc(*'MJPG'),
-                            10, scene_params["elm__1.film.size"])
-
-    frames = 90
-    initial_pos = mi.Transform4f(scene_params["elm__1.to_world"])
-    move_vector = mi.Point3f(-2.7, 0, 2.1)
-    max_rotation = -90
-    for i in tqdm(range(frames)):
-        # modify scene params
-        t = i / frames
-        easing = mi.Float(np.sin(np.pi * t - np.pi / 2.0) / 2.0 + 0.5)
-        scene_params["elm__1.to_world"] = mi.Transform4f() \
-            .rotate(axis=[0, 1, 0], angle=max_rotation * easing) \
-            .translate(easing * move_vector) \
-            @ initial_pos
-
-        #render scene using the desired integrator
-        start = time.perf_counter_ns()
-        L, sp, result = render_scene(scene, args.spp, args.integrator, args.denoise)
-        el = time.perf_counter_ns() - start
-
-        # write one frame
-        mi.util.write_bitmap(os.path.join(folder_path, f'frame{i}.png'), sp[0], write_async=True)
-
-    cv2.destroyAllWindows()
+                            args.fps, (film_size.x, film_size.y))
+
+    # the video can't be appended to, feed it the frames of the previous run
+    for i in range(first_frame):
+        video_result.write(cv2.imread(os.path.join(folder_path, f'frame{i}.png')))
+
+    def encode(i, bitmap):
+        frame = bitmap_to_frame(bitmap)
+        cv2.imwrite(os.path.join(folder_path, f'frame{i}.png'), frame)
+        video_result.write(frame)
+        save_progress(folder_path, i, args.frames, args.spp)
+
+    # frames are encoded in order in the background, while the next one renders
+    with ThreadPoolExecutor(max_workers=1) as encoder:
+        pending = None
+        for i in tqdm(range(first_frame, args.frames)):
+            # modify scene params
+            scene_params[args.key] = keyframe(initial_pos, i / args.frames)
+            scene_params.update()
+
+            #render scene using the desired integrator
+            result = integrator.render(scene, spp=args.spp)
+            L, sp = develop_stokes(result, args.denoise)
+
+            # surface encoding errors as soon as possible
+            if pending is not None:
+                pending.result()
+            pending = encoder.submit(encode, i, mi.Bitmap(sp[0]))
+
+        if pending is not None:
+            pending.result()
+
     video_result.release()
 
 if __name__ == '__main__':
@@ -142,16 +161,17 @@ if __name__ == '__main__':
     parser.add_argument("--spp", type=int, help="Samples per pixel", default=64)
     parser.add_argument("--outdir", "-o", type=str, help="The folder in which to store the results")
     parser.add_argument("--denoise", "-d", action="store_true", help="Whether to denoise the final result.")
+    parser.add_argument("--frames", type=int, help="Amount of frames of the animation", default=90)
+    parser.add_argument("--fps", type=int, help="Frame rate of the video", default=10)
+    parser.add_argument("--key", type=str, help="Scene parameter of the animated transform", default="elm__1.to_world")
+    parser.add_argument("--video", type=str, help="File name of the video, inside the output folder", default="animation.avi")
+    parser.add_argument("--resume", action="store_true", help="Resume the animation from the last completed frame.")
+    add_backend_arguments(parser)
     
     args = parser.parse_args()
 
     # setup mode here
-    if args.spectral:
-        print("Loading spectral variant...")
-        mi.set_variant("cuda_ad_spectral_polarized")
-    else:
-        print("Loading RGB variant...")
-        mi.set_variant("cuda_ad_rgb_polarized")
+    setup_backend(args, spectral=args.spectral)
 
     # load integrators
     from scripts.rendering.integrators.path import MISPathIntegrator
@@ -2,43 +2,310 @@ import mitsuba as mi
 import drjit as dr
 
 from integrators import *
+from utils import render_progressive
 
 from concurrent.futures import ThreadPoolExecutor
 
 from scripts.rendering.integrators.path import MISPathIntegrator
 from scripts.rendering.integrators.plt import PLTIntegrator
 
+import ast
+import itertools
+import threading
 import time
 
+from collections import namedtuple
+
+def progressive_checkpoints(spp, factor=4):
+    """Sample counts of a progressive render: 1, factor, factor^2... up to `spp`
+
+    Args:
+        spp (int): The final sample count
+        factor (int, optional): Growth of the sample count between passes. Defaults to 4.
+
+    Returns:
+        list: The sample count of every pass, ending with `spp`
+    """
+    checkpoints = []
+    count = 1
+    while count < spp:
+        checkpoints.append(count)
+        count *= factor
+
+    return checkpoints + [spp]
+
+def parameter_value(current, value):
+    """Convert the edited value of a scene parameter to the type of the parameter
+
+    The scene view shows the `repr()` of each parameter, which lists the lanes
+    of Dr.Jit arrays: a single color reads as `[[0.5, 0.25, 0.1]]`, whereas
+    `mi.Color3f` is built from its components.
+
+    Args:
+        current (any): The current value of the parameter
+        value (any): The edited value, e.g. parsed from its `repr()`
+
+    Returns:
+        any: The value, with the type of the parameter
+    """
+    if type(current) == type(value) or not (dr.is_array_v(current) or isinstance(current, mi.Transform4f)):
+        return value
+
+    # unwrap the single lane of the array
+    if isinstance(value, (list, tuple)) and len(value) == 1 and isinstance(value[0], (list, tuple)):
+        value = value[0]
+
+    return type(current)(value)
+
+class RenderSession:
+    """Interactive rendering session of a scene.
+
+    The integrator and the traversed scene parameters are kept alive between
+    renders. Edits are queued and applied as a single dirty-parameter update
+    right before the next render, so the kernels of previous renders are reused
+    as long as the structure of the scene does not change.
+    """
+
+    def __init__(self, scene, integrator="plt", max_depth=12, rr_depth=50):
+        self.scene = scene
+        self.integrator_type = integrator
+        self.integrator = mi.load_dict({
+            "type": "stokes",
+            "nested" : {
+                "type" : integrator,
+                "max_depth": max_depth,
+                "rr_depth": rr_depth
+            }
+        })
+
+        self.params = mi.traverse(scene)
+        self.spp = scene.sensors()[0].sampler().sample_count()
+
+        # edits that have not been applied to the scene yet
+        self.pending = {}
+        self.lock = threading.Lock()
+        # incremented on every edit, used to abort outdated renders
+        self.generation = 0
+
+    def edit(self, key, value):
+        """Queue the edit of a scene parameter
+
+        Args:
+            key (str): The key of the parameter, as given by `mi.traverse`
+            value (any): The new value. Strings are parsed as Python literals.
+        """
+        if isinstance(value, str):
+            value = ast.literal_eval(value)
+
+        # the render thread updates the parameters while holding the lock
+        with self.lock:
+            # keep the type of the parameter, so that it is not baked into the kernels
+            self.pending[key] = parameter_value(self.params[key], value)
+            self.generation += 1
+
+    def apply_edits(self):
+        """Apply the queued edits to the scene
+
+        Returns:
+            int: The generation of the scene after the update
+        """
+        with self.lock:
+            for key, value in self.pending.items():
+                self.params[key] = value
+            if self.pending:
+                self.params.update()
+            self.pending.clear()
+            return self.generation
+
+    def render(self, on_pass=None, factor=4, cancelled=None):
+        """Render the scene progressively (1, 4, 16... spp) up to the sensor's sample count
+
+        Rendering stops early if the scene is edited, since the remaining
+        passes would be outdated, or if it is cancelled.
+
+        Args:
+            on_pass (callable, optional): Called as on_pass(spp, L, sp, time_ns) after each pass
+            factor (int, optional): Growth of the sample count between passes. Defaults to 4.
+            cancelled (callable, optional): Checked between passes, the render stops if it returns True.
+
+        Returns:
+            tuple: The (spp, L, sp, time_ns) of the last pass, or None if the render was aborted.
+        """
+        generation = self.apply_edits()
+
+        last = None
+        for spp, L, sp, _, render_time in render_progressive(
+                self.scene, progressive_checkpoints(self.spp, factor), self.integrator):
+            if self.generation != generation or (cancelled is not None and cancelled()):
+                return None
+
+            last = (spp, L, sp, render_time)
+            if on_pass is not None:
+                on_pass(*last)
+
+        return last
+
+# Progress of a render job after each pass
+RenderProgress = namedtuple("RenderProgress", ["passes_done", "passes", "spp", "samples_per_second", "L", "sp"])
+
+class RenderJob:
+    """A render request scheduled by the `RendererController`.
+
+    A job can be cancelled at any time: if it is still queued it will not
+    start, otherwise it stops after its current pass.
+    """
+
+    _ids = itertools.count()
+
+    def __init__(self, scene, params, on_finish, on_progress=None):
+        self.id = next(RenderJob._ids)
+        self.scene = scene
+        self.params = params
+        self.on_finish = on_finish
+        self.on_progress = on_progress
+
+        self.__cancelled = threading.Event()
+        self.future = None
+
+    def cancel(self):
+        self.__cancelled.set()
+
+    def cancelled(self):
+        return self.__cancelled.is_set()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
 class RendererController:
 
     def __init__(self):
         # Thread pool executor for background tasks
         self.executor = ThreadPoolExecutor(max_workers=1)
+        # render sessions of each scene
+        self.sessions = {}
+        # latest render job of each scene
+        self.jobs = {}
+        self.lock = threading.Lock()
 
-    def render_scene(self, scene, params, on_finish):
-        """Render scene asynchronously
+    def session(self, scene, params):
+        """Retrieve the render session of a scene, creating it if needed
 
         Args:
-            scene (_type_): _description_
-            on_finish (_type_): _description_
+            scene (mi.Scene): The scene
+            params (dict): Render parameters
+
+        Returns:
+            RenderSession: The session of the scene
         """
-        future = self.executor.submit(lambda : self.__do_render(scene, params))
-        future.add_done_callback(lambda future: on_finish(future.result()))
+        # called from both the GUI and the render thread
+        with self.lock:
+            previous = self.sessions.get(id(scene))
+            if previous is not None and previous.integrator_type == params["integrator"]:
+                return previous
 
-    def __do_render(self, scene, params):
-        
-        # render scene using the desired integrator
-        plt_integrator = mi.load_dict({
-            "type": "stokes",
-            "nested" : {
-                "type" : params["integrator"],
-                "max_depth": 12,
-                "rr_depth": 50
-            }
-        })
+            session = RenderSession(scene, params["integrator"])
+            if previous is not None:
+                # the new integrator still has to apply the queued edits
+                with previous.lock:
+                    session.pending.update(previous.pending)
+                    previous.pending.clear()
+            self.sessions[id(scene)] = session
+
+        return session
 
-        result = plt_integrator.render(scene, scene.sensors()[0])
-        bmp = mi.Bitmap(result).convert(srgb_gamma=False)
+    def edit_parameter(self, scene, params, key, value):
+        """Queue the edit of a parameter of a scene, applied on the next render"""
+        self.session(scene, params).edit(key, value)
+
+    def render_scene(self, scene, params, on_finish, on_progress=None):
+        """Render scene asynchronously and progressively
+
+        The new job supersedes the previous job of the same scene: if it is
+        still queued it is dropped, and if it is running it stops after its
+        current pass.
+
+        Args:
+            scene (mi.Scene): The scene to render
+            params (dict): Render parameters
+            on_finish (callable): Called as on_finish(result, error). The result
+            is the (spp, L, sp, time_ns) of the last pass, or None if the render
+            was cancelled, outdated by an edit or failed, in which case error
+            holds the raised exception (None otherwise).
+            on_progress (callable, optional): Called with a `RenderProgress` after each pass
 
-        return bmp
\ No newline at end of file
+        Returns:
+            RenderJob: The scheduled job
+        """
+        job = RenderJob(scene, params, on_finish, on_progress)
+
+        with self.lock:
+            previous = self.jobs.get(id(scene))
+            if previous is not None:
+                previous.cancel()
+            self.jobs[id(scene)] = job
+
+        job.future = self.executor.submit(self.__do_render, job)
+        job.future.add_done_callback(lambda future: self.__finish(job, future))
+        return job
+
+    def __finish(self, job, future):
+        # exceptions raised by done callbacks are only logged by the executor,
+        # so the failure of the render is handed to the job instead
+        if future.cancelled():
+            job.on_finish(None, None)
+        elif future.exception() is not None:
+            job.on_finish(None, future.exception())
+        else:
+            job.on_finish(future.result(), None)
+
+    def cancel(self, scene):
+        """Cancel the render job of a scene, if any
+
+        Returns:
+            bool: Whether there was a pending job to cancel
+        """
+        with self.lock:
+            job = self.jobs.pop(id(scene), None)
+
+        if job is None or job.done():
+            return False
+
+        job.cancel()
+        return True
+
+    def __do_render(self, job):
+
+        # superseded or cancelled while queued
+        if job.cancelled():
+            return None
+
+        session = self.session(job.scene, job.params)
+        checkpoints = progressive_checkpoints(session.spp)
+        film_size = job.scene.sensors()[0].film().crop_size()
+        pixels = film_size.x * film_size.y
+
+        passes_done = 0
+        def on_pass(spp, L, sp, render_time):
+            nonlocal passes_done
+            passes_done += 1
+            if job.on_progress is not None:
+                samples_per_second = spp * pixels / max(render_time / 1e9, 1e-9)
+                job.on_progress(RenderProgress(passes_done, len(checkpoints), spp, samples_per_second, L, sp))
+
+        try:
+            return session.render(on_pass, cancelled=job.cancelled)
+        finally:
+            with self.lock:
+                if self.jobs.get(id(job.scene)) is job:
+                    del self.jobs[id(job.scene)]
+
+    def close_session(self, scene):
+        """Cancel the render job of a scene and release its render session,
+        along with its queued edits
+
+        Args:
+            scene (mi.Scene): The scene
+        """
+        self.cancel(scene)
+        with self.lock:
+            self.sessions.pop(id(scene), None)
@@ -3,7 +3,6 @@ import mitsuba as mi
 import json
 import pprint 
 import time
-from PIL import ImageTk, Image
 
 from ..controller import SceneController, RendererController, props_to_dict
 from utils import *
@@ -32,6 +31,10 @@ class Home(ttk.Frame):
 
         self.current_scene = None
         self.render_result = None
+        self.image_view = None
+        # last developed render (L, sp), kept in memory until saved
+        self.last_render = None
+        self.render_params = { "integrator" : "plt" }
 
         self.scene_ctrl : SceneController = scene_ctrl
         self.renderer_ctrl : RendererController = renderer_ctrl
@@ -68,7 +71,7 @@ class Home(ttk.Frame):
         self.frame_left, self.label_frame_left = self.__create_scene_edit(tool_paned_window)
         self.frame_right, self.label_frame_right = self.__create_render_view(tool_paned_window)
 
-        self.scene_view = SceneView(self.label_frame_left)
+        self.scene_view = SceneView(self.label_frame_left, on_edit=self.__on_edit)
 
         # Add frames to the PanedWindow with resizable option
         tool_paned_window.add(self.frame_left, weight=1)  # left frame can resize
@@ -129,6 +132,23 @@ class Home(ttk.Frame):
         
         render_btn.pack(side=tk.BOTTOM)
 
+        # Cancel render button
+        cancel_btn = ttk.Button(
+            self.render_window, text="Cancel render",
+            bootstyle="dark",
+            command=lambda : self.__cancel_render())
+        
+        cancel_btn.pack(side=tk.BOTTOM)
+
+        # Save render button
+        save_cmd = lambda : self.__save_render()
+        save_btn = ImageButton(
+            os.path.join(self.assets_path, "save.png"), "Save render", self.render_window,
+            bootstyle="dark",
+            command=save_cmd)
+        
+        save_btn.pack(side=tk.BOTTOM)
+
         return render_view, lf
     
     def __create_bottom_frame(self, parent):
@@ -157,82 +177,96 @@ class Home(ttk.Frame):
 
         if scene_path:
             self.console.write(f"Loading scene...")
-            self.current_scene = self.scene_ctrl.load_scene(scene_path)
+            scene = self.scene_ctrl.load_scene(scene_path)
+
+            # release the render session of the replaced scene
+            if self.current_scene is not None and self.current_scene is not scene:
+                self.renderer_ctrl.close_session(self.current_scene)
+            self.current_scene = scene
             self.current_scene_params = props_to_dict(self.current_scene)
 
             self.scene_view.update_scene(scene_path, self.current_scene_params, self.current_scene)
             self.console.write(f"done...")
 
-    def __render_current_scene(self):
+    def __on_edit(self, key, value):
 
-        self.console.write(f"{self.render_result is None}")
-        if self.render_result is None:
-            self.render_result = ttk.Label(self.render_window, text="Rendering...")
-            self.render_result.pack(fill=ttk.BOTH, expand=True)
+        if self.current_scene is None:
+            return
 
-        self.console.write(f"Rendering scene...")
-        start = time.perf_counter()
-        def on_finish(result):
-            elapsed = time.perf_counter() - start
+        try:
+            self.renderer_ctrl.edit_parameter(self.current_scene, self.render_params, key, value)
+        except (ValueError, SyntaxError, TypeError) as e:
+            self.console.write(f"Invalid value for '{key}': {e}")
+            return
+
+        # refresh the preview with the new value
+        self.__render_current_scene()
+
+    def __show_result(self, L, sp):
 
-            self.console.write(f"Done. ({elapsed} s.)")
+        self.last_render = (L, sp)
 
-            # destroy previous render
+        # create the image view on the first render
+        if self.image_view is None:
             if self.render_result:
                 self.render_result.destroy()
-                self.render_result = None
-        
+
             self.render_result = ttk.Frame(self.render_window)
             self.render_result.pack(side=tk.TOP, fill="both", expand=True, padx=20, pady=20)
+            self.image_view = ImageView(self.render_result)
 
-            L, sp = stokes_to_bitmaps(bmp)
-    
-            mi.util.write_bitmap(f'result.exr', L, write_async=True)
-            mi.util.write_bitmap(f'result.png', L, write_async=True)
+        self.image_view.set_bitmap(L)
 
-            for i, si in enumerate(sp):
-                mi.util.write_bitmap(f'result_s{i}.exr', si, write_async=True)
-                mi.util.write_bitmap(f'result_s{i}.png', si, write_async=True)
+    def __save_render(self):
 
+        if self.last_render is None:
+            self.console.write("Nothing to save, render the scene first!")
+            return
 
-            im = Image.open('result.png')
-            self.rendered_tkimage = ImageTk.PhotoImage(im)
-            image_panel = ttk.Label(self.render_result, image = self.rendered_tkimage)
-            image_panel.pack(side = "bottom", fill = "both", expand = "yes", anchor=ttk.CENTER)
+        folder_path = fd.askdirectory()
+        if not folder_path:
+            return
 
-            # Manually trigger the resize logic after the image is loaded
-            self.resize_image({'height': self.render_result.winfo_height()})
+        # bitmaps are written in the background
+        L, sp = self.last_render
+        write_stokes_exr(os.path.join(folder_path, 'result.exr'), sp)
+        mi.util.write_bitmap(os.path.join(folder_path, 'result.png'), L, write_async=True)
 
-            # Bind resize event to adjust image size dynamically
-            self.render_result.bind("<Configure>", self.resize_image)
+        self.console.write(f"Saving render to '{folder_path}'...")
 
-        if self.current_scene:
+    def __cancel_render(self):
 
-            params = { "integrator" : "plt" }
+        if self.current_scene and self.renderer_ctrl.cancel(self.current_scene):
+            self.console.write("Cancelling render...")
 
-            self.renderer_ctrl.render_scene(self.current_scene, params, on_finish)
-        else:
-            self.console.write("Can't render, no scene loaded!")
+    def __render_current_scene(self):
 
-    def resize_image(self, event):
-        # Resize the image to fill the container vertically, maintaining aspect ratio
-        container_height = event['height'] if isinstance(event, dict) else event.height
-        im = Image.open('result.png')
-        
-        # Calculate the new width based on the aspect ratio
-        width, height = im.size
-        new_height = container_height
-        new_width = int((new_height / height) * width)
+        if self.render_result is None:
+            self.render_result = ttk.Label(self.render_window, text="Rendering...")
+            self.render_result.pack(fill=ttk.BOTH, expand=True)
 
-        # Resize the image to fit vertically
-        im_resized = im.resize((new_width, new_height), Image.Resampling.BICUBIC)
+        self.console.write(f"Rendering scene...")
+        start = time.perf_counter()
 
-        # Update the Tkinter image reference
-        self.rendered_tkimage = ImageTk.PhotoImage(im_resized)
+        # callbacks run in the render thread, update the widgets from the main loop
+        def on_progress(progress):
+            elapsed = time.perf_counter() - start
+            self.parent.after(0, lambda : self.__show_result(progress.L, progress.sp))
+            self.parent.after(0, lambda : self.console.write(
+                f"Pass {progress.passes_done}/{progress.passes}: {progress.spp} spp, "
+                f"{progress.samples_per_second:.3g} samples/s ({elapsed:.3f} s.)"))
 
-        # Find the label widget and update its image
-        image_panel = self.render_result.winfo_children()[0]
-        image_panel.config(image=self.rendered_tkimage)
+        def on_finish(result, error):
+            elapsed = time.perf_counter() - start
+            if error is not None:
+                message = f"Render failed: {error} ({elapsed:.3f} s.)"
+            elif result is None:
+                message = f"Render cancelled. ({elapsed:.3f} s.)"
+            else:
+                message = f"Done. ({elapsed:.3f} s.)"
+            self.parent.after(0, lambda : self.console.write(message))
 
-        # Re-center the image by setting the anchor to 'center'
-        image_panel.place(relx=0.5, rely=0.5, anchor="center")
\ No newline at end of file
+        if self.current_scene:
+            self.renderer_ctrl.render_scene(self.current_scene, self.render_params, on_finish, on_progress)
+        else:
+            self.console.write("Can't render, no scene loaded!")
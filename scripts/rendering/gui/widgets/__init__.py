@@ -1,3 +1,4 @@
 from .image_btn import ImageButton
 from .scene_view import SceneView
+from .image_view import ImageView, bitmap_to_image
 from .console_logger import *
\ No newline at end of file
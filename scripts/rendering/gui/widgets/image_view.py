@@ -0,0 +1,72 @@
+import tkinter as tk
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+from PIL import ImageTk, Image
+
+import mitsuba as mi
+import numpy as np
+
+def bitmap_to_image(bitmap : mi.Bitmap) -> Image.Image:
+    """Convert a developed bitmap into a displayable image, without going through disk
+
+    Args:
+        bitmap (mi.Bitmap): The bitmap to display
+
+    Returns:
+        Image.Image: An 8-bit sRGB image sharing the memory of the converted bitmap
+    """
+    bitmap = bitmap.convert(mi.Bitmap.PixelFormat.RGB, mi.Struct.Type.UInt8, srgb_gamma=True)
+    return Image.fromarray(np.array(bitmap, copy=False), mode="RGB")
+
+class ImageView(ttk.Label):
+    """Label that displays an image fitted to the height of its container.
+
+    Resized copies are cached by size, so resizing the window back and forth
+    does not resample the image again.
+    """
+
+    def __init__(self, parent=None, max_cached=4, **kwargs):
+
+        super().__init__(parent, **kwargs)
+
+        self.parent = parent
+        self.image = None
+        self.max_cached = max_cached
+        self.cache = {}
+
+        # keep a reference to the displayed image, otherwise Tk discards it
+        self.tkimage = None
+
+        self.parent.bind("<Configure>", self.__on_resize)
+
+    def set_bitmap(self, bitmap : mi.Bitmap):
+        self.set_image(bitmap_to_image(bitmap))
+
+    def set_image(self, image : Image.Image):
+        self.image = image
+        self.cache.clear()
+        self.fit(self.parent.winfo_height())
+
+    def fit(self, height):
+        """Display the image scaled to some height, maintaining its aspect ratio"""
+        if self.image is None or height <= 1:
+            return
+
+        width = int((height / self.image.height) * self.image.width)
+
+        if (width, height) not in self.cache:
+            # evict oldest sizes
+            while len(self.cache) >= self.max_cached:
+                del self.cache[next(iter(self.cache))]
+
+            resized = self.image.resize((width, height), Image.Resampling.BICUBIC)
+            self.cache[(width, height)] = ImageTk.PhotoImage(resized)
+
+        self.tkimage = self.cache[(width, height)]
+        self.config(image=self.tkimage)
+
+        # Re-center the image by setting the anchor to 'center'
+        self.place(relx=0.5, rely=0.5, anchor="center")
+
+    def __on_resize(self, event):
+        self.fit(event.height)
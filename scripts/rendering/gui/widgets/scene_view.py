@@ -7,12 +7,14 @@ import mitsuba as mi
 
 class SceneView(ttk.Frame):
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, on_edit=None):
 
         super().__init__(parent)
 
         self.parent = parent
         self.current_scene = None
+        # called with the key and value of each edited parameter
+        self.on_edit = on_edit
 
         self.scene_view = ttk.Label(self.parent, text="No scene loaded")
         self.scene_view.pack(side=tk.TOP)
@@ -71,15 +73,13 @@ class SceneView(ttk.Frame):
 
     def __on_modify(self, event):
 
-        params = mi.traverse(self.current_scene)
-
         for (row, column), old_value in event.cells.table.items():
             val_key = self.tree_view.rowitem(row)
             curr_values = self.tree_view.item(val_key)["values"]
 
-            print(curr_values)
-
-            # modify scene params
-            params[val_key] = curr_values[0]
+            # tree keys are ".<group>.<parameter key>"
+            param_key = val_key.split(".", 2)[2]
 
-        params.update()
\ No newline at end of file
+            # the edit is applied by the render session on the next render
+            if self.on_edit is not None:
+                self.on_edit(param_key, curr_values[0])
\ No newline at end of file
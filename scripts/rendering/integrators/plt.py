@@ -7,6 +7,7 @@ from collections import namedtuple
 
 from typing import List, Tuple, Sequence
 from scripts.utils import spec_fma, spec_prod, spec_add
+from scripts.utils.profiling import profile_stage, profile_count
 
 from mitsuba.ad.integrators.common import ADIntegrator, mis_weight
 
@@ -32,6 +33,18 @@ class PLTIntegrator(ADIntegrator):
                 directional sources)
             - `max_angular_spread` (default: 1E-7): The max solid angle of the propagated
                 generalized ray.
+            - `solve_mode` (default: "incremental"): How the solve phase evolves
+                the light distribution along the sampled path.
+                "replay" replays the whole subpath for every bounce (quadratic
+                in `max_depth`), sourcing the coherence at each light vertex.
+                "incremental" evolves the contributions of all bounces from
+                the light towards the sensor in a single sweep, so each bounce
+                is evaluated once per sample.
+            - `wavefront_budget` (default: 0): Maximum number of samples rendered
+                at once when this integrator renders on its own, see
+                `ADIntegrator`. When it is nested in the `stokes` integrator,
+                whose render calls `sample()` directly, the budget has to be
+                set on `stokes` instead to bound the bounce buffers.
         """
         # path tracing props
         self.max_depth = arg.get("max_depth", def_value=16)
@@ -44,6 +57,12 @@ class PLTIntegrator(ADIntegrator):
         self.distant_sourcing_area = arg.get("distant_sourcing_area", def_value=1E-7)
         self.max_angular_spread = arg.get("max_angular_spread", def_value=1E-7)
 
+        # solve phase properties
+        self.solve_mode = arg.get("solve_mode", def_value="incremental")
+        if self.solve_mode not in ("incremental", "replay"):
+            raise Exception(f"PLTIntegrator: unknown solve_mode '{self.solve_mode}', "
+                            "must be 'incremental' or 'replay'!")
+
         super().__init__(arg)
 
     @dr.syntax
@@ -98,12 +117,8 @@ class PLTIntegrator(ADIntegrator):
                 ray_flags=mi.RayFlags.All,
                 coherent=(depth == 0))
             
-            # 2. check if intersected geometry is an emitter,
-            # terminate path if a light source is found and store its distribution.
-            is_emitter = si.shape.is_emitter()
-
-            # continue iteration?
-            active_next = (depth + 1 < self.max_depth) & si.is_valid() # & ~is_emitter
+            # 2. continue iteration?
+            active_next = (depth + 1 < self.max_depth) & si.is_valid()
 
             # 3. sample new direction with BSDF
             bsdf = si.bsdf(ray)
@@ -111,6 +126,7 @@ class PLTIntegrator(ADIntegrator):
             sample_2 = sampler.next_2d()
             lobe_sample_2 = sampler.next_2d()
 
+            profile_count("bsdf_sample", active)
             sd, bsdf_weight = bsdf.wbsdf_sample(
                 bsdf_ctx, si, sample_1, sample_2, lobe_sample_2)
 
@@ -144,15 +160,9 @@ class PLTIntegrator(ADIntegrator):
 
             # store bounce data
             bounce = mi.BounceData3f(
-                id=i,
                 interaction=si,
-                wi=-ray.d,
                 wo=bsdf_sample.wo,
                 bsdf_flags=bsdf_sample.sampled_type,
-                rr_thp=rcp_thp,
-                throughput=α,
-                bsdf_weight=bsdf_weight.L,
-                is_emitter=is_emitter,
                 last_nd_pdf=last_nd_pdf,
                 sampled_lobe=sd.diffraction_lobe,
                 sampling_wavelengths=wavelengths,
@@ -170,7 +180,6 @@ class PLTIntegrator(ADIntegrator):
         aovs[0] = α
         return bounce_buffer, wavelengths, aovs
 
-    @dr.syntax
     def plt_solve_phase(self,
                         mode : dr.ADMode, 
                         scene : mi.Scene, 
@@ -183,6 +192,36 @@ class PLTIntegrator(ADIntegrator):
                         bounce_buffer : dr.Local[mi.BounceData3f],
                         wavelength : mi.Float) -> Tuple[mi.Spectrum, mi.Bool, Sequence[mi.Float], List[mi.Float]]:
         
+        if self.solve_mode == "replay":
+            return self.plt_solve_phase_replay(mode, 
+                scene, 
+                sampler, 
+                depth, 
+                δL, δaovs, 
+                state_in, active, 
+                bounce_buffer, wavelength)
+        
+        return self.plt_solve_phase_incremental(mode, 
+            scene, 
+            sampler, 
+            depth, 
+            δL, δaovs, 
+            state_in, active, 
+            bounce_buffer, wavelength)
+
+    @dr.syntax
+    def plt_solve_phase_replay(self,
+                               mode : dr.ADMode, 
+                               scene : mi.Scene, 
+                               sampler : mi.Sampler,
+                               depth : mi.UInt32,
+                               δL : mi.Spectrum,
+                               δaovs : List[mi.Float],
+                               state_in : any,
+                               active : mi.Bool,
+                               bounce_buffer : dr.Local[mi.BounceData3f],
+                               wavelength : mi.Float) -> Tuple[mi.Spectrum, mi.Bool, Sequence[mi.Float], List[mi.Float]]:
+        
         # Solve data
         L = mi.Spectrum(0.0)
 
@@ -216,6 +255,194 @@ class PLTIntegrator(ADIntegrator):
             i += 1
 
         return (L, active, [], [])
+
+    @dr.syntax
+    def plt_solve_phase_incremental(self,
+                                    mode : dr.ADMode, 
+                                    scene : mi.Scene, 
+                                    sampler : mi.Sampler,
+                                    depth : mi.UInt32,
+                                    δL : mi.Spectrum,
+                                    δaovs : List[mi.Float],
+                                    state_in : any,
+                                    active : mi.Bool,
+                                    bounce_buffer : dr.Local[mi.BounceData3f],
+                                    wavelength : mi.Float) -> Tuple[mi.Spectrum, mi.Bool, Sequence[mi.Float], List[mi.Float]]:
+        """Solve forward PLT transport in linear time over the bounce buffer.
+
+        Instead of replaying the subpath `0..i-1` for every bounce `i`, the
+        solve takes two passes over the bounce buffer. The first one, from
+        the sensor, computes the emissive and NEE contributions of every
+        bounce (drawing the samples in the same order as the replay solve).
+        The second one, from the light, evolves them towards the sensor: 
+        the contribution of the bounces `i..` is weighted by the wBSDF of
+        bounce `i-1` and added to the one of that bounce, so that every
+        `BounceData` is read and its wBSDF weight is evaluated exactly once
+        per sample.
+
+        As in `replay_path`, the coherence is sourced at the light side and
+        propagated towards the sensor before each wBSDF weight. It is
+        sourced once, at the last bounce, for all the subpaths, whereas
+        `replay_path` restarts it at every light vertex, which only changes
+        its optical path length.
+
+        Returns:
+            Tuple[mi.Spectrum, mi.Bool, Sequence[mi.Float], List[mi.Float]]: 
+            The contribution of all subpaths, the active lanes, AOVs and output state.
+        """
+        
+        bsdf_ctx = mi.BSDFContext(mi.TransportMode.Radiance)
+
+        # emissive and NEE contribution of each bounce, without the
+        # throughput of the subpath that connects it to the sensor
+        local_buffer : dr.Local[mi.Spectrum] = dr.alloc_local(mi.Spectrum, self.max_depth)
+        prev_bounce = dr.zeros(mi.BounceData3f)
+
+        i = mi.UInt32(0)
+
+        while i < self.max_depth:
+            bounce = bounce_buffer.read(i)
+
+            # account for emissive geometry hit at this bounce
+            Lem = self.emissive_contribution(scene, bounce, prev_bounce, i > 0)
+            Llocal = self.measure(mode,
+                scene, 
+                sampler, 
+                depth, 
+                δL, δaovs, 
+                state_in, bounce.active,
+                bounce_buffer, wavelength, Lem)
+            
+            # perform NEE for this bounce
+            Llocal = spec_add(Llocal, self.nee_contribution(scene, sampler, bounce))
+            local_buffer.write(mi.Spectrum(Llocal), i)
+
+            # next bounce
+            prev_bounce = bounce
+            i += 1
+
+        # evolve the contributions from the light towards the sensor.
+        # assume very coherent light from the start, as in the replay solve
+        L = mi.Spectrum(0.0)
+        coherence = mi.Coherence3f(mi.Float(1e-18), mi.Float(0.0))
+
+        j = mi.Int32(self.max_depth - 1)
+
+        while j >= 0:
+            bidx = mi.UInt32(j)
+            bounce = bounce_buffer.read(bidx)
+            si = bounce.interaction
+
+            # propagate
+            profile_count("coherence_update", si.is_valid())
+            coherence.propagate(
+                si.t, 
+                si.is_valid())
+
+            bsdf = si.bsdf()
+            sd = mi.PLTSamplePhaseData3f(
+                dr.zeros(mi.BSDFSample3f), 
+                bounce.sampled_lobe, 
+                mi.Vector3f(0.0), 
+                coherence, 
+                bounce.sampling_wavelengths)
+            L[bounce.active] = spec_prod(bsdf.wbsdf_weight(bsdf_ctx, si, bounce.wo, sd).L, L)
+            L = mi.Spectrum(spec_add(local_buffer.read(bidx), L))
+
+            # previous bounce in the sensor subpath
+            j -= 1
+
+        return (L, active, [], [])
+
+    def nee_contribution(self,
+                         scene : mi.Scene,
+                         sampler : mi.Sampler,
+                         bounce : mi.BounceData3f) -> mi.Spectrum:
+        """Sample an emitter from the vertex of a bounce and compute its MIS
+        weighted contribution, without the throughput of the subpath that 
+        connects the vertex to the sensor.
+
+        Args:
+            scene (mi.Scene): The scene to render
+            sampler (mi.Sampler): The sampler
+            bounce (mi.BounceData3f): The bounce to connect to a light source
+
+        Returns:
+            mi.Spectrum: The local contribution of the emitter sample
+        """
+        profile_count("nee", bounce.active)
+
+        bsdf_ctx = mi.BSDFContext()
+        si = bounce.interaction
+
+        active_em = bounce.active & mi.has_flag(bounce.bsdf_flags, mi.BSDFFlags.Smooth);
+
+        ds, em_weight = scene.sample_emitter_direction(si, sampler.next_2d(), True, active_em)
+
+        # enable AD and recompute contribution of the emitter sample
+        with dr.resume_grad():
+            # direction towards the emitter
+            ds.d = dr.normalize(ds.p - si.p)
+
+            em_val = scene.eval_emitter_direction(si, ds, active_em)
+            em_weight = dr.select(ds.pdf != 0.0, em_val / ds.pdf, 0)
+
+        wo = si.to_local(ds.d)
+
+        # no need to recompute UV coordinates again, just get the bsdf
+        bsdf = si.bsdf()
+        sd = mi.PLTSamplePhaseData3f(
+            dr.zeros(mi.BSDFSample3f), 
+            bounce.sampled_lobe, 
+            mi.Vector3f(0.0), 
+            mi.Coherence3f(mi.Float(0.0), mi.Float(0.0)),
+            bounce.sampling_wavelengths)
+        bsdf_val, bsdf_pdf = bsdf.wbsdf_eval_pdf(bsdf_ctx, si, wo, sd, bounce.active)
+        bsdf_val = bsdf_val.L
+
+        mis_em = dr.select(ds.delta, 1.0, mis_weight(ds.pdf, bsdf_pdf))
+
+        return em_weight * mis_em * bsdf_val
+
+    def emissive_contribution(self,
+                              scene : mi.Scene,
+                              bounce : mi.BounceData3f,
+                              prev_bounce : mi.BounceData3f,
+                              has_prev : mi.Bool) -> mi.Spectrum:
+        """Compute the MIS weighted emission of the geometry hit at a bounce,
+        without the throughput of the subpath that connects it to the sensor.
+
+        Args:
+            scene (mi.Scene): The scene to render
+            bounce (mi.BounceData3f): The bounce that may lie on an emitter
+            prev_bounce (mi.BounceData3f): The previous bounce in the path
+            has_prev (mi.Bool): Whether `prev_bounce` is valid (false for
+            the first bounce, whose previous vertex is the sensor)
+
+        Returns:
+            mi.Spectrum: The emitted intensity with its MIS weight
+        """
+        profile_count("emissive", bounce.active)
+
+        # Prepare information to evaluate emissive contribution
+        prev_si = dr.select(
+            has_prev, 
+            prev_bounce.interaction, 
+            dr.zeros(mi.SurfaceInteraction3f))
+        prev_bsdf_delta = dr.select(
+            has_prev, 
+            mi.has_flag(prev_bounce.bsdf_flags, mi.BSDFFlags.Delta), 
+            mi.Bool(True))
+        
+        si = bounce.interaction
+        ds = mi.DirectionSample3f(scene, si, prev_si)
+        mis_bsdf = mis_weight(
+            bounce.last_nd_pdf,
+            scene.pdf_emitter_direction(prev_si, ds, ~prev_bsdf_delta)
+        )
+
+        # Emitted intensity with MIS weight
+        return mis_bsdf * ds.emitter.eval(si)
     
     @dr.syntax
     def solve_replay_NEE(self, 
@@ -253,36 +480,8 @@ class PLTIntegrator(ADIntegrator):
         coherence = mi.Coherence3f(mi.Float(1e-18), mi.Float(0.0))
 
         bounce = bounce_buffer.read(bounce_idx)
-        bsdf_ctx = mi.BSDFContext()
-        si = bounce.interaction
-
-        active_em = bounce.active & mi.has_flag(bounce.bsdf_flags, mi.BSDFFlags.Smooth);
-
-        ds, em_weight = scene.sample_emitter_direction(si, sampler.next_2d(), True, active_em)
-
-        # enable AD and recompute contribution of the emitter sample
-        with dr.resume_grad():
-            # direction towards the emitter
-            ds.d = dr.normalize(ds.p - si.p)
 
-            em_val = scene.eval_emitter_direction(si, ds, active_em)
-            em_weight = dr.select(ds.pdf != 0.0, em_val / ds.pdf, 0)
-
-        wo = si.to_local(ds.d)
-
-        # no need to recompute UV coordinates again, just get the bsdf
-        bsdf = si.bsdf()
-        sd = mi.PLTSamplePhaseData3f(
-            dr.zeros(mi.BSDFSample3f), 
-            bounce.sampled_lobe, 
-            mi.Vector3f(0.0), 
-            mi.Coherence3f(mi.Float(0.0), mi.Float(0.0)),
-            bounce.sampling_wavelengths)
-        bsdf_val = bsdf.wbsdf_eval(bsdf_ctx, si, wo, sd, bounce.active)
-        bsdf_pdf = bsdf.wbsdf_pdf(bsdf_ctx, si, wo, sd, bounce.active)
-        bsdf_val = bsdf_val.L
-
-        mis_em = dr.select(ds.delta, 1.0, mis_weight(ds.pdf, bsdf_pdf))
+        Lnee = self.nee_contribution(scene, sampler, bounce)
 
         α = self.replay_path(mode, 
             scene, 
@@ -297,7 +496,7 @@ class PLTIntegrator(ADIntegrator):
             wavelength, 
             bounce_idx)
 
-        return em_weight * mis_em * bsdf_val * α
+        return Lnee * α
     
     # @dr.syntax
     # def source_PLT_beam(self,  
@@ -351,29 +550,10 @@ class PLTIntegrator(ADIntegrator):
         bounce = bounce_buffer.read(bounce_idx)
         prev_bounce = bounce_buffer.read(bounce_idx - 1, bounce_idx > 0)
 
-        # Prepare information to evaluate emissive contribution
-        prev_si = dr.select(
-            bounce_idx > 0, 
-            prev_bounce.interaction, 
-            dr.zeros(mi.SurfaceInteraction3f))
-        prev_bsdf_delta = dr.select(
-            bounce_idx > 0, 
-            mi.has_flag(prev_bounce.bsdf_flags, mi.BSDFFlags.Delta), 
-            mi.Bool(True))
-        
-        ds = mi.DirectionSample3f(scene, bounce.interaction, prev_si)
-        mis_bsdf = mis_weight(
-            bounce.last_nd_pdf,
-            scene.pdf_emitter_direction(prev_si, ds, ~prev_bsdf_delta)
-        )
-
         # Emitted intensity with MIS weight
-        Lem = mis_bsdf * ds.emitter.eval(bounce.interaction)
+        Lem = self.emissive_contribution(scene, bounce, prev_bounce, bounce_idx > 0)
 
-        # 2. Source ray based on hit type (env/area)
-        is_environment = ds.emitter.is_environment()
-
-        # 3. Replay path and evolve light distribution 
+        # 2. Replay path and evolve light distribution 
         α = self.replay_path(mode, 
             scene, 
             sampler, 
@@ -389,7 +569,7 @@ class PLTIntegrator(ADIntegrator):
             
         Li = α * Lem
 
-        # 4. Measure beam at sensor
+        # 3. Measure beam at sensor
 
         return self.measure(
             mode,
@@ -435,6 +615,8 @@ class PLTIntegrator(ADIntegrator):
         Returns:
             mi.Spectrum: The weight of this light path
         """
+        profile_count("replay_path", active)
+
         bsdf_ctx = mi.BSDFContext(mi.TransportMode.Radiance)
         i = mi.Int32(bounce_idx - 1) 
         α = mi.Spectrum(1.0)
@@ -445,14 +627,17 @@ class PLTIntegrator(ADIntegrator):
 
             # Read subpath bounce
             bounce = bounce_buffer[bidx]
+            si = bounce.interaction
             
             # propagate
+            profile_count("replay_bounce", bounce.active)
+            profile_count("coherence_update", si.is_valid())
             coherence.propagate(
-                bounce.interaction.t, 
-                bounce.interaction.is_valid())
+                si.t, 
+                si.is_valid())
 
             # Propagate beam and evolve distribution (TODO)
-            bsdf = bounce.interaction.bsdf()
+            bsdf = si.bsdf()
 
             # A: Correct way
             sd = mi.PLTSamplePhaseData3f(
@@ -461,11 +646,8 @@ class PLTIntegrator(ADIntegrator):
                 mi.Vector3f(0.0), 
                 coherence, 
                 bounce.sampling_wavelengths)
-            α[bounce.active] = bsdf.wbsdf_weight(bsdf_ctx, bounce.interaction, bounce.wo, sd).L * α[bounce.active]
+            α[bounce.active] = bsdf.wbsdf_weight(bsdf_ctx, si, bounce.wo, sd).L * α[bounce.active]
 
-            # B: Debug using information from sample pass
-            #α[bounce.active] = bounce.bsdf_weight * α[bounce.active]
-            
             # next bounce in forward path
             i -= 1
 
@@ -502,29 +684,31 @@ class PLTIntegrator(ADIntegrator):
                active : mi.Bool) -> Tuple[mi.Spectrum, mi.Bool, Sequence[mi.Float], List[mi.Float]]:
         
         # Sample a path from the sensor towards a light source
-        bounce_buffer, wavelength, sample_aovs = self.plt_sample_phase(
-            mode, 
-            scene, 
-            sampler, 
-            ray, 
-            depth, 
-            δL, 
-            δaovs, 
-            state_in, 
-            active)
+        with profile_stage("sample_phase", active):
+            bounce_buffer, wavelength, sample_aovs = self.plt_sample_phase(
+                mode, 
+                scene, 
+                sampler, 
+                ray, 
+                depth, 
+                δL, 
+                δaovs, 
+                state_in, 
+                active)
 
         # Solve forward PLT wave transport
-        result, active, solve_aovs, state_out = self.plt_solve_phase(
-            mode, 
-            scene, 
-            sampler, 
-            depth, 
-            δL, 
-            δaovs, 
-            state_in, 
-            active, 
-            bounce_buffer,
-            wavelength)
+        with profile_stage("solve_phase", active):
+            result, active, solve_aovs, state_out = self.plt_solve_phase(
+                mode, 
+                scene, 
+                sampler, 
+                depth, 
+                δL, 
+                δaovs, 
+                state_in, 
+                active, 
+                bounce_buffer,
+                wavelength)
     
         return (result, active, [], state_out)
     
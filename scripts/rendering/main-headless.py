@@ -1,7 +1,9 @@
 import mitsuba as mi
 import drjit as dr
 
+import csv
 import json
+import itertools
 import time
 import os
 
@@ -13,22 +15,131 @@ import matplotlib.pyplot as plt
 import argparse
 
 from scripts.utils import *
+from scripts.utils.profiling import StageProfiler
 # from scripts.rendering.integrators.plt import PLTIntegrator
 
 def process_override_value(st : str):
+    """Parse the value of an override. Supported values are:
+
+    - Floats: `0.5`
+    - Vectors and lists: `1,0,0` or `[1, 0, 0]`
+    - Spectra from a file: `spd:path/to/file.spd` (the values of the spectrum)
+
+    Returns:
+        float | list: The parsed value
+    """
+    st = st.strip()
+
+    if st.startswith("spd:"):
+        _, values = mi.spectrum_from_file(st.removeprefix("spd:"))
+        return list(values)
+
+    st = st.removeprefix("[").removesuffix("]")
+    if "," in st:
+        return [ float(v) for v in st.split(",") ]
 
-    # for now only floats
     return float(st)
 
+def parse_overrides(overrides):
+    """Parse a list of `name=value` overrides into a dictionary"""
+    parsed = {}
+    for ov in overrides:
+        name, value = ov.split("=", 1)
+        parsed[name] = process_override_value(value)
+    return parsed
+
+def apply_overrides(scene_params, overrides):
+    """Apply a set of overrides to the scene with a single update
+
+    Values are converted to the type of the parameter they replace, so that
+    they don't get baked into the compiled kernels.
+    """
+    for name, value in overrides.items():
+        print("overriding", name, "=", value)
+        current = scene_params[name]
+        if dr.is_array_v(current):
+            value = type(current)(value)
+        scene_params[name] = value
+
+    scene_params.update()
+
+def sweep_points(sweeps):
+    """Expand a list of (name, values...) sweeps into the grid of all their combinations
+
+    Returns:
+        list: A dictionary of overrides for each point of the grid
+    """
+    names = [ sw[0] for sw in sweeps ]
+    values = [ [ process_override_value(v) for v in sw[1:] ] for sw in sweeps ]
+    return [ dict(zip(names, point)) for point in itertools.product(*values) ]
+
+def write_results(folder_path, L, sp, el, spp, overrides=None):
+
+    if folder_path:
+        os.makedirs(folder_path, exist_ok=True)
+
+    # all stokes components are stored as layers of a single EXR file
+    write_stokes_exr(os.path.join(folder_path, f'result.exr'), sp)
+    mi.util.write_bitmap(os.path.join(folder_path, f'result.png'), L, write_async=True)
+
+    # write data about the render
+    render_data = {
+        "bitmap_size" : {
+            "width" : L.size().x,
+            "height" : L.size().y
+        },
+        "samples" : spp,
+        "time": format_time(el),
+        "time_per_sample": format_time(el / spp)
+    }
+    if overrides is not None:
+        render_data["overrides"] = overrides
+
+    with open(os.path.join(folder_path, "params.json"), "w") as f:
+        json.dump(render_data, f, indent=2)
+
+def run_sweep(args, scene, scene_params):
+    """Render every point of the sweep with the already loaded scene and integrator"""
+
+    points = sweep_points(args.sweep)
+    folder_path = args.outdir if args.outdir else ""
+
+    # only the swept parameters are updated between points
+    scene_params.keep(list(points[0].keys()))
+    integrator = load_integrator(args.integrator, args.samples_per_pass, args.wavefront_budget)
+
+    rows = []
+    for k, overrides in enumerate(points):
+        print(f"Sweep point {k + 1}/{len(points)}")
+        start = time.perf_counter_ns()
+        apply_overrides(scene_params, overrides)
+        update_time = time.perf_counter_ns() - start
+
+        start = time.perf_counter_ns()
+        result = integrator.render(scene, spp=args.spp)
+        L, sp = develop_stokes(result, args.denoise)
+        el = time.perf_counter_ns() - start
+        print(f"...done. ({format_time(el)})")
+
+        point_folder = os.path.join(folder_path, f"point_{k:03d}")
+        write_results(point_folder, L, sp, el, args.spp, overrides)
+
+        rows.append({
+            "point" : f"point_{k:03d}",
+            **{ name : str(value) for name, value in overrides.items() },
+            "update_time(s)" : f"{update_time / 1e9:.3f}",
+            "time(s)" : f"{el / 1e9:.3f}"
+        })
+
+    with open(os.path.join(folder_path, "sweep.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()), delimiter=";")
+        writer.writeheader()
+        writer.writerows(rows)
+
 def main(args):
 
     # process overrides in dict
-    overrides = {}
-    print(args.override)
-    for ov in args.override:
-        ov_split = ov.split("=")
-        name, value = ov_split[0], process_override_value(ov_split[1])
-        overrides[name] = value
+    overrides = parse_overrides(args.override)
     
     # load scene
     print("Loading scene...")
@@ -43,53 +154,41 @@ def main(args):
         print(scene_params)
 
     # apply each override
-    for name, value in overrides.items():
-        print("overriding", name, "=", value)
-        scene_params[name] = value
+    apply_overrides(scene_params, overrides)
 
-    scene_params.update()
+    if args.sweep:
+        run_sweep(args, scene, scene_params)
+        return
 
     #render scene using the desired integrator    
     print("Rendering...")
-    L, sp, result = render_scene(scene, args.spp, args.integrator, args.denoise)
+    start = time.perf_counter_ns()
+    if args.profile:
+        profiler = StageProfiler()
+        result = profiler.profile_render(load_integrator(args.integrator, args.samples_per_pass, args.wavefront_budget), scene, args.spp)
+        L, sp = develop_stokes(result, args.denoise)
+    else:
+        integrator = load_integrator(args.integrator, args.samples_per_pass, args.wavefront_budget)
+        L, sp, result = render_scene(scene, args.spp, integrator, args.denoise)
     el = time.perf_counter_ns() - start
     print(f"...done. ({format_time(el)})")
 
+    if args.profile:
+        print(profiler.report())
+
     # folder to store data
     folder_path = ""
     if args.outdir:
         folder_path = args.outdir
-        try:
-            os.makedirs(folder_path)
+        if not os.path.exists(folder_path):
             print(f"Creating folder at '{folder_path}'")
-        except FileExistsError:
-            pass
-    
-    mi.util.write_bitmap(os.path.join(folder_path, f'result.exr'), L, write_async=True)
-    mi.util.write_bitmap(os.path.join(folder_path, f'result.png'), L, write_async=True)
 
-    for i, si in enumerate(sp):
-        mi.util.write_bitmap(os.path.join(folder_path, f'result_s{i}.exr'), si, write_async=True)
-        mi.util.write_bitmap(os.path.join(folder_path, f'result_s{i}.png'), si, write_async=True)
-
-    # write data about the render
-    render_data = {
-        "bitmap_size" : {
-            "width" : L.size().x,
-            "height" : L.size().y
-        },
-        "samples" : args.spp,
-        "time": format_time(el),
-        "time_per_sample": format_time(el / args.spp)
-    }
-
-    with open(os.path.join(folder_path, "params.json"), "w") as f:
-        json.dump(render_data, f, indent=2)
+    write_results(folder_path, L, sp, el, args.spp)
 
     if args.plot:
         # plot intensity (s0)
         plt.figure(figsize=(5, 5))
-        plt.imshow(sp[0].convert(srgb_gamma=True), cmap='gray')
+        plt.imshow(mi.Bitmap(sp[0]).convert(srgb_gamma=True), cmap='gray')
         plt.colorbar()
         plt.xticks([]); plt.yticks([])
         plt.xlabel("S0: Intensity", size=14, weight='bold')
@@ -120,17 +219,19 @@ if __name__ == '__main__':
     parser.add_argument("--spp", type=int, help="Samples per pixel", default=64)
     parser.add_argument("--outdir", "-o", type=str, help="The folder in which to store the results")
     parser.add_argument("--denoise", "-d", action="store_true", help="Whether to denoise the final result.")
+    parser.add_argument("--profile", action="store_true", help="Report the statistics of each stage of the PLT integrator.")
     parser.add_argument("--override", "-r", type=str, nargs="*", help="Set of overrides to apply to the scene.", default=[])
+    parser.add_argument("--sweep", type=str, nargs="+", action="append", metavar=("NAME", "VALUE"),
+                        help="Render the scene for each value of a parameter (repeat to sweep the grid of several parameters).")
+    add_backend_arguments(parser)
     
     args = parser.parse_args()
 
+    if args.sweep and any(len(sw) < 2 for sw in args.sweep):
+        parser.error("--sweep needs a parameter name and at least one value")
+
     # setup mode here
-    if args.spectral:
-        print("Loading spectral variant...")
-        mi.set_variant("cuda_ad_spectral_polarized")
-    else:
-        print("Loading RGB variant...")
-        mi.set_variant("cuda_ad_rgb_polarized")
+    setup_backend(args, spectral=args.spectral)
 
     # load integrators
     from scripts.rendering.integrators.path import MISPathIntegrator
@@ -5,7 +5,8 @@ from ttkbootstrap.constants import *
 import mitsuba as mi
 import drjit as dr
 
-mi.set_variant("cuda_ad_spectral_polarized")
+from scripts.utils.backend import set_backend
+set_backend(spectral=True)
 
 import argparse
 
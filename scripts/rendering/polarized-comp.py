@@ -6,7 +6,8 @@ import os
 
 from utils import *
 
-mi.set_variant("cuda_ad_rgb_polarized")
+from scripts.utils.backend import set_backend
+set_backend()
 
 import numpy as np
 import matplotlib.pyplot as plt
@@ -49,7 +50,7 @@ def main(args):
     subfigs = fig.subfigures(nrows=nfolders, ncols=1)
 
     for i, folder in enumerate(args.folders):
-        imgs = [ read_exr(os.path.join(folder, f"result_s{p}.exr")) for p in range(4) ]
+        imgs = read_stokes(folder)
 
         axs = subfigs[i].subplots(nrows=1, ncols=4)
         subfigs[i].suptitle(folder)
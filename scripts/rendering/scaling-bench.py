@@ -0,0 +1,104 @@
+import mitsuba as mi
+import drjit as dr
+
+import csv
+import time
+import os
+
+from utils import *
+
+import argparse
+
+from scripts.utils import *
+
+def thread_counts(max_threads):
+    """Thread counts of the benchmark: 1, 2, 4... up to (and including) `max_threads`"""
+    counts = []
+    n = 1
+    while n < max_threads:
+        counts.append(n)
+        n *= 2
+    return counts + [max_threads]
+
+def time_render(integrator, scene, spp, repeats):
+    """Best wall-clock time (in ns) of several renders of the scene"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        result = integrator.render(scene, spp=spp)
+        dr.eval(result)
+        dr.sync_thread()
+        el = time.perf_counter_ns() - start
+        best = el if best is None else min(best, el)
+    return best
+
+def main(args):
+
+    print("Loading scene...")
+    scene = mi.load_file(args.scene)
+    film_size = scene.sensors()[0].film().crop_size()
+    samples = film_size.x * film_size.y * args.spp
+
+    integrator = load_integrator(args.integrator, args.samples_per_pass, args.wavefront_budget)
+
+    counts = args.threads if args.threads else thread_counts(os.cpu_count())
+
+    # compile (or load from the kernel cache) every kernel of the render once
+    print("Warming up...")
+    dr.set_thread_count(max(counts))
+    time_render(integrator, scene, args.spp, 1)
+
+    rows = []
+    first = None
+    for n in counts:
+        dr.set_thread_count(n)
+        el = time_render(integrator, scene, args.spp, args.repeats)
+
+        # speedup and parallel efficiency w.r.t. the first (smallest) thread count
+        samples_per_second = samples / (el / 1e9)
+        if first is None:
+            first = (n, samples_per_second)
+        speedup = samples_per_second / first[1]
+        efficiency = speedup * first[0] / n
+
+        print(f"{n:>4} threads: {format_time(el)}, {samples_per_second:.4g} samples/s, "
+              f"speedup {speedup:.2f}, efficiency {efficiency:.2f}")
+        rows.append({
+            "threads" : n,
+            "time(s)" : f"{el / 1e9:.3f}",
+            "samples_per_second" : f"{samples_per_second:.1f}",
+            "speedup" : f"{speedup:.3f}",
+            "efficiency" : f"{efficiency:.3f}"
+        })
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()), delimiter=";")
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Results written to '{args.csv}'")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure how the LLVM backend scales with the amount of cores.")
+    parser.add_argument("scene", help="Scene description file")
+    parser.add_argument("--spectral", "-s", action="store_true", help="Whether to perform spectral rendering.")
+    parser.add_argument("--integrator", "-i", type=str, help="Integrator type.", default="plt")
+    parser.add_argument("--spp", type=int, help="Samples per pixel", default=16)
+    parser.add_argument("--threads", type=int, nargs="+", help="Thread counts to measure (default: 1, 2, 4... up to the amount of cores)")
+    parser.add_argument("--repeats", type=int, help="Renders per thread count (the fastest one is reported)", default=3)
+    parser.add_argument("--samples_per_pass", type=int, default=None,
+                        help="Samples per pixel traced at once, to bound the size of the wavefront (must divide the sample count)")
+    parser.add_argument("--wavefront_budget", type=int, default=None,
+                        help="Maximum amount of samples traced at once (default: no limit)")
+    parser.add_argument("--csv", type=str, help="Where to store the results")
+
+    args = parser.parse_args()
+
+    # the thread count only affects the LLVM backend
+    set_backend("llvm", spectral=args.spectral)
+
+    # load integrators
+    from scripts.rendering.integrators.path import MISPathIntegrator
+    from scripts.rendering.integrators.plt import PLTIntegrator
+
+    main(args)
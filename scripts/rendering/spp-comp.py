@@ -44,14 +44,7 @@ def perform_experiment(args, scene, integrator):
     flips = []
     render_times = []
 
-    #render scene using the desired integrator for each sample count
-    for spp in args.spp:
-        print(f"Rendering image with {spp} spp...")
-        start = time.perf_counter_ns()
-        L, sp, result = render_scene(scene, spp, integrator, args.denoise)
-        el = time.perf_counter_ns() - start
-        print(f"...done. ({format_time(el)})")
-
+    def process_checkpoint(spp, L, sp, el):
         hdr_path = os.path.join(folder_path, f'result_{spp}.exr')
         ldr_path = os.path.join(folder_path, f'result_{spp}.png')
         mi.util.write_bitmap(hdr_path, sp[0], write_async=False)
@@ -72,6 +65,7 @@ def perform_experiment(args, scene, integrator):
                 "height" : L.size().y
             },
             "samples" : spp,
+            "progressive" : bool(args.progressive),
             "time": format_time(el),
             "time_per_sample": format_time(el / spp),
             "FLIP_error" : float(mean_FLIP_err),
@@ -85,6 +79,25 @@ def perform_experiment(args, scene, integrator):
         flips.append(mean_FLIP_err)
         render_times.append(el / 1e9)
 
+    loaded_integrator = load_integrator(integrator, args.samples_per_pass, args.wavefront_budget)
+
+    if args.progressive:
+        # accumulate passes and snapshot the image at every sample count
+        print(f"Rendering progressively up to {max(args.spp)} spp...")
+        for spp, L, sp, result, el in render_progressive(scene, args.spp, loaded_integrator, args.denoise):
+            print(f"...reached {spp} spp. ({format_time(el)})")
+            process_checkpoint(spp, L, sp, el)
+    else:
+        #render scene using the desired integrator for each sample count
+        for spp in args.spp:
+            print(f"Rendering image with {spp} spp...")
+            start = time.perf_counter_ns()
+            L, sp, result = render_scene(scene, spp, loaded_integrator, args.denoise)
+            el = time.perf_counter_ns() - start
+            print(f"...done. ({format_time(el)})")
+
+            process_checkpoint(spp, L, sp, el)
+
     return rmses, flips, render_times
 
 def main(args):
@@ -151,17 +164,17 @@ if __name__ == '__main__':
     parser.add_argument("--denoise", "-d", action="store_true", help="Whether to denoise the final result.")
     parser.add_argument("--reference", "-r", type=str, help="The reference image")
     parser.add_argument("--path_comp", "-c", action="store_true", help="Whether to compare against path traced solution")
-    
+    parser.add_argument("--progressive", "-P", action="store_true", help="Reuse the samples of lower sample counts instead of rendering each one from scratch")
+    add_backend_arguments(parser)
     
     args = parser.parse_args()
 
+    if args.progressive:
+        # checkpoints are produced (and plotted) in increasing order
+        args.spp = sorted(set(args.spp))
+
     # setup mode here
-    if args.spectral:
-        print("Loading spectral variant...")
-        mi.set_variant("cuda_ad_spectral_polarized")
-    else:
-        print("Loading RGB variant...")
-        mi.set_variant("cuda_ad_rgb_polarized")
+    setup_backend(args, spectral=args.spectral)
 
     # load integrators
     from scripts.rendering.integrators.path import MISPathIntegrator
@@ -0,0 +1,297 @@
+import numpy as np
+
+import hashlib
+import json
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+import OpenEXR
+import Imath
+
+# name of the default (intensity) layer of an EXR file
+DEFAULT_LAYER = "L"
+# layers whose values are non-negative, where FLIP is meaningful
+FLIP_LAYERS = (DEFAULT_LAYER, "S0")
+
+def exr_layers(filename):
+    """Decode all the RGB layers of an EXR file
+
+    Args:
+        filename (str): Path of the EXR file
+
+    Returns:
+        dict: A HxWx3 float32 array for each layer. The default layer is stored as `DEFAULT_LAYER`.
+    """
+    exr_file = OpenEXR.InputFile(filename)
+
+    header = exr_file.header()
+    dw = header['dataWindow']
+    size = (dw.max.x - dw.min.x + 1, dw.max.y - dw.min.y + 1)
+
+    # group the channels of each layer (R, G, B or <layer>.R, <layer>.G, <layer>.B)
+    layers = {}
+    for channel in header['channels']:
+        layer, _, c = channel.rpartition(".")
+        if c in ("R", "G", "B"):
+            layers.setdefault(layer if layer else DEFAULT_LAYER, []).append(channel)
+
+    names = [ name for name, channels in layers.items() if len(channels) == 3 ]
+    channels = [ (f"{name}." if name != DEFAULT_LAYER else "") + c for name in names for c in "RGB" ]
+
+    # decode all channels at once
+    dtype = Imath.PixelType(Imath.PixelType.FLOAT)
+    data = exr_file.channels(channels, dtype)
+
+    result = {}
+    for i, name in enumerate(names):
+        result[name] = np.stack(
+            [ np.frombuffer(data[3 * i + c], dtype=np.float32).reshape(size[1], size[0]) for c in range(3) ],
+            axis=-1)
+    return result
+
+def image_files(path):
+    """Get the EXR files of a result, which can be an EXR file or a result folder
+
+    Returns:
+        dict: The file of each layer group: the whole file (None) or a single layer
+        (for folders with one file per stokes component)
+    """
+    if not os.path.isdir(path):
+        return { None : path }
+
+    files = {}
+    if os.path.exists(os.path.join(path, "result.exr")):
+        files[None] = os.path.join(path, "result.exr")
+    for p in range(4):
+        legacy = os.path.join(path, f"result_s{p}.exr")
+        if os.path.exists(legacy):
+            files[f"S{p}"] = legacy
+
+    return files
+
+def file_key(filename):
+    """Key of the current version of a file, based on its path, size and modification time"""
+    st = os.stat(filename)
+    data = f"{os.path.abspath(filename)}:{st.st_size}:{st.st_mtime_ns}"
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+def _decode_to_cache(job):
+    filename, folder, key = job
+    names = []
+    for name, layer in exr_layers(filename).items():
+        np.save(os.path.join(folder, f"{key}_{name}.npy"), layer)
+        names.append(name)
+
+    with open(os.path.join(folder, f"{key}.json"), "w") as f:
+        json.dump(names, f)
+    return key
+
+def tile_means(values, tile_size):
+    """Mean of a HxW array over square tiles (partial tiles at the borders are included)
+
+    Returns:
+        np.array: The mean of each tile
+    """
+    h, w = values.shape
+    th, tw = -(-h // tile_size), -(-w // tile_size)
+    padded = np.full((th * tile_size, tw * tile_size), np.nan, dtype=np.float64)
+    padded[:h, :w] = values
+    return np.nanmean(padded.reshape(th, tile_size, tw, tile_size), axis=(1, 3))
+
+def layer_metrics(image, reference, layer, tile_size):
+    """Compute the error metrics of a layer with respect to its reference
+
+    The errors are computed per channel and then averaged, so the RMSE matches
+    the one of `spp-comp.py`.
+
+    Returns:
+        dict: RMSE, relative MSE and FLIP (only for non-negative layers), for the
+        whole image and per tile.
+    """
+    channel_sq_err = np.square(np.subtract(image, reference, dtype=np.float64))
+    sq_err = np.mean(channel_sq_err, axis=2)
+    rel_sq_err = np.mean(channel_sq_err / (np.square(reference, dtype=np.float64) + 1e-2), axis=2)
+
+    metrics = {
+        "rmse" : float(np.sqrt(np.mean(sq_err))),
+        "relmse" : float(np.mean(rel_sq_err)),
+        "tile_rmse" : np.sqrt(tile_means(sq_err, tile_size)).tolist(),
+        "tile_relmse" : tile_means(rel_sq_err, tile_size).tolist()
+    }
+
+    if layer in FLIP_LAYERS:
+        import flip_evaluator as flip
+        flip_map, mean_flip, _ = flip.evaluate(
+            np.ascontiguousarray(reference), np.ascontiguousarray(image), "HDR")
+        metrics["flip"] = float(mean_flip)
+        metrics["tile_flip"] = tile_means(np.asarray(flip_map, dtype=np.float64), tile_size).tolist()
+
+    return metrics
+
+class ComparisonEngine:
+    """Compare many results against a single reference, caching all work on disk.
+
+    Decoded EXR layers are stored as `.npy` files and memory mapped, and the
+    metrics of every (image, reference) pair are stored in `metrics.json`.
+    Entries are keyed by the path, size and modification time of the files,
+    so re-rendered results are decoded and compared again automatically.
+
+    Only the `max_entries` most recently used decoded files are kept (their
+    last use is the modification time of their `<key>.json` file), and the
+    metrics of evicted files are dropped along with them.
+    """
+
+    METRICS_FILE = "metrics.json"
+
+    def __init__(self, cache_dir=".compare_cache", tile_size=64, workers=None, max_entries=64):
+        self.cache_dir = cache_dir
+        self.tile_size = tile_size
+        self.workers = workers
+        self.max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+
+        try:
+            with open(os.path.join(cache_dir, ComparisonEngine.METRICS_FILE)) as f:
+                metrics = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            metrics = {}
+
+        # drop the entries written by older versions, which don't record their files
+        self.metrics = { entry : value for entry, value in metrics.items() if "files" in value }
+
+    def __save_metrics(self):
+        path = os.path.join(self.cache_dir, ComparisonEngine.METRICS_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.metrics, f)
+        os.replace(path + ".tmp", path)
+
+    def __names_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def __layer_names(self, key):
+        with open(self.__names_path(key)) as f:
+            return json.load(f)
+
+    def decode(self, filenames):
+        """Decode a set of EXR files in parallel, skipping those already cached
+
+        Returns:
+            dict: The cache key of each file
+        """
+        keys = { fn : file_key(fn) for fn in filenames }
+        missing = []
+        for fn, key in keys.items():
+            if os.path.exists(self.__names_path(key)):
+                # mark the cached file as recently used
+                os.utime(self.__names_path(key))
+            else:
+                missing.append((fn, self.cache_dir, key))
+
+        if missing:
+            with ProcessPoolExecutor(self.workers) as pool:
+                list(pool.map(_decode_to_cache, missing))
+
+        return keys
+
+    def layers(self, key):
+        """Memory map the decoded layers of a cached file
+
+        Returns:
+            dict: A read-only HxWx3 array for each layer
+        """
+        names = self.__layer_names(key)
+        return { name : np.load(os.path.join(self.cache_dir, f"{key}_{name}.npy"), mmap_mode="r") for name in names }
+
+    def evict(self, keep=()):
+        """Remove the least recently used decoded files beyond `max_entries`,
+        along with the metrics computed from them
+
+        Args:
+            keep (iterable, optional): Keys of files that must not be evicted. Defaults to ().
+
+        Returns:
+            bool: Whether any metrics were dropped
+        """
+        cached = [ fn[:-len(".json")] for fn in os.listdir(self.cache_dir)
+                   if fn.endswith(".json") and fn != ComparisonEngine.METRICS_FILE ]
+        lru = sorted(cached, key=lambda k: os.path.getmtime(self.__names_path(k)))
+
+        keep = set(keep)
+        evicted = { key for key in lru[:max(0, len(lru) - self.max_entries)] if key not in keep }
+        for key in evicted:
+            for name in self.__layer_names(key):
+                try:
+                    os.remove(os.path.join(self.cache_dir, f"{key}_{name}.npy"))
+                except FileNotFoundError:
+                    pass
+            os.remove(self.__names_path(key))
+
+        # metrics of files that are no longer cached can't be reused
+        live = set(cached) - evicted
+        stale = [ entry for entry, value in self.metrics.items() if not set(value["files"]) <= live ]
+        for entry in stale:
+            del self.metrics[entry]
+
+        return len(stale) > 0
+
+    def __result_layers(self, files, keys):
+        layers = {}
+        for layer, fn in files.items():
+            decoded = self.layers(keys[fn])
+            if layer is None:
+                layers.update(decoded)
+            else:
+                layers[layer] = decoded[DEFAULT_LAYER]
+        return layers
+
+    def __result_key(self, files, keys):
+        return ":".join(f"{layer}={keys[fn]}" for layer, fn in sorted(files.items(), key=lambda t: str(t[0])))
+
+    def compare(self, reference, results):
+        """Compare a set of results against a reference
+
+        Args:
+            reference (str): The reference EXR file or result folder
+            results (list): EXR files or result folders to compare
+
+        Returns:
+            dict: For each result, the metrics (see `layer_metrics`) of every
+            layer present in both the result and the reference.
+        """
+        ref_files = image_files(reference)
+        res_files = { r : image_files(r) for r in results }
+
+        all_files = set(ref_files.values())
+        for files in res_files.values():
+            all_files.update(files.values())
+        keys = self.decode(sorted(all_files))
+
+        ref_key = self.__result_key(ref_files, keys)
+        ref_layers = None
+
+        comparison = {}
+        updated = False
+        for r, files in res_files.items():
+            entry = f"{self.__result_key(files, keys)}|{ref_key}|{self.tile_size}"
+
+            if entry not in self.metrics:
+                if ref_layers is None:
+                    ref_layers = self.__result_layers(ref_files, keys)
+                layers = self.__result_layers(files, keys)
+
+                self.metrics[entry] = {
+                    "files" : sorted(set(keys[fn] for fn in files.values()) | set(keys[fn] for fn in ref_files.values())),
+                    "layers" : {
+                        name : layer_metrics(layers[name], ref_layers[name], name, self.tile_size)
+                        for name in layers if name in ref_layers
+                    }
+                }
+                updated = True
+
+            comparison[r] = self.metrics[entry]["layers"]
+
+        if self.evict(keep=keys.values()) or updated:
+            self.__save_metrics()
+
+        return comparison
@@ -3,11 +3,13 @@ import argparse
 import matplotlib.pyplot as plt
 import numpy as np
 
+import os
+
 import OpenEXR
 import Imath
 import numpy as np
 
-def read_exr(filename):
+def read_exr(filename, layer=None):
     # Open the EXR file
     exr_file = OpenEXR.InputFile(filename)
 
@@ -16,10 +18,26 @@ def read_exr(filename):
     dw = header['dataWindow']
     size = (dw.max.x - dw.min.x + 1, dw.max.y - dw.min.y + 1)
 
-    # Assume EXR contains RGB channels
-    channels = ['R', 'G', 'B']
+    # Assume EXR contains RGB channels (in the given layer, if any)
+    channels = ['R', 'G', 'B'] if layer is None else [f'{layer}.{c}' for c in 'RGB']
     dtype = Imath.PixelType(Imath.PixelType.FLOAT)  # Use FLOAT for actual pixel values
 
-    # Read each channel and stack into a single array
-    data = [np.frombuffer(exr_file.channel(c, dtype), dtype=np.float32).reshape(size[1], size[0]) for c in channels]
-    return np.stack(data, axis=-1)  # Combine into HxWxC format
\ No newline at end of file
+    # Read all channels at once and stack into a single array
+    data = [np.frombuffer(c, dtype=np.float32).reshape(size[1], size[0]) for c in exr_file.channels(channels, dtype)]
+    return np.stack(data, axis=-1)  # Combine into HxWxC format
+
+def read_stokes(folder):
+    """Read the stokes components (s0, s1, s2, s3) of a render
+
+    Args:
+        folder (str): The folder of the render
+
+    Returns:
+        list: An array for each stokes component
+    """
+    path = os.path.join(folder, "result.exr")
+    if 'S0.R' in OpenEXR.InputFile(path).header()['channels']:
+        return [ read_exr(path, f"S{p}") for p in range(4) ]
+
+    # renders with one file per component
+    return [ read_exr(os.path.join(folder, f"result_s{p}.exr")) for p in range(4) ]
@@ -15,10 +15,22 @@ import argparse
 from scripts.utils import *
 # from scripts.rendering.integrators.plt import PLTIntegrator
 
-def render_scene(scene, samples, integrator="path", denoise=False):
-    
-    #render scene using the desired integrator
-    integrator = mi.load_dict({
+def load_integrator(integrator="path", samples_per_pass=None, wavefront_budget=None):
+    """Load the polarized (stokes) integrator used by the rendering scripts
+
+    Args:
+        integrator (str, optional): The type of the nested integrator. Defaults to "path".
+        samples_per_pass (int, optional): Samples per pixel traced at once. Renders 
+        are split into several passes of this size, which must divide their sample count. 
+        Defaults to None (a single pass).
+        wavefront_budget (int, optional): Maximum number of samples traced at once. 
+        Renders are split into passes over the largest batches of samples per pixel 
+        that fit in the budget. Defaults to None (no limit).
+
+    Returns:
+        mi.Integrator: The loaded integrator
+    """
+    desc = {
         "type" : "stokes",
         "nested" : {
             "type" : integrator,
@@ -26,20 +38,98 @@ def render_scene(scene, samples, integrator="path", denoise=False):
             "rr_depth": 50,
             'samples_per_pass': 512
         }
-    })
-    result = integrator.render(scene, spp=samples)
-    bmp = mi.Bitmap(result).convert()
+    }
+    if samples_per_pass is not None:
+        desc["samples_per_pass"] = samples_per_pass
+    if wavefront_budget is not None:
+        # the stokes integrator traces the samples of the nested one
+        desc["wavefront_budget"] = wavefront_budget
+
+    return mi.load_dict(desc)
+
+def develop_stokes(result, denoise=False):
+    """Convert the output of the stokes integrator into bitmaps
 
-    L, sp = stokes_to_bitmaps(bmp)
+    Args:
+        result (mi.TensorXf): The rendered image with all stokes channels
+        denoise (bool, optional): Whether to denoise the bitmaps. Defaults to False.
+
+    Returns:
+        tuple: The intensity bitmap and the stokes components, see `StokesComponents`
+    """
+    bmp = stokes_bitmap(result)
+
+    L, sp = stokes_to_bitmaps(bmp, result)
     
-    if denoise:
+    if denoise and not mi.variant().startswith("cuda"):
+        # the OptiX denoiser needs a CUDA device
+        print("Denoising is only supported by the CUDA backend, skipping.")
+    elif denoise:
         print("Denoising...")
         print(L.size())
-        # Denoise the rendered image
+        # Denoise the linear intensity in place, so that the default layer
+        # of the EXR file written from `sp` is denoised as well
         denoiser = mi.OptixDenoiser(input_size=L.size(), albedo=False, normals=False, temporal=False)
-        L = denoiser(L)
+        intensity, _ = stokes_views(bmp)
+        intensity[...] = np.array(denoiser(mi.Bitmap(np.ascontiguousarray(intensity))), copy=False)
+        L = mi.Bitmap(np.ascontiguousarray(intensity)).convert(srgb_gamma=True)
 
         for i, s in enumerate(sp):
             sp[i] = denoiser(s)
 
-    return L, sp, result
\ No newline at end of file
+    return L, sp
+
+def render_scene(scene, samples, integrator="path", denoise=False):
+    
+    #render scene using the desired integrator (type or already loaded integrator)
+    if isinstance(integrator, str):
+        integrator = load_integrator(integrator)
+    result = integrator.render(scene, spp=samples)
+
+    L, sp = develop_stokes(result, denoise)
+
+    return L, sp, result
+
+def render_progressive(scene, checkpoints, integrator="path", denoise=False):
+    """Render a scene progressively, reusing the samples of previous passes.
+
+    Each pass only renders the samples missing to reach the next checkpoint,
+    with its own seed, and is accumulated into a running sum weighted by its
+    sample count. One sweep therefore costs as much as a single render at the 
+    largest checkpoint.
+
+    Args:
+        scene (mi.Scene): The scene to render
+        checkpoints (list): Sample counts at which to snapshot the image
+        integrator (str | mi.Integrator, optional): The type of the nested integrator,
+        or an already loaded integrator to reuse. Defaults to "path".
+        denoise (bool, optional): Whether to denoise the snapshots. Defaults to False.
+
+    Yields:
+        tuple: (spp, L, sp, result, time_ns) for each checkpoint in increasing 
+        order, where time_ns is the accumulated render time up to that checkpoint.
+    """
+    if isinstance(integrator, str):
+        integrator = load_integrator(integrator)
+
+    accum = None
+    done = 0
+    render_time = 0
+
+    for seed, spp in enumerate(sorted(set(checkpoints))):
+        start = time.perf_counter_ns()
+
+        # render only the missing samples of this checkpoint
+        pass_spp = spp - done
+        result = integrator.render(scene, seed=seed, spp=pass_spp)
+        accum = result * pass_spp if accum is None else dr.fma(result, pass_spp, accum)
+        dr.eval(accum)
+        dr.sync_thread()
+
+        render_time += time.perf_counter_ns() - start
+        done = spp
+
+        result = accum / done
+        L, sp = develop_stokes(result, denoise)
+
+        yield spp, L, sp, result, render_time
@@ -5,14 +5,62 @@ import drjit as dr
 
 import argparse
 
-mi.set_variant("cuda_ad_rgb_polarized")
+from scripts.utils.backend import set_backend
+set_backend()
+
+# supported SRF profile shapes
+PROFILES = ["gaussian", "box", "lorentzian", "csv"]
+
+def load_profile(filename):
+    """Load a measured SRF profile from a CSV file with (wavelength, response) rows.
+
+    The profile is centered at its peak, so it can be shifted to any measured wavelength.
+    """
+    data = np.loadtxt(filename, delimiter=",", comments="#", ndmin=2)
+    data = data[np.argsort(data[:, 0])]
+    offsets, response = data[:, 0], data[:, 1]
+    return offsets - offsets[np.argmax(response)], response
+
+def srf_matrix(domain_wls : np.array, measured_wls : np.array, delta_wl : float, 
+               profile : str = "gaussian", profile_file : str = None):
+    """Evaluate the SRF of every measured wavelength over the whole domain at once
+
+    Args:
+        domain_wls (np.array): Wavelengths of the domain (in nm)
+        measured_wls (np.array): Central wavelength of each SRF (in nm)
+        delta_wl (float): Spacing between the measured wavelengths
+        profile (str, optional): Shape of the SRFs, one of `PROFILES`. Defaults to "gaussian".
+        profile_file (str, optional): CSV file with the measured profile (for "csv"). Defaults to None.
+
+    Returns:
+        np.array: A (len(measured_wls) x len(domain_wls)) matrix with the normalized SRFs
+    """
+    offsets = domain_wls[np.newaxis, :] - np.asarray(measured_wls)[:, np.newaxis]
+
+    if profile == "gaussian":
+        std_dev = delta_wl / 4
+        srfs = np.exp(-np.square(offsets) / (2 * std_dev ** 2))
+    elif profile == "box":
+        srfs = (np.abs(offsets) <= delta_wl / 2).astype(np.float64)
+    elif profile == "lorentzian":
+        gamma = delta_wl / 4
+        srfs = gamma ** 2 / (np.square(offsets) + gamma ** 2)
+    elif profile == "csv":
+        if profile_file is None:
+            raise ValueError("A profile file is needed for the 'csv' profile")
+        profile_offsets, response = load_profile(profile_file)
+        srfs = np.interp(offsets, profile_offsets, response, left=0.0, right=0.0)
+    else:
+        raise ValueError(f"Unknown SRF profile '{profile}', expected one of {PROFILES}")
+
+    # normalize each SRF, leaving empty ones untouched
+    integrals = np.trapezoid(srfs, domain_wls, axis=-1)
+    srfs /= np.where(integrals > 0, integrals, 1.0)[:, np.newaxis]
+    return srfs
 
 def gen_srf(domain_wls : np.array, measured_wl : float, delta_wl : float):
 
-    std_dev = delta_wl / 4
-    srf = np.exp(-np.square(domain_wls - measured_wl) / (2 * std_dev ** 2))
-    srf /= np.trapezoid(srf, domain_wls) 
-    return srf
+    return srf_matrix(domain_wls, [measured_wl], delta_wl)[0]
 
 def show_srfs(domain_wls : np.array, measured_wls : np.array, srfs : list):
 
@@ -30,35 +78,31 @@ def show_srfs(domain_wls : np.array, measured_wls : np.array, srfs : list):
     plt.legend()
     plt.show()
 
-def gen_srfs(n, points, min_wl, max_wl):
+def gen_srfs(n, points, min_wl, max_wl, profile="gaussian", profile_file=None):
 
     delta_wl = (max_wl - min_wl) / (n + 2)
     domain_wls = np.linspace(min_wl, max_wl, points)
     measured_wls = np.linspace(min_wl, max_wl, n + 2)[1:-1]
-    srfs = []
-    for wl in measured_wls:
-
-        srf = gen_srf(domain_wls, wl, delta_wl)
-
-        #mi.spectrum_to_file(f"srf_{wl:.3f}nm.spd", domain_wls, srf)
-        srfs.append(srf)
+    srfs = srf_matrix(domain_wls, measured_wls, delta_wl, profile, profile_file)
 
     return domain_wls, measured_wls, srfs
 
 def main(args):
 
-    domain_wls, measured_wls, srfs = gen_srfs(args.n, args.points, args.min_wl, args.max_wl)
+    domain_wls, measured_wls, srfs = gen_srfs(args.n, args.points, args.min_wl, args.max_wl, args.profile, args.profile_csv)
 
     if args.plot:
         show_srfs(domain_wls, measured_wls, srfs)
 
 if __name__ == '__main__':
-    parser = argparse.ArgumentParser(description="Generate a set of evenly spaced gaussian profile SRFs in a finite domain")
+    parser = argparse.ArgumentParser(description="Generate a set of evenly spaced SRFs in a finite domain")
 
     parser.add_argument("n", type=int, help="Number of SRFs to generate")
     parser.add_argument("points", type=int, help="Number of points to evaluate for each SRF")
     parser.add_argument("--min_wl", type=float, help="Lower bound of wavelength domain (in nm)", default=380)
     parser.add_argument("--max_wl", type=float, help="Lower bound of wavelength domain (in nm)", default=750)
+    parser.add_argument("--profile", choices=PROFILES, help="Shape of the SRFs", default="gaussian")
+    parser.add_argument("--profile_csv", type=str, help="CSV file with a measured (wavelength, response) SRF profile")
     parser.add_argument("--plot", "-s", action="store_true", help="Whether to plot the SRFs")
     
     main(parser.parse_args())
\ No newline at end of file
@@ -2,6 +2,59 @@ import argparse
 import csv
 import ast
 import os
+import re
+
+from multiprocessing import Pool
+from tqdm import tqdm
+
+from spectral_store import SpectralStoreWriter
+
+# "wavelength: value" pairs of a SCEMeasures cell
+SCE_ENTRY = re.compile(r"([-+\d.eE]+)\s*:\s*([-+\d.eE]+)")
+
+def parse_row(row):
+    """Parse a row of the spectral database
+
+    Returns:
+        tuple: (id, name, wavelengths, values, error), where `error` is None if
+        the row was parsed successfully.
+    """
+    id_ = (row.get("ID") or "unknown").strip()
+    name = (row.get("Name") or "noname").strip().replace(" ", "_").replace("/", "_")
+
+    sce_data = (row.get("SCEMeasures") or "").strip()
+    try:
+        if not (sce_data.startswith("{") and sce_data.endswith("}")):
+            raise ValueError("SCEMeasures is not a dictionary")
+
+        entries = sorted((float(w), float(v)) for w, v in SCE_ENTRY.findall(sce_data))
+        if len(entries) == 0:
+            raise ValueError("SCEMeasures is empty")
+
+        wavelengths, values = zip(*entries)
+        return id_, name, wavelengths, values, None
+    except Exception as e:
+        return id_, name, None, None, str(e)
+
+def write_spd(output_folder, id_, name, wavelengths, values):
+    filename = f"{id_}_{name}_sce.spd"
+    filepath = os.path.join(output_folder, filename)
+
+    with open(filepath, "w", encoding='utf-8') as f:
+        f.write(f"# {filename}\n")
+        for wavelength, irradiance in zip(wavelengths, values):
+            f.write(f"{wavelength:g} {irradiance:g}\n")
+
+    return filepath
+
+def parse_and_export(job):
+    row, output_folder = job
+    id_, name, wavelengths, values, error = parse_row(row)
+
+    if error is None and output_folder is not None:
+        write_spd(output_folder, id_, name, wavelengths, values)
+
+    return id_, name, wavelengths, values, error
 
 def extract_sce_to_spd(input_csv, output_folder):
     os.makedirs(output_folder, exist_ok=True)
@@ -30,10 +83,56 @@ def extract_sce_to_spd(input_csv, output_folder):
             except Exception as e:
                 print(f"Skipping row {id_} ({name}): {e}")
 
+def ingest_spectral_db(input_csv, store_path, output_folder=None, workers=None, chunksize=16):
+    """Stream the spectral database into a binary store using a pool of workers
+
+    Rows are read lazily from the CSV file and parsed (and optionally exported as
+    .spd files) in parallel, while the main process appends them to the store in
+    their original order.
+
+    Args:
+        input_csv (str): Path to the input CSV file
+        store_path (str): Path of the binary store (see `SpectralStore`)
+        output_folder (str, optional): If given, also export each spectrum as a .spd file. Defaults to None.
+        workers (int, optional): Amount of worker processes. Defaults to the CPU count.
+        chunksize (int, optional): Rows sent to a worker at once. Defaults to 16.
+
+    Returns:
+        tuple: The amount of stored spectra and the skipped rows
+    """
+    if output_folder is not None:
+        os.makedirs(output_folder, exist_ok=True)
+
+    skipped = []
+    with open(input_csv, newline='', encoding='utf-8') as csvfile, \
+         SpectralStoreWriter(store_path) as store, Pool(workers) as pool:
+        jobs = ((row, output_folder) for row in csv.DictReader(csvfile))
+
+        for id_, name, wavelengths, values, error in tqdm(pool.imap(parse_and_export, jobs, chunksize)):
+            if error is not None:
+                skipped.append((id_, name, error))
+                continue
+            store.write(id_, name, wavelengths, values)
+
+        stored = len(store.entries)
+
+    for id_, name, error in skipped:
+        print(f"Skipping row {id_} ({name}): {error}")
+
+    return stored, skipped
+
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Extract SCEMeasures and save as .spd files.")
+    parser = argparse.ArgumentParser(description="Extract SCEMeasures and save them as a binary store and/or .spd files.")
     parser.add_argument("input_csv", help="Path to the input CSV file.")
-    parser.add_argument("output_folder", help="Directory to save the .spd output files.")
+    parser.add_argument("output_folder", nargs="?", help="Directory to save the .spd output files.")
+    parser.add_argument("--store", type=str, help="Path of the binary store to create (e.g. data/spectraldb).")
+    parser.add_argument("--workers", type=int, help="Amount of worker processes (default: CPU count).")
     args = parser.parse_args()
 
-    extract_sce_to_spd(args.input_csv, args.output_folder)
+    if args.store:
+        stored, skipped = ingest_spectral_db(args.input_csv, args.store, args.output_folder, args.workers)
+        print(f"Stored {stored} spectra in '{args.store}' ({len(skipped)} rows skipped)")
+    elif args.output_folder:
+        extract_sce_to_spd(args.input_csv, args.output_folder)
+    else:
+        parser.error("either an output folder or --store must be given")
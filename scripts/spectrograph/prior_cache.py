@@ -0,0 +1,123 @@
+import numpy as np
+
+import hashlib
+import json
+import os
+import time
+
+def _canonical(value):
+    """Convert a value to a JSON serializable form with a stable representation"""
+    if isinstance(value, dict):
+        return { str(k) : _canonical(v) for k, v in sorted(value.items()) }
+    if isinstance(value, (list, tuple)):
+        return [ _canonical(v) for v in value ]
+    if isinstance(value, (str, bool, int)) or value is None:
+        return value
+    if isinstance(value, float):
+        return float(np.float32(value))
+
+    # numpy and mitsuba/drjit arrays
+    arr = np.asarray(value)
+    if arr.dtype.kind == 'f':
+        arr = arr.astype(np.float32)
+    return arr.tolist()
+
+def prior_key(**params):
+    """Compute the cache key of a prior from the parameters that affect it
+
+    Returns:
+        str: A SHA-256 digest of the canonical JSON form of the parameters
+    """
+    data = json.dumps(_canonical(params), sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+class PriorCache:
+    """Content-addressed cache of rendered spectrograph priors with LRU eviction.
+
+    Each entry is stored as `<key>.npy` inside the cache folder, together with
+    an `index.json` file that records the parameters and last use of every entry.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, folder, max_entries=8):
+        self.folder = folder
+        self.max_entries = max_entries
+        os.makedirs(folder, exist_ok=True)
+        self.index = self.__load_index()
+
+    def __index_path(self):
+        return os.path.join(self.folder, PriorCache.INDEX_FILE)
+
+    def __entry_path(self, key):
+        return os.path.join(self.folder, f"{key}.npy")
+
+    def __load_index(self):
+        try:
+            with open(self.__index_path()) as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            index = {}
+
+        # drop entries whose data went missing
+        return { k : v for k, v in index.items() if os.path.exists(self.__entry_path(k)) }
+
+    def __save_index(self):
+        tmp_path = self.__index_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_path, self.__index_path())
+
+    def get(self, key):
+        """Retrieve a prior from the cache
+
+        Args:
+            key (str): The key of the prior
+
+        Returns:
+            np.array: The stored prior, or None if it is not cached
+        """
+        if key not in self.index:
+            return None
+
+        try:
+            prior = np.load(self.__entry_path(key))
+        except (FileNotFoundError, ValueError):
+            del self.index[key]
+            self.__save_index()
+            return None
+
+        self.index[key]["last_used"] = time.time()
+        self.__save_index()
+        return prior
+
+    def put(self, key, prior, params=None):
+        """Store a prior in the cache, evicting the least recently used entries
+
+        Args:
+            key (str): The key of the prior
+            prior (np.array): The prior to store
+            params (dict, optional): Parameters of the prior, stored for reference. Defaults to None.
+        """
+        np.save(self.__entry_path(key), prior)
+        self.index[key] = {
+            "last_used" : time.time(),
+            "params" : _canonical(params) if params is not None else None
+        }
+
+        # evict least recently used entries
+        lru = sorted(self.index, key=lambda k: self.index[k]["last_used"])
+        for old_key in lru[:max(0, len(lru) - self.max_entries)]:
+            del self.index[old_key]
+            try:
+                os.remove(self.__entry_path(old_key))
+            except FileNotFoundError:
+                pass
+
+        self.__save_index()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
@@ -16,6 +16,14 @@ from scripts.utils import *
 from plot_spectra import *
 from gen_srfs import gen_srfs
 from scene import generate_scene_elements, build_scene
+from prior_cache import PriorCache, prior_key
+from spectral_store import resolve_spectrum
+
+# samples per pixel used to render the prior distribution
+PRIOR_SPP = 10000000
+
+# parameter of the emitter spectrum
+SPECTRUM_KEY = "light.irradiance.values"
 # from scripts.rendering.integrators.plt import PLTIntegrator
 
 def read_config(config):
@@ -28,16 +36,14 @@ def read_config(config):
         measure_points = cfg["wavelengths"]["measure_points"] 
         domain_points = cfg["wavelengths"]["domain_points"] 
 
-        spectrum = cfg["spectrum"]
+        spectrum = resolve_spectrum(cfg["spectrum"])
         use_srfs = cfg["use_srfs"]
         use_prior = cfg["use_prior"]
 
         return min_wl, max_wl, measure_points, domain_points, spectrum, use_srfs, use_prior
 
-def render_scene(scene, samples):
-    
-    #render scene using the desired integrator
-    integrator = mi.load_dict({
+def load_integrator(samples_per_pass=None, wavefront_budget=None):
+    desc = {
         "type" : "stokes",
         "nested" : {
             "type" : "plt",
@@ -45,13 +51,79 @@ def render_scene(scene, samples):
             "rr_depth": 50,
             'samples_per_pass': 512
         }
-    })
+    }
+    # samples per pixel traced at once (must divide the sample count)
+    if samples_per_pass is not None:
+        desc["samples_per_pass"] = samples_per_pass
+    # samples traced at once, over batches of samples per pixel
+    if wavefront_budget is not None:
+        desc["wavefront_budget"] = wavefront_budget
+
+    return mi.load_dict(desc)
+
+def render_scene(scene, samples, integrator=None):
+    
+    #render scene using the desired integrator
+    if integrator is None:
+        integrator = load_integrator()
     result = integrator.render(scene, spp=samples)
-    bmp = mi.Bitmap(result).convert()
+    bmp = stokes_bitmap(result)
 
-    L, sp = stokes_to_bitmaps(bmp)
+    L, sp = stokes_to_bitmaps(bmp, result)
     return L, sp, result
 
+def prior_parameters(grating_patch, light_dir, wavelengths, use_srfs, prior_spectrum, batch):
+    """Collect the parameters that shape the light captured for the prior"""
+    min_wl, max_wl, measure_points, domain_points = wavelengths
+
+    return {
+        "variant" : mi.variant(),
+        "grating" : grating_patch["material"]["bsdf"],
+        "light_dir" : light_dir,
+        "srfs" : {
+            "min_wl" : min_wl,
+            "max_wl" : max_wl,
+            "measure_points" : measure_points,
+            "domain_points" : domain_points,
+            "use_srfs" : use_srfs
+        },
+        "prior_spectrum" : prior_spectrum,
+        "batch" : batch
+    }
+
+def get_prior(prior_scene, prior_params, cache_dir, cache_size, no_cache=False, integrator=None):
+    """Retrieve the prior distribution from the cache, rendering it if needed
+
+    Args:
+        prior_scene (dict): The scene with the prior spectrum
+        prior_params (dict): The parameters that affect the prior, used as cache key
+        cache_dir (str): Folder of the prior cache
+        cache_size (int): Maximum amount of cached priors
+        no_cache (bool, optional): Always render the prior. Defaults to False.
+        integrator (mi.Integrator, optional): Integrator to reuse. Defaults to None.
+
+    Returns:
+        np.array: The stokes components of the prior
+    """
+    prior_params = dict(prior_params, spp=PRIOR_SPP)
+    key = prior_key(**prior_params)
+
+    cache = PriorCache(cache_dir, cache_size)
+    sp_prior = None if no_cache else cache.get(key)
+
+    if sp_prior is not None:
+        print(f"Using cached prior distribution ({key[:12]})... ")
+    else:
+        print("Rendering prior distribution... ")
+        start = time.perf_counter_ns()
+        L_prior, sp_prior, raw_prior = render_scene(mi.load_dict(prior_scene), PRIOR_SPP, integrator)
+        render_time = time.perf_counter_ns() - start
+        print(f"done. ({render_time / 1e6} ms)")
+        sp_prior = np.array(sp_prior)
+        cache.put(key, sp_prior, prior_params)
+
+    return sp_prior
+
 def save_spectrograph_output(folder_path, L, sp):
 
     img = np.repeat(sp[0], 5, 0)
@@ -112,6 +184,58 @@ def plot_spectra_comparison(wavelengths, recovered, original):
 
     plt.show()
 
+def recover_spectrum(scene, target, integrator, spp, lr=0.05, iterations=200, tol=1e-3, patience=5):
+    """Fit the emitter spectrum of a scene to a measured capture.
+
+    The values of the (irregular) emitter spectrum are optimized with Adam,
+    differentiating the rendered capture with respect to them.
+
+    Args:
+        scene (mi.Scene): The spectrograph scene, with an irregular emitter spectrum
+        target (mi.TensorXf): The measured capture, as rendered by `integrator`
+        integrator (mi.Integrator): The integrator used to render the capture
+        spp (int): Samples per pixel of each optimization step
+        lr (float, optional): Learning rate. Defaults to 0.05.
+        iterations (int, optional): Maximum amount of iterations. Defaults to 200.
+        tol (float, optional): Relative loss change under which the fit is considered 
+            converged. Defaults to 1e-3.
+        patience (int, optional): Consecutive converged iterations before stopping. Defaults to 5.
+
+    Returns:
+        tuple: The recovered spectrum values and the loss of each iteration
+    """
+    params = mi.traverse(scene)
+    params.keep(SPECTRUM_KEY)
+
+    opt = mi.ad.Adam(lr=lr)
+    opt[SPECTRUM_KEY] = params[SPECTRUM_KEY]
+    params.update(opt)
+
+    losses = []
+    converged = 0
+    for it in range(iterations):
+        img = mi.render(scene, params, integrator=integrator, spp=spp, seed=it)
+        loss = dr.mean(dr.square(img - target).array)
+        dr.backward(loss)
+
+        opt.step()
+        opt[SPECTRUM_KEY] = dr.maximum(opt[SPECTRUM_KEY], 0.0)
+        params.update(opt)
+
+        losses.append(loss[0])
+        print(f"Iteration {it:4d}: loss = {losses[-1]:.6e}", end="\r")
+
+        # stop early once the loss stops improving
+        if it > 0 and abs(losses[-2] - losses[-1]) <= tol * losses[-2]:
+            converged += 1
+            if converged >= patience:
+                break
+        else:
+            converged = 0
+    print()
+
+    return np.array(params[SPECTRUM_KEY]), losses
+
 def main(args):
     
     # create folder structure
@@ -134,7 +258,7 @@ def main(args):
     start = time.perf_counter_ns()
     
     domain_wls, measured_wls, srfs = gen_srfs(measure_points, domain_points, min_wl, max_wl)
-    light_dir, sensors, grating_patch = generate_scene_elements(args.outdir, domain_wls, measured_wls, srfs, use_srfs)
+    light_dir, sensors, grating_patch = generate_scene_elements(args.outdir, domain_wls, measured_wls, srfs, use_srfs, args.batch)
     
     # scene and prior scene
     prior_spectrum = {
@@ -144,23 +268,56 @@ def main(args):
     prior_scene = build_scene(light_dir, sensors, grating_patch, prior_spectrum)
     scene = build_scene(light_dir, sensors, grating_patch, spectrum)
     scene_build_time = time.perf_counter_ns() - start
-    mi.xml.dict_to_xml(scene, os.path.join(args.outdir, "scene.xml"))
+    if args.batch:
+        mi.xml.dict_to_xml(scene, os.path.join(args.outdir, "scene.xml"))
     print(f"done. ({scene_build_time / 1e6} ms)")
 
+    if args.recover:
+        integrator = load_integrator(args.samples_per_pass, args.wavefront_budget)
+
+        # measured capture, simulated with the reference spectrum if not given
+        if args.capture:
+            target = mi.TensorXf(np.load(args.capture))
+        else:
+            print("Simulating spectrograph capture... ", end="")
+            start = time.perf_counter_ns()
+            target = integrator.render(mi.load_dict(scene), spp=args.spp)
+            print(f"done. ({(time.perf_counter_ns() - start) / 1e6} ms)")
+            np.save(os.path.join(args.outdir, "capture.npy"), np.array(target))
+
+        # fit an irregular emitter spectrum, starting from a flat guess
+        recover_wls = np.linspace(min_wl, max_wl, args.recover_points)
+        emitter_spectrum = {
+            "type" : "irregular",
+            "wavelengths" : ", ".join(f"{w:.7g}" for w in recover_wls),
+            "values" : ", ".join([str(args.recover_init)] * args.recover_points)
+        }
+        recover_scene = mi.load_dict(build_scene(light_dir, sensors, grating_patch, emitter_spectrum))
+
+        print("Recovering spectrum... ")
+        start = time.perf_counter_ns()
+        recovered, losses = recover_spectrum(recover_scene, target, integrator, 
+            args.spp_grad, args.lr, args.iterations, args.tol)
+        recover_time = time.perf_counter_ns() - start
+        print(f"done in {len(losses)} iterations. ({recover_time / 1e6} ms)")
+
+        original = eval_spectrum(recover_wls, spectrum)
+        np.save(os.path.join(args.outdir, "recovered.npy"), np.stack([recover_wls, recovered]))
+        print("RMSE:", np.sqrt(np.mean(np.square(recovered - original))))
+        plot_spectra_comparison(recover_wls, recovered, original)
+        return
+
     print("Simulating spectrograph capture... ", end="")
    
     if args.prior:
         sp_prior = np.load(args.prior)
     else: 
-        print("Rendering prior distribution... ")
-        start = time.perf_counter_ns()
-        L_prior, sp_prior, raw_prior = render_scene(mi.load_dict(prior_scene), 10000000)        
-        render_time = time.perf_counter_ns() - start
-        print(f"done. ({render_time / 1e6} ms)")
-        np.save("prior.npy", np.array(sp_prior))
+        prior_params = prior_parameters(grating_patch, light_dir, 
+            (min_wl, max_wl, measure_points, domain_points), use_srfs, prior_spectrum, args.batch)
+        sp_prior = get_prior(prior_scene, prior_params, args.cache_dir, args.cache_size, args.no_cache)
 
     start = time.perf_counter_ns()
-    L, sp, raw = render_scene(mi.load_dict(scene), args.spp)
+    L, sp, raw = render_scene(mi.load_dict(scene), args.spp, load_integrator(args.samples_per_pass, args.wavefront_budget))
     render_time = time.perf_counter_ns() - start
     print(f"done. ({render_time / 1e6} ms)")
 
@@ -180,16 +337,31 @@ if __name__ == '__main__':
     parser.add_argument("--verbose", "-v", action="store_true", help="Shows additional information during rendering (ONLY USE WHILE DEBUGGING!).")
     parser.add_argument("--spp", type=int, help="Samples per pixel", default=64)
     parser.add_argument("--prior", type=str, help="The path to a stored prior")
+    parser.add_argument("--cache_dir", type=str, help="Folder where rendered priors are cached", default=".prior_cache")
+    parser.add_argument("--cache_size", type=int, help="Maximum amount of cached priors", default=8)
+    parser.add_argument("--no_cache", action="store_true", help="Always render the prior (the result is still cached)")
+    parser.add_argument("--batch", action="store_true", help="Use one sensor per measured wavelength instead of a single spectrograph sensor")
+    parser.add_argument("--recover", action="store_true", help="Recover the spectrum by differentiable fitting instead of dividing by a prior (spectral only)")
+    parser.add_argument("--capture", type=str, help="Measured capture (raw .npy render) to fit in recovery mode")
+    parser.add_argument("--recover_points", type=int, help="Amount of wavelengths of the recovered spectrum", default=64)
+    parser.add_argument("--recover_init", type=float, help="Initial value of the recovered spectrum", default=1.0)
+    parser.add_argument("--spp_grad", type=int, help="Samples per pixel of each recovery iteration", default=64)
+    parser.add_argument("--lr", type=float, help="Learning rate of the recovery", default=0.05)
+    parser.add_argument("--iterations", type=int, help="Maximum amount of recovery iterations", default=200)
+    parser.add_argument("--tol", type=float, help="Relative loss change considered converged", default=1e-3)
+    add_backend_arguments(parser)
 
     args = parser.parse_args()
 
+    if args.recover and not args.spectral:
+        parser.error("--recover requires a spectral variant (--spectral)")
+
     # setup mode here
-    if args.spectral:
-        print("Loading spectral variant...")
-        mi.set_variant("cuda_ad_spectral_polarized")
-    else:
-        print("Loading RGB variant...")
-        mi.set_variant("cuda_ad_rgb_polarized")
+    setup_backend(args, spectral=args.spectral)
+
+    if args.recover:
+        # reverse-mode differentiation of the integrator loops requires evaluated loops
+        dr.set_flag(dr.JitFlag.SymbolicLoops, False)
 
     # load integrators
     from scripts.rendering.integrators.plt import PLTIntegrator
@@ -9,7 +9,7 @@ import os
 
 from scripts.utils import *
 
-from gen_srfs import gen_srfs
+from gen_srfs import gen_srfs, PROFILES
 
 from pprint import pprint
 
@@ -28,9 +28,17 @@ def plot_scene_elements(light_dir : mi.Vector3f, sensors : dict, grating_patch :
         -light_dir[0] * light_dist, -light_dir[1] * light_dist, -light_dir[2] * light_dist,
          light_dir[0], light_dir[1], light_dir[2], length=0.5, color="orange")
 
-    for i, sensor in enumerate(sensors):
-        origin = sensor["origin"]
-        dir = sensor["direction"]
+    if isinstance(sensors, dict):
+        # single spectrograph sensor, one aperture per channel
+        directions = np.array(sensors["directions"])
+        apertures = [ (d * sensors["distance"], -d) for d in directions ]
+    else:
+        apertures = [
+            (np.ravel(sensor["to_world"] @ mi.ScalarPoint3f(0, 0, 0)),
+             np.ravel(sensor["to_world"] @ mi.ScalarVector3f(0, 0, 1))) for sensor in sensors 
+        ]
+
+    for origin, dir in apertures:
         ax.quiver(origin[0], origin[1], origin[2], dir[0], dir[1], dir[2], length=0.1, color="blue")
 
     # show rectangle patch
@@ -54,7 +62,22 @@ def plot_scene_elements(light_dir : mi.Vector3f, sensors : dict, grating_patch :
     ax.set_zlabel('Z axis')
     plt.show()
 
-def generate_scene_elements(folder_path, domain_wls, measured_wls, srfs, use_srfs):
+def generate_scene_elements(folder_path, domain_wls, measured_wls, srfs, use_srfs, batch=False):
+    """Generate the sensors, light direction and grating patch of the spectrograph
+
+    Args:
+        folder_path (str): Folder where the SRF files are stored (only used with `batch`)
+        domain_wls (np.array): Regularly spaced wavelengths where the SRFs are evaluated
+        measured_wls (np.array): Wavelength measured by each channel
+        srfs (np.array): Matrix with the SRF of each channel, evaluated at `domain_wls`
+        use_srfs (bool): Whether to restrict the captured light with the SRFs
+        batch (bool, optional): Use one orthographic sensor per channel instead of a 
+            single spectrograph sensor. Defaults to False.
+
+    Returns:
+        tuple: The light direction, the sensor (a list of sensors if `batch` is set)
+        and the grating patch
+    """
     # instantiate grating model here 
     grating_bsdf = {
         'type': 'roughgrating',
@@ -90,28 +113,46 @@ def generate_scene_elements(folder_path, domain_wls, measured_wls, srfs, use_srf
     light_dir = scalar_sph_to_dir(incident, 0)
     light_dir_local = grating_frame.to_local(light_dir)
 
-    sensors = []
-    
+    # diffract first lobe (wi) for every measured wavelength
     L = 0.4
-    for i, wl in tqdm(enumerate(measured_wls)):
-        mi.spectrum_to_file(os.path.join(folder_path, "spectra", f"srf_{i}.spd"), domain_wls, srfs[i])
-
-        # diffract first lobe (wi)
+    diff_dirs = []
+    for wl in measured_wls:
         local_diff_dir, mask = grating.diffract(-light_dir_local, mi.ScalarVector2i(2, 0), float(wl * 1e-3))
         
         # back to global frame
-        diff_dir = grating_frame.to_world(local_diff_dir)
+        diff_dirs.append(np.ravel(grating_frame.to_world(local_diff_dir)))
+
+    if not batch:
+        # a single sensor with one channel per measured wavelength
+        sensor = {
+            'type' : 'spectrograph',
+            'directions' : mi.TensorXf(np.array(diff_dirs, dtype=np.float32)),
+            'distance' : L,
+            'up' : [0, 0, 1],
+            'film' : {
+                'type': 'hdrfilm',
+                'width': len(measured_wls),
+                'height': 1,
+                'sample_border': False,
+                'rfilter': { 'type': 'box' }
+            }
+        }
+
+        if use_srfs:
+            sensor["srfs"] = mi.TensorXf(np.asarray(srfs, dtype=np.float32))
+            sensor["wavelength_min"] = float(domain_wls[0])
+            sensor["wavelength_max"] = float(domain_wls[-1])
+
+        return light_dir, sensor, make_grating_patch(grating_bsdf, grating_frame)
+
+    sensors = []
+    for i, diff_dir in tqdm(enumerate(diff_dirs)):
+        mi.spectrum_to_file(os.path.join(folder_path, "spectra", f"srf_{i}.spd"), domain_wls, srfs[i])
 
         # position of the sensor at distance L to origin
-        pos = diff_dir * L
-        
-        # save sensor dict
-        origin = np.ravel(pos)
-        direction = np.ravel(-diff_dir)
+        origin = diff_dir * L
         sensor = {
             'type' : 'orthographic',
-            # 'origin' : np.ravel(pos),
-            # 'direction' : np.ravel(-diff_dir),
             'to_world' : mi.scalar_rgb.Transform4f().look_at(origin=origin, target=[0,0,0], up=[0,0,1]),
             
             'film' : {
@@ -129,6 +170,10 @@ def generate_scene_elements(folder_path, domain_wls, measured_wls, srfs, use_srf
             }
 
         sensors.append(sensor)
+
+    return light_dir, sensors, make_grating_patch(grating_bsdf, grating_frame)
+
+def make_grating_patch(grating_bsdf, grating_frame):
     # generate a patch with normals in the positive X dir at origin 0,0,0
     patch_transform = mi.scalar_rgb.Transform4f().to_frame(grating_frame).scale([0.1, 1, 0.1])
 
@@ -141,22 +186,27 @@ def generate_scene_elements(folder_path, domain_wls, measured_wls, srfs, use_srf
         'to_world' : patch_transform
     }
 
-    return light_dir, sensors, grating_patch
+    return grating_patch
 
 def build_scene(light_dir, sensors, grating_patch, incoming_spectra = 1.0):
     
-    batch_sensor = { 
-        f"sensor{i}" : s for i, s in enumerate(sensors)
-    }
+    if isinstance(sensors, dict):
+        # single spectrograph sensor
+        sensor = dict(sensors)
+    else:
+        sensor = { 
+            f"sensor{i}" : s for i, s in enumerate(sensors)
+        }
 
-    batch_sensor["type"] = "batch"
-    batch_sensor["film"] = {
-        'type': 'hdrfilm',
-        'width': len(sensors),
-        'height': 1,
-        'sample_border': False
-    }
-    batch_sensor["sampler"] = {
+        sensor["type"] = "batch"
+        sensor["film"] = {
+            'type': 'hdrfilm',
+            'width': len(sensors),
+            'height': 1,
+            'sample_border': False
+        }
+
+    sensor["sampler"] = {
         'type': 'independent',
         'sample_count': 512
     }
@@ -164,7 +214,7 @@ def build_scene(light_dir, sensors, grating_patch, incoming_spectra = 1.0):
     # scene dict
     scene = {
         'type' : 'scene',
-        'sensor' : batch_sensor,
+        'sensor' : sensor,
         'grating_patch' : grating_patch,
         'light' : {
             'type': 'directional',
@@ -187,11 +237,15 @@ def main(args):
     except FileExistsError:
         pass
 
-    domain_wls, measured_wls, srfs = gen_srfs(args.n, args.points, args.min_wl, args.max_wl)
-    light_dir, sensors, grating_patch = generate_scene_elements(args.outdir, domain_wls, measured_wls, srfs, args.use_srfs)
+    domain_wls, measured_wls, srfs = gen_srfs(args.n, args.points, args.min_wl, args.max_wl, args.profile, args.profile_csv)
+    light_dir, sensors, grating_patch = generate_scene_elements(args.outdir, domain_wls, measured_wls, srfs, args.use_srfs, args.batch)
     scene = build_scene(light_dir, sensors, grating_patch)
 
-    mi.xml.dict_to_xml(scene, os.path.join(args.outdir, "scene.xml"))
+    if args.batch:
+        mi.xml.dict_to_xml(scene, os.path.join(args.outdir, "scene.xml"))
+    else:
+        # in-memory SRFs and directions can't be written to XML
+        print("The spectrograph sensor stores its data in memory, skipping 'scene.xml'.")
 
     if args.plot:
         plot_scene_elements(light_dir, sensors, grating_patch)
@@ -205,6 +259,9 @@ if __name__ == '__main__':
     parser.add_argument("--min_wl", type=float, help="Lower bound of wavelength domain (in nm)", default=380)
     parser.add_argument("--max_wl", type=float, help="Lower bound of wavelength domain (in nm)", default=750)
     parser.add_argument("--use_srfs", action="store_true", help="Use generated SRFs to restrict the captured light")
+    parser.add_argument("--profile", choices=PROFILES, help="Shape of the SRFs", default="gaussian")
+    parser.add_argument("--profile_csv", type=str, help="CSV file with a measured (wavelength, response) SRF profile")
+    parser.add_argument("--batch", action="store_true", help="Use one sensor (and SRF file) per measured wavelength instead of a single spectrograph sensor")
 
     parser.add_argument("--plot", action="store_true", help="Plot the scene schema after generating it")
 
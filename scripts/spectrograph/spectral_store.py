@@ -0,0 +1,115 @@
+import numpy as np
+
+import json
+import os
+
+class SpectralStore:
+    """Read-only access to a binary store of spectra.
+
+    A store is made of two files sharing the same stem:
+
+    - `<stem>.f32`: all the spectra, concatenated as rows of (wavelength, value)
+      float32 pairs. It is memory mapped, so only the accessed spectra are read.
+    - `<stem>.json`: an index with the ID, name, offset and length (in rows) of
+      every spectrum.
+    """
+
+    def __init__(self, path):
+        stem = SpectralStore.stem(path)
+
+        with open(stem + ".json", encoding='utf-8') as f:
+            self.entries = json.load(f)["spectra"]
+
+        self.data = np.memmap(stem + ".f32", dtype=np.float32, mode="r").reshape(-1, 2)
+        self.by_id = { e["id"] : e for e in self.entries }
+        self.by_name = { e["name"] : e for e in self.entries }
+
+    @staticmethod
+    def stem(path):
+        root, ext = os.path.splitext(path)
+        return root if ext in (".f32", ".json") else path
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.by_id or key in self.by_name
+
+    def entry(self, key):
+        if key in self.by_id:
+            return self.by_id[key]
+        if key in self.by_name:
+            return self.by_name[key]
+        raise KeyError(f"Spectrum '{key}' not found in the store")
+
+    def get(self, key):
+        """Retrieve a spectrum by ID or name
+
+        Args:
+            key (str): The ID or the name of the spectrum
+
+        Returns:
+            tuple: The wavelengths and values of the spectrum, as views of the store
+        """
+        e = self.entry(key)
+        rows = self.data[e["offset"] : e["offset"] + e["count"]]
+        return rows[:, 0], rows[:, 1]
+
+    def to_dict(self, key):
+        """Create a Mitsuba spectrum definition from a stored spectrum"""
+        wavelengths, values = self.get(key)
+        return {
+            "type" : "irregular",
+            "wavelengths" : ", ".join(f"{w:.7g}" for w in wavelengths),
+            "values" : ", ".join(f"{v:.7g}" for v in values)
+        }
+
+class SpectralStoreWriter:
+    """Streaming writer of a binary store of spectra (see `SpectralStore`)"""
+
+    def __init__(self, path):
+        self.stem = SpectralStore.stem(path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.stem)), exist_ok=True)
+
+        self.file = open(self.stem + ".f32", "wb")
+        self.entries = []
+        self.offset = 0
+
+    def write(self, id_, name, wavelengths, values):
+        rows = np.empty((len(wavelengths), 2), dtype=np.float32)
+        rows[:, 0] = wavelengths
+        rows[:, 1] = values
+        self.file.write(rows.tobytes())
+
+        self.entries.append({ "id" : id_, "name" : name, "offset" : self.offset, "count" : len(rows) })
+        self.offset += len(rows)
+
+    def close(self):
+        self.file.close()
+        with open(self.stem + ".json", "w", encoding='utf-8') as f:
+            json.dump({ "format" : "float32 (wavelength, value) rows", "spectra" : self.entries }, f, indent=1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# stores opened by `resolve_spectrum`
+_open_stores = {}
+
+def resolve_spectrum(spectrum):
+    """Resolve a spectrum definition that references a binary store.
+
+    Definitions of the form `{"type": "store", "store": <path>, "id": <ID or name>}`
+    are replaced by the equivalent in-memory spectrum. Any other definition is
+    returned unchanged.
+    """
+    if not isinstance(spectrum, dict) or spectrum.get("type") != "store":
+        return spectrum
+
+    path = SpectralStore.stem(spectrum["store"])
+    if path not in _open_stores:
+        _open_stores[path] = SpectralStore(path)
+
+    return _open_stores[path].to_dict(spectrum["id"])
@@ -0,0 +1,151 @@
+import mitsuba as mi
+import drjit as dr
+
+import csv
+import time
+import os
+
+import numpy as np
+
+import argparse
+
+from scripts.utils import *
+from gen_srfs import gen_srfs
+from scene import generate_scene_elements, build_scene
+from render_spectrograph import read_config, load_integrator, render_scene, \
+    prior_parameters, get_prior, eval_spectrum, save_spectrograph_output, SPECTRUM_KEY
+
+def config_name(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name.removeprefix("spectrograph_")
+
+def group_configs(paths):
+    """Group the configurations that share the same spectrograph geometry
+
+    Returns:
+        dict: For each (wavelengths, use_srfs, use_prior) tuple, a list of
+        (name, spectrum) pairs.
+    """
+    groups = {}
+    for path in paths:
+        min_wl, max_wl, measure_points, domain_points, spectrum, use_srfs, use_prior = read_config(path)
+        key = ((min_wl, max_wl, measure_points, domain_points), use_srfs, use_prior)
+        groups.setdefault(key, []).append((config_name(path), spectrum))
+
+    return groups
+
+def sweep_group(args, integrator, wavelengths, use_srfs, use_prior, configs):
+    """Render all the spectra of a group of configurations with a single scene
+
+    The scene is built once with a regularly sampled emitter spectrum, whose
+    values are replaced through `mi.traverse` for each configuration. Since the
+    structure of the scene does not change, the rendering kernel is reused.
+
+    Returns:
+        list: A result row for each configuration
+    """
+    min_wl, max_wl, measure_points, domain_points = wavelengths
+
+    print(f"Creating scene ({min_wl}-{max_wl} nm, {measure_points} channels)... ", end="")
+    start = time.perf_counter_ns()
+
+    domain_wls, measured_wls, srfs = gen_srfs(measure_points, domain_points, min_wl, max_wl)
+    light_dir, sensors, grating_patch = generate_scene_elements(args.outdir, domain_wls, measured_wls, srfs, use_srfs, args.batch)
+
+    spectrum_wls = np.linspace(min_wl, max_wl, args.spectrum_points)
+    emitter_spectrum = {
+        "type" : "regular",
+        "wavelength_min" : min_wl,
+        "wavelength_max" : max_wl,
+        "values" : ", ".join(["1.0"] * args.spectrum_points)
+    }
+    scene = mi.load_dict(build_scene(light_dir, sensors, grating_patch, emitter_spectrum))
+    params = mi.traverse(scene)
+    params.keep(SPECTRUM_KEY)
+
+    scene_time = time.perf_counter_ns() - start
+    print(f"done. ({scene_time / 1e6} ms)")
+
+    prior_spectrum = {
+        "type": "uniform",
+        "value" : 1.0
+    } if use_prior else 1.0
+    prior_scene = build_scene(light_dir, sensors, grating_patch, prior_spectrum)
+    prior_params = prior_parameters(grating_patch, light_dir, wavelengths, use_srfs, prior_spectrum, args.batch)
+    sp_prior = get_prior(prior_scene, prior_params, args.cache_dir, args.cache_size, integrator=integrator)
+    prior_intensity = np.ravel(np.mean(np.array(sp_prior[0]), axis=-1))
+
+    rows = []
+    for name, spectrum in configs:
+        print(f"Simulating spectrograph capture for '{name}'... ", end="")
+
+        # swap the emitter spectrum
+        start = time.perf_counter_ns()
+        params[SPECTRUM_KEY] = mi.Float(np.maximum(eval_spectrum(spectrum_wls, spectrum), 0.0))
+        params.update()
+        update_time = time.perf_counter_ns() - start
+
+        start = time.perf_counter_ns()
+        L, sp, raw = render_scene(scene, args.spp, integrator)
+        render_time = time.perf_counter_ns() - start
+        print(f"done. ({render_time / 1e6} ms)")
+
+        intensity = np.ravel(np.mean(np.array(sp[0]), axis=-1)) / prior_intensity
+        rmse = np.sqrt(np.mean(np.square(intensity - eval_spectrum(measured_wls, spectrum))))
+        print("RMSE:", rmse)
+
+        folder_path = os.path.join(args.outdir, name)
+        os.makedirs(folder_path, exist_ok=True)
+        save_spectrograph_output(folder_path, intensity, sp)
+
+        rows.append({
+            "spectrum" : name,
+            "rmse" : f"{rmse:.5f}",
+            "scene_time(s)" : f"{scene_time / 1e9:.3f}",
+            "update_time(s)" : f"{update_time / 1e9:.3f}",
+            "time(s)" : f"{render_time / 1e9:.3f}"
+        })
+
+    return rows
+
+def main(args):
+
+    os.makedirs(args.outdir, exist_ok=True)
+    os.makedirs(os.path.join(args.outdir, "spectra"), exist_ok=True)
+
+    integrator = load_integrator(args.samples_per_pass, args.wavefront_budget)
+
+    rows = []
+    start = time.perf_counter_ns()
+    for (wavelengths, use_srfs, use_prior), configs in group_configs(args.configs).items():
+        rows += sweep_group(args, integrator, wavelengths, use_srfs, use_prior, configs)
+    print(f"Sweep of {len(rows)} configurations done. ({(time.perf_counter_ns() - start) / 1e9} s)")
+
+    csv_path = args.csv if args.csv else os.path.join(args.outdir, "sweep.csv")
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()), delimiter=";")
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Results written to '{csv_path}'")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Render a sweep of spectrograph configurations in a single process.")
+    parser.add_argument("configs", nargs="+", help="Spectrograph configuration files")
+    parser.add_argument("outdir", help="Where to store the results")
+    parser.add_argument("--spp", type=int, help="Samples per pixel", default=64)
+    parser.add_argument("--csv", type=str, help="Path of the consolidated CSV (default: <outdir>/sweep.csv)")
+    parser.add_argument("--spectrum_points", type=int, help="Amount of samples of the emitter spectrum", default=301)
+    parser.add_argument("--cache_dir", type=str, help="Folder where rendered priors are cached", default=".prior_cache")
+    parser.add_argument("--cache_size", type=int, help="Maximum amount of cached priors", default=8)
+    parser.add_argument("--batch", action="store_true", help="Use one sensor per measured wavelength instead of a single spectrograph sensor")
+    add_backend_arguments(parser)
+
+    args = parser.parse_args()
+
+    # swapping emitter spectra requires a spectral variant
+    setup_backend(args, spectral=True)
+
+    # load integrators
+    from scripts.rendering.integrators.plt import PLTIntegrator
+
+    main(args)
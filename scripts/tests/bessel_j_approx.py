@@ -9,11 +9,13 @@ import mitsuba as mi
 import drjit as dr
 import time
 
+from scripts.utils.backend import add_backend_arguments, setup_backend
+
 def integrate_trapz(func, a, b, points):
     h = (b - a) / (points - 1)
-    t = dr.linspace(dr.cuda.Float, a, b, points)
+    t = dr.linspace(mi.Float, a, b, points)
 
-    I = dr.cuda.Float(0)
+    I = mi.Float(0)
     for i in range(1, points - 1):
         I += func(t[i])
 
@@ -21,10 +23,10 @@ def integrate_trapz(func, a, b, points):
 
 def integrate_simpson(func, a, b, points):
     h = (b - a) / (points - 1)
-    t = dr.linspace(dr.cuda.Float, a, b, points)
+    t = dr.linspace(mi.Float, a, b, points)
 
-    I_odd = dr.cuda.Float(0)
-    I_even = dr.cuda.Float(0)
+    I_odd = mi.Float(0)
+    I_even = mi.Float(0)
     for i in range(1, points - 1, 2):
         print(i, t[i], func(t[i]))
         I_odd += func(t[i])
@@ -41,7 +43,7 @@ def integrate_simpson(func, a, b, points):
 def approx_jn(x, n, points):
     gm = lambda xx, nn, t : dr.cos(nn * t - xx * dr.sin(t))
 
-    nn = dr.cuda.Float(n)
+    nn = mi.Float(n)
     return 1 / np.pi * mi.math.integrate_simpson(lambda t: gm(x, nn, t), 0, np.pi, 100)
 
 # compute approximations and the reference implementation
@@ -55,7 +57,7 @@ def compute_jn(dmin, dmax, **kwargs) -> tuple:
     vo = np.repeat(np.arange(orders, dtype=int).reshape(orders, 1), npoints, axis=1)
 
     # compute approximations
-    vxr, vor = dr.cuda.Float(vx.ravel()), dr.cuda.Int32(vo.ravel())
+    vxr, vor = mi.Float(vx.ravel()), mi.Int32(vo.ravel())
     start = time.perf_counter_ns()
     approx = np.array(mi.math.bessel_j(vxr, vor)).reshape(orders, npoints)
     ap_time = time.perf_counter_ns() - start
@@ -96,7 +98,7 @@ def viz(x, jn, approx):
 
 def main(args):
     # set environment
-    mi.set_variant("cuda_ad_rgb_polarized")
+    setup_backend(args)
 
     # compute different approaches
     x, jn, approx = compute_jn(
@@ -131,6 +133,7 @@ if __name__ == '__main__':
     parser.add_argument("--dmax", type=float, default=15, help="Maximum of the domain")
     parser.add_argument("--npoints", type=int, default=100, help="Number of points to evaluate")
     parser.add_argument("--norders", type=int, default=5, help="Number of orders to evaluate")
+    add_backend_arguments(parser, passes=False)
 
     args = parser.parse_args()
     main(args)
@@ -0,0 +1,125 @@
+import argparse
+import time
+
+import pandas as pd
+
+import mitsuba as mi
+import drjit as dr
+
+# BSDF configurations exercised by the benchmark
+BSDFS = {
+    "diffuse" : {
+        "type" : "diffuse"
+    },
+    "conductor" : {
+        "type" : "conductor"
+    },
+    "dielectric" : {
+        "type" : "dielectric"
+    },
+    "twosided" : {
+        "type" : "twosided",
+        "bsdf" : { "type" : "diffuse" }
+    },
+    "roughgrating" : {
+        "type" : "roughgrating",
+        "lobe_type" : "sinusoidal",
+        "lobes" : 7,
+        "inv_period" : 0.6,
+        "height" : 0.3
+    },
+}
+
+def generate_queries(n : int, seed : int = 0):
+    """Generate a batch of random wBSDF queries on the upper hemisphere
+
+    Args:
+        n (int): Number of queries (one per SIMD lane)
+        seed (int): Seed of the sampler
+
+    Returns:
+        tuple: The surface interactions, outgoing directions and sample phase data
+    """
+    sampler = mi.load_dict({ "type" : "independent" })
+    sampler.seed(seed, n)
+
+    si = dr.zeros(mi.SurfaceInteraction3f, n)
+    si.wi = mi.warp.square_to_cosine_hemisphere(sampler.next_2d())
+    si.uv = sampler.next_2d()
+    si.sh_frame = mi.Frame3f(mi.Vector3f(0, 0, 1))
+
+    wo = mi.warp.square_to_cosine_hemisphere(sampler.next_2d())
+
+    scale_wl = mi.MI_CIE_MAX - 150 - mi.MI_CIE_MIN
+    λs = [ sampler.next_1d() * scale_wl + mi.MI_CIE_MIN for i in range(4 if mi.is_spectral else 3) ]
+    wavelengths = mi.UnpolarizedSpectrum(*λs)
+    if mi.is_spectral:
+        si.wavelengths = wavelengths
+
+    sd = mi.PLTSamplePhaseData3f(
+        dr.zeros(mi.BSDFSample3f, n), 
+        mi.Vector2i(0), 
+        mi.Vector3f(0.0), 
+        mi.Coherence3f(mi.Float(0.0), mi.Float(0.0)),
+        wavelengths)
+
+    return si, wo, sd
+
+def time_kernel(func, iterations : int) -> float:
+    """Return the average wall time of a kernel in nanoseconds, excluding 
+    the first (compilation) launch.
+    """
+    dr.eval(func())
+    dr.sync_thread()
+
+    start = time.perf_counter_ns()
+    for i in range(iterations):
+        dr.eval(func())
+    dr.sync_thread()
+
+    return (time.perf_counter_ns() - start) / iterations
+
+def benchmark(name : str, bsdf_dict : dict, n : int, iterations : int) -> dict:
+    
+    # calls go through a pointer array, as in the PLT integrator
+    bsdf = mi.BSDFPtr(mi.load_dict(bsdf_dict))
+    ctx = mi.BSDFContext()
+    si, wo, sd = generate_queries(n)
+
+    def separate():
+        val = bsdf.wbsdf_eval(ctx, si, wo, sd, True)
+        pdf = bsdf.wbsdf_pdf(ctx, si, wo, sd, True)
+        return val.L, pdf
+    
+    def fused():
+        val, pdf = bsdf.wbsdf_eval_pdf(ctx, si, wo, sd, True)
+        return val.L, pdf
+
+    t_separate = time_kernel(separate, iterations)
+    t_fused = time_kernel(fused, iterations)
+
+    return {
+        "bsdf" : name,
+        "separate (ns/bounce)" : t_separate / n,
+        "fused (ns/bounce)" : t_fused / n,
+        "savings (%)" : 100.0 * (1.0 - t_fused / t_separate)
+    }
+
+def main(args):
+    mi.set_variant(args.variant)
+
+    names = args.bsdfs if args.bsdfs else BSDFS.keys()
+    rows = [ benchmark(name, BSDFS[name], args.n, args.iterations) for name in names ]
+
+    df = pd.DataFrame(rows)
+    print(df.to_string(index=False))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare separate wbsdf_eval + wbsdf_pdf queries against the fused wbsdf_eval_pdf")
+    parser.add_argument("--variant", type=str, default="cuda_ad_rgb_polarized", help="Mitsuba variant to benchmark")
+    parser.add_argument("--bsdfs", type=str, nargs="*", choices=list(BSDFS.keys()), help="Subset of BSDFs to benchmark (default: all)")
+    parser.add_argument("--n", type=int, default=2**20, help="Number of queries per launch")
+    parser.add_argument("--iterations", type=int, default=20, help="Number of timed launches")
+
+    args = parser.parse_args()
+    main(args)
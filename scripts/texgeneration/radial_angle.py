@@ -7,7 +7,8 @@ import mitsuba as mi
 import drjit as dr
 import time
 
-mi.set_variant("cuda_ad_rgb_polarized")
+from scripts.utils.backend import set_backend
+set_backend()
 
 def main(args):
 
@@ -1,3 +1,4 @@
 from .math import *
 from .polarization import *
-from .misc import *
\ No newline at end of file
+from .misc import *
+from .backend import *
\ No newline at end of file
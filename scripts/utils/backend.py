@@ -0,0 +1,92 @@
+import mitsuba as mi
+import drjit as dr
+
+# Backends that can run the JIT-compiled (Python) integrators, in order of preference
+JIT_BACKENDS = ("cuda", "llvm")
+# All backends, in order of preference
+ALL_BACKENDS = ("cuda", "llvm", "scalar")
+
+def variant_name(backend, spectral=False, polarized=True):
+    """Name of the Mitsuba variant of a backend
+
+    Args:
+        backend (str): "cuda", "llvm" or "scalar"
+        spectral (bool, optional): Whether to use spectral rendering. Defaults to False.
+        polarized (bool, optional): Whether to use polarized rendering. Defaults to True.
+
+    Returns:
+        str: The variant name, e.g. "llvm_ad_rgb_polarized"
+    """
+    prefix = "scalar" if backend == "scalar" else f"{backend}_ad"
+    return f"{prefix}_{'spectral' if spectral else 'rgb'}{'_polarized' if polarized else ''}"
+
+def backend_available(backend, spectral=False, polarized=True):
+    """Whether a backend has been compiled and can run on this machine"""
+    if variant_name(backend, spectral, polarized) not in mi.variants():
+        return False
+
+    if backend == "cuda":
+        return dr.has_backend(dr.JitBackend.CUDA)
+    if backend == "llvm":
+        return dr.has_backend(dr.JitBackend.LLVM)
+    return True
+
+def set_backend(backend="auto", spectral=False, polarized=True, threads=None, backends=JIT_BACKENDS):
+    """Select the variant of the first available backend
+
+    Args:
+        backend (str, optional): The backend to use, or "auto" to pick the first
+        available one in `backends`. Defaults to "auto".
+        spectral (bool, optional): Whether to use spectral rendering. Defaults to False.
+        polarized (bool, optional): Whether to use polarized rendering. Defaults to True.
+        threads (int, optional): Amount of worker threads of the LLVM backend.
+        Defaults to None (one per core).
+        backends (tuple, optional): Backends supported by the caller, in order of preference.
+        Defaults to `JIT_BACKENDS`.
+
+    Returns:
+        str: The selected variant
+    """
+    candidates = backends if backend == "auto" else (backend,)
+
+    for b in candidates:
+        if backend_available(b, spectral, polarized):
+            variant = variant_name(b, spectral, polarized)
+            print(f"Loading {variant} variant...")
+            mi.set_variant(variant)
+
+            if threads is not None and b == "llvm":
+                dr.set_thread_count(threads)
+            return variant
+
+    raise RuntimeError(f"None of the requested backends ({', '.join(candidates)}) is available "
+                       f"(compiled variants: {', '.join(mi.variants())})")
+
+def add_backend_arguments(parser, backends=JIT_BACKENDS, passes=True):
+    """Add the backend selection options to a parser
+
+    Args:
+        parser (argparse.ArgumentParser): The parser
+        backends (tuple, optional): Backends supported by the script. Defaults to `JIT_BACKENDS`.
+        passes (bool, optional): Whether to add the `--samples_per_pass` and `--wavefront_budget`
+        options. Defaults to True.
+    """
+    group = parser.add_argument_group("backend")
+    group.add_argument("--backend", type=str, choices=("auto",) + tuple(backends), default="auto",
+                       help="Backend to render with. 'auto' uses the first available one of: " + ", ".join(backends))
+    group.add_argument("--threads", type=int, default=None,
+                       help="Amount of worker threads of the LLVM backend (default: one per core)")
+    if passes:
+        group.add_argument("--samples_per_pass", type=int, default=None,
+                           help="Samples per pixel traced at once, to bound the size of the wavefront (must divide the sample count)")
+        group.add_argument("--wavefront_budget", type=int, default=None,
+                           help="Maximum amount of samples traced at once. Renders are split into passes "
+                                "over the largest batches of samples per pixel within the budget (default: no limit)")
+
+def setup_backend(args, spectral=False, polarized=True, backends=JIT_BACKENDS):
+    """Select the variant requested by the options of `add_backend_arguments`
+
+    Returns:
+        str: The selected variant
+    """
+    return set_backend(args.backend, spectral, polarized, args.threads, backends)
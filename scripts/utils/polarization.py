@@ -3,33 +3,88 @@ import drjit as dr
 
 import numpy as np
 
-def stokes_to_bitmaps(bitmap : mi.Bitmap):
-    """Generate a bitmap for each one of the stokes components
+# Channels of the stokes integrator output. The intensity is stored in the
+# default layer of an EXR file and each stokes component in its own layer.
+STOKES_LAYERS = ["S0", "S1", "S2", "S3"]
+STOKES_CHANNELS = ["R", "G", "B"] + [f"{s}.{c}" for s in STOKES_LAYERS for c in "RGB"]
+
+def stokes_bitmap(result : mi.TensorXf) -> mi.Bitmap:
+    """Create a multi-channel bitmap with named channels from the output of the stokes integrator"""
+    return mi.Bitmap(result, channel_names=STOKES_CHANNELS)
+
+def stokes_views(bitmap : mi.Bitmap):
+    """Get strided views of the intensity and stokes components of a bitmap, without copies
 
     Args:
         bitmap (mi.Bitmap): The bitmap containing all stokes parameters
 
     Returns:
-        tuple: A bitmap for each stokes parameter (s0, s1, s2, s3)
+        tuple: The intensity and a list with each stokes parameter (s0, s1, s2, s3), as arrays
     """
-
     val = np.array(bitmap, copy=False)
+    return val[:, :, 0:3], [ val[:, :, 3 * (i + 1) : 3 * (i + 2)] for i in range(4) ]
+
+class StokesComponents:
+    """List of the stokes components of the output of the stokes integrator.
+
+    Each component is a strided slice of the rendered tensor, which Dr.Jit
+    gathers lazily in the kernel that consumes it, so accessing a component
+    doesn't allocate a buffer of its own. Convert it with `mi.Bitmap` where a
+    bitmap is needed.
+    """
 
-    print(val.shape)
+    def __init__(self, bitmap : mi.Bitmap, result : mi.TensorXf):
+        self.bitmap = bitmap
+        self.result = result
+        self.views = stokes_views(bitmap)[1]
+        self.components = [ None ] * len(self.views)
 
-    L  = val[:,:,0:3]
-    s0 = val[:,:,3:6]
-    s1 = val[:,:,6:9]
-    s2 = val[:,:,9:12]
-    s3 = val[:,:,12:15]
+    def __len__(self):
+        return len(self.views)
 
-    L_b  = mi.Bitmap(L).convert(srgb_gamma=True)
-    s0_b = mi.Bitmap(s0)
-    s1_b = mi.Bitmap(s1)
-    s2_b = mi.Bitmap(s2)
-    s3_b = mi.Bitmap(s3)
+    def __getitem__(self, i):
+        if self.components[i] is not None:
+            return self.components[i]
+        return self.result[:, :, 3 * (i + 1) : 3 * (i + 2)]
 
-    return L_b, [s0_b, s1_b, s2_b, s3_b]
+    def __setitem__(self, i, image):
+        # keep the source bitmap up to date (e.g. after denoising)
+        self.views[i][...] = np.array(image)
+        self.components[i] = image
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+def stokes_to_bitmaps(bitmap : mi.Bitmap, result : mi.TensorXf):
+    """Generate the intensity bitmap and the stokes components
+
+    Args:
+        bitmap (mi.Bitmap): The bitmap containing all stokes parameters
+        result (mi.TensorXf): The output of the stokes integrator the bitmap was created from
+
+    Returns:
+        tuple: The intensity bitmap and a lazy list of the stokes parameters
+        (s0, s1, s2, s3), see `StokesComponents`
+    """
+
+    L, _ = stokes_views(bitmap)
+    L_b = mi.Bitmap(np.ascontiguousarray(L)).convert(srgb_gamma=True)
+
+    return L_b, StokesComponents(bitmap, result)
+
+def write_stokes_exr(filename, sp : StokesComponents, write_async=True):
+    """Write the intensity and all stokes components as layers of a single EXR file
+
+    Args:
+        filename (str): Path of the EXR file
+        sp (StokesComponents): The stokes components, as returned by `stokes_to_bitmaps`
+        on a bitmap created with `stokes_bitmap`
+        write_async (bool, optional): Whether to write the file in the background. Defaults to True.
+    """
+    if write_async:
+        sp.bitmap.write_async(filename)
+    else:
+        sp.bitmap.write(filename)
 
 def plot_stokes_component(ax, image):
     # Convert the image into a TensorXf for manipulation
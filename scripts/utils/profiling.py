@@ -0,0 +1,142 @@
+import mitsuba as mi
+import drjit as dr
+
+import time
+
+from contextlib import contextmanager, nullcontext
+
+# Stages of the PLT integrator that can be instrumented
+PLT_STAGES = [
+    "sample_phase",
+    "solve_phase",
+    "bsdf_sample",
+    "nee",
+    "emissive",
+    "replay_path",
+    "replay_bounce",
+    "coherence_update"
+]
+
+# Mitsuba profiler phase of each stage (shown in NVTX/ITT timelines)
+PLT_STAGE_PHASES = {
+    "sample_phase" : "PLTSamplePhase",
+    "solve_phase" : "PLTSolvePhase",
+    "replay_path" : "PLTReplayPath"
+}
+
+# profiler used by the instrumented integrators, if any
+_active_profiler = None
+
+def active_profiler():
+    """Return the profiler that is currently collecting stage statistics (or None)"""
+    return _active_profiler
+
+class StageProfiler:
+    """Collects per-stage statistics of a render with the PLT integrator.
+
+    While active (used as a context manager), instrumented integrators report
+    two kinds of data for each stage:
+
+    - The wall-clock time spent tracing it and the number of traced calls.
+      Stages wrapped with `stage()` also open the matching Mitsuba profiler
+      phase, so they can be inspected with Nsight/VTune.
+    - The number of lanes that executed it, counted at runtime with
+      `dr.scatter_reduce` (e.g. to compare lobe sampling against the amount
+      of replayed bounces).
+
+    Kernels are fused, so runtime is only available for the whole render:
+    `profile_render()` reports the launched kernels and their execution time.
+    """
+
+    def __init__(self, stages=PLT_STAGES, count_lanes=True):
+        self.stages = list(stages)
+        self.count_lanes = count_lanes
+        self.reset()
+
+    def reset(self):
+        self.trace_time = { s : 0 for s in self.stages }
+        self.calls = { s : 0 for s in self.stages }
+        self.lanes = dr.zeros(mi.UInt32, len(self.stages)) if self.count_lanes else None
+        self.kernels = []
+        self.render_time = 0
+
+    def __enter__(self):
+        global _active_profiler
+        self.__previous = _active_profiler
+        _active_profiler = self
+        return self
+
+    def __exit__(self, *exc):
+        global _active_profiler
+        _active_profiler = self.__previous
+
+    def count(self, name, active=True):
+        """Count the lanes that execute a stage"""
+        self.calls[name] += 1
+        if self.count_lanes:
+            dr.scatter_reduce(dr.ReduceOp.Add, self.lanes, mi.UInt32(1),
+                              mi.UInt32(self.stages.index(name)), active)
+
+    @contextmanager
+    def stage(self, name, active=True):
+        """Time the tracing of a stage and count the lanes that execute it"""
+        phase = PLT_STAGE_PHASES.get(name)
+        scope = mi.ScopedPhase(getattr(mi.ProfilerPhase, phase)) if phase else nullcontext()
+
+        start = time.perf_counter_ns()
+        with scope:
+            yield
+        self.trace_time[name] += time.perf_counter_ns() - start
+        self.count(name, active)
+
+    def profile_render(self, integrator, scene, spp=0, seed=0, sensor=0):
+        """Render a scene while collecting the statistics of every stage
+
+        Returns:
+            mi.TensorXf: The rendered image
+        """
+        self.reset()
+
+        history = dr.flag(dr.JitFlag.KernelHistory)
+        dr.set_flag(dr.JitFlag.KernelHistory, True)
+        dr.kernel_history() # clear previous entries
+
+        with self:
+            start = time.perf_counter_ns()
+            image = integrator.render(scene, sensor=sensor, seed=seed, spp=spp)
+            dr.eval(image, self.lanes)
+            dr.sync_thread()
+            self.render_time = time.perf_counter_ns() - start
+
+        self.kernels = dr.kernel_history((dr.KernelType.JIT,))
+        dr.set_flag(dr.JitFlag.KernelHistory, history)
+        return image
+
+    def report(self):
+        """Format the collected statistics as a table
+
+        Returns:
+            str: The report
+        """
+        lanes = self.lanes.numpy().tolist() if self.count_lanes else None
+        lines = [f"{'stage':<18}{'traced calls':>14}{'trace time (ms)':>18}{'lanes':>16}"]
+        for i, s in enumerate(self.stages):
+            lane_count = f"{lanes[i]:>16}" if lanes is not None else f"{'-':>16}"
+            lines.append(f"{s:<18}{self.calls[s]:>14}{self.trace_time[s] / 1e6:>18.3f}{lane_count}")
+
+        exec_time = sum(k.get("execution_time", 0) for k in self.kernels)
+        lines.append("")
+        lines.append(f"render time: {self.render_time / 1e6:.3f} ms, "
+                     f"{len(self.kernels)} kernels, execution time: {exec_time:.3f} ms")
+        return "\n".join(lines)
+
+def profile_stage(name, active=True):
+    """Context manager that reports a stage to the active profiler, if any"""
+    profiler = active_profiler()
+    return profiler.stage(name, active) if profiler is not None else nullcontext()
+
+def profile_count(name, active=True):
+    """Report the lanes that execute a stage to the active profiler, if any"""
+    profiler = active_profiler()
+    if profiler is not None:
+        profiler.count(name, active)
@@ -317,6 +317,16 @@ public:
         return 0.f;
     }
 
+    std::pair<GeneralizedRadiance3f, Float>
+    wbsdf_eval_pdf(const BSDFContext & /*ctx*/,
+                   const SurfaceInteraction3f & /*si*/,
+                   const Vector3f & /*wo*/,
+                   const PLTSamplePhaseData3f & /*sd*/,
+                   Mask /*active*/) const override {
+        // Dirac delta reflection/transmission: nothing to evaluate
+        return { GeneralizedRadiance3f(0.f), 0.f };
+    }
+
     GeneralizedRadiance3f wbsdf_weight(const BSDFContext &ctx,
                           const SurfaceInteraction3f &si,
                           const Vector3f &wo,
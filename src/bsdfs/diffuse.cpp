@@ -179,6 +179,21 @@ public:
         return { depolarizer<Spectrum>(value) & active, dr::select(active, pdf, 0.f) };
     }
 
+    std::pair<GeneralizedRadiance3f, Float>
+    wbsdf_eval_pdf(const BSDFContext &ctx,
+                   const SurfaceInteraction3f &si,
+                   const Vector3f &wo,
+                   const PLTSamplePhaseData3f& sd,
+                   Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::BSDFEvaluate, active);
+
+        DRJIT_MARK_USED(sd);
+
+        auto [value, pdf] = eval_pdf(ctx, si, wo, active);
+
+        return { GeneralizedRadiance3f(value), pdf };
+    }
+
     GeneralizedRadiance3f wbsdf_weight(const BSDFContext &ctx, 
         const SurfaceInteraction3f &si,
         const Vector3f &wo, 
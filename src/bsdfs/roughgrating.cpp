@@ -271,8 +271,16 @@ public:
         // Assume light is very coherent by default -> small angular spread
         m_coherence = props.get<ScalarFloat>("coherence", 1e-18f);
 
+        // Optionally precompute the lobe distribution over (|cos theta_i|, wl)
+        m_tabulate_lobes = props.get<bool>("tabulate_lobes", false);
+        m_lobe_table_res = ScalarVector2u(
+            props.get<uint32_t>("lobe_table_cos_res", 128),
+            props.get<uint32_t>("lobe_table_wl_res", 64));
+
         m_components.clear();
         m_components.push_back(m_flags);
+
+        parameters_changed();
     }
 
     void traverse(TraversalCallback *callback) override {
@@ -315,6 +323,30 @@ public:
                                  ParamFlags::Discontinuous);
     }
 
+    void parameters_changed(const std::vector<std::string> &keys = {}) override {
+        if (!m_tabulate_lobes)
+            return;
+
+        // The lobe distribution only depends on the grating height and on
+        // whether the grating is one-dimensional.
+        if (keys.empty() || string::contains(keys, "height") ||
+            string::contains(keys, "inv_period_x") ||
+            string::contains(keys, "inv_period_y")) {
+            if (m_height->is_spatially_varying() ||
+                m_inv_period_y->is_spatially_varying())
+                Throw("RoughGrating: 'tabulate_lobes' requires a constant "
+                      "'height' and 'inv_period_y'!");
+
+            ScalarVector2f inv_period(dr::slice(m_inv_period_x->mean()),
+                                      dr::slice(m_inv_period_y->mean()));
+
+            m_lobe_table = DiffractionLobeTable3f(
+                inv_period, dr::slice(m_height->mean()), m_lobes, m_lobe_type,
+                m_lobe_table_res,
+                ScalarVector2f(MI_CIE_MIN, MI_CIE_MAX) * 1e-3f);
+        }
+    }
+
     /**
      * Note: Apart from PLT Integrator, this sampling routine will behave
      * as a conventional rough conductor.
@@ -421,19 +453,19 @@ public:
         // std::cout << wi << ";" << wi_local << std::endl;
 
         // sample lobe and diffract in local frame
-        DiffractionGrating3f grating(
-            m_grating_angle->eval_1(si),
-            Vector2f(
-                m_inv_period_x->eval_1(si, active), 
-                m_inv_period_y->eval_1(si, active)),
-            m_height->eval_1(si, active), 
-            m_lobes, 
-            m_lobe_type,
-            m_multiplier->eval_1(si, active), 
-            si.uv);
+        DiffractionGrating3f grating = make_grating(si, active);
 
-        auto [lobe, pdf_xy] =
-            grating.sample_lobe(sample2, wi_local, wl * 1e-3f);
+        Vector2i lobe;
+        Vector2f pdf_xy;
+        if (m_tabulate_lobes) {
+            ScopedPhase sp(ProfilerPhase::GratingSampleLobe);
+            Float pmf[diffractionGratingsMaxLobes];
+            m_lobe_table.eval(wi_local, wl * 1e-3f, pmf, active);
+            std::tie(lobe, pdf_xy) = grating.sample_lobe(sample2, pmf);
+        } else {
+            std::tie(lobe, pdf_xy) =
+                grating.sample_lobe(sample2, wi_local, wl * 1e-3f);
+        }
 
         Float intensity = grating.lobe_intensity(lobe, wi_local, wl);
 
@@ -680,6 +712,21 @@ public:
                                      Mask active) const override {
         MI_MASKED_FUNCTION(ProfilerPhase::BSDFEvaluate, active);
 
+        DiffractionGrating3f grating = make_grating(si, active);
+
+        return eval_grating(ctx, si, wo, sd, grating, active);
+    }
+
+    /**
+     * Evaluate the wBSDF for an already instantiated grating model, so that
+     * it can be shared between the evaluation and the PDF.
+     */
+    GeneralizedRadiance3f eval_grating(const BSDFContext &ctx,
+                                       const SurfaceInteraction3f &si,
+                                       const Vector3f &wo,
+                                       const PLTSamplePhaseData3f &sd,
+                                       DiffractionGrating3f &grating,
+                                       Mask active) const {
         Float cos_theta_i = Frame3f::cos_theta(si.wi),
               cos_theta_o = Frame3f::cos_theta(wo);
 
@@ -693,23 +740,14 @@ public:
         Vector3f H = dr::normalize(wo + si.wi);
 
         /* Construct a microfacet distribution matching the
-        roughness values at the current surface position. */
-        MicrofacetDistribution distr(m_type, m_alpha_u->eval_1(si, active),
-                                     m_alpha_v->eval_1(si, active),
+        roughness values at the current surface position. The lobe width
+        uses the unclamped roughness of the textures, as the distribution
+        clamps it to avoid numerical issues. */
+        Float alpha_u = m_alpha_u->eval_1(si, active),
+              alpha_v = m_alpha_v->eval_1(si, active);
+        MicrofacetDistribution distr(m_type, alpha_u, alpha_v,
                                      m_sample_visible);
 
-        // instantiate grating model
-        DiffractionGrating3f grating(
-            m_grating_angle->eval_1(si),
-            Vector2f(
-                m_inv_period_x->eval_1(si, active), 
-                m_inv_period_y->eval_1(si, active)),
-            m_height->eval_1(si, active), 
-            m_lobes, 
-            m_lobe_type,
-            m_multiplier->eval_1(si, active), 
-            si.uv);
-
         Vector3f reflection_dir = reflect(si.wi);
 
         // fallback in RGB mode
@@ -722,8 +760,15 @@ public:
             wavelengths[1] = sd.sampling_wavelengths[1];
             wavelengths[2] = sd.sampling_wavelengths[2];
 
-            auto a =
-                2 * dr::sqrt(m_alpha_u->eval_1(si) * m_alpha_v->eval_1(si));
+            auto a = 2 * dr::sqrt(alpha_u * alpha_v);
+
+            // look up the lobe distribution once per wavelength
+            Float pmf[3][diffractionGratingsMaxLobes];
+            if (m_tabulate_lobes) {
+                for (int i = 0; i < 3; i++)
+                    m_lobe_table.eval(si.wi, wavelengths[i] * 1e-3f, pmf[i],
+                                      active);
+            }
 
             // exhaustive search of the lobes
             for (int lx = -((int) m_lobes) / 2; lx < (int) m_lobes / 2 + 1;
@@ -737,7 +782,9 @@ public:
                         Float k = dr::TwoPi<Float> / (wl * 1e-3f);
 
                         Float lobe_intensity =
-                            grating.lobe_intensity(lobe, si.wi, wl * 1e-3f);
+                            m_tabulate_lobes
+                                ? grating.lobe_intensity(lobe, pmf[i])
+                                : grating.lobe_intensity(lobe, si.wi, wl * 1e-3f);
 
                         Vector3f center_dir;
                         Mask lobe_active;
@@ -841,9 +888,17 @@ public:
         } else {
             UnpolarizedSpectrum result(0.0);
             auto wavelengths = si.wavelengths;
+            constexpr size_t wavelength_count = dr::size_v<decltype(wavelengths)>;
 
-            auto a =
-                2 * dr::sqrt(m_alpha_u->eval_1(si) * m_alpha_v->eval_1(si));
+            auto a = 2 * dr::sqrt(alpha_u * alpha_v);
+
+            // look up the lobe distribution once per wavelength
+            Float pmf[wavelength_count][diffractionGratingsMaxLobes];
+            if (m_tabulate_lobes) {
+                for (size_t i = 0; i < wavelength_count; i++)
+                    m_lobe_table.eval(si.wi, wavelengths[i] * 1e-3f, pmf[i],
+                                      active);
+            }
 
             // exhaustive search of the lobes
             for (int lx = -((int) m_lobes) / 2; lx < (int) m_lobes / 2 + 1;
@@ -858,7 +913,9 @@ public:
                         Float k = dr::TwoPi<Float> / (wl * 1e-3f);
 
                         Float lobe_intensity =
-                            grating.lobe_intensity(lobe, si.wi, wl * 1e-3f);
+                            m_tabulate_lobes
+                                ? grating.lobe_intensity(lobe, pmf[i])
+                                : grating.lobe_intensity(lobe, si.wi, wl * 1e-3f);
 
                         Vector3f center_dir;
                         Mask lobe_active;
@@ -1011,20 +1068,33 @@ public:
                     Mask active) const override {
         MI_MASKED_FUNCTION(ProfilerPhase::BSDFEvaluate, active);
 
-        // instantiate grating model
-        DiffractionGrating3f grating(
-            m_grating_angle->eval_1(si),
-            Vector2f(
-                m_inv_period_x->eval_1(si, active), 
-                m_inv_period_y->eval_1(si, active)),
-            m_height->eval_1(si, active), 
-            m_lobes, 
-            m_lobe_type,
-            m_multiplier->eval_1(si, active), 
-            si.uv);
+        DiffractionGrating3f grating = make_grating(si, active);
+
+        return pdf_grating(si, sd, grating);
+    }
+
+    std::pair<GeneralizedRadiance3f, Float>
+    wbsdf_eval_pdf(const BSDFContext &ctx, const SurfaceInteraction3f &si,
+                   const Vector3f &wo, const PLTSamplePhaseData3f &sd,
+                   Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::BSDFEvaluate, active);
+
+        // the grating model is shared by both queries
+        DiffractionGrating3f grating = make_grating(si, active);
+
+        return { eval_grating(ctx, si, wo, sd, grating, active),
+                 pdf_grating(si, sd, grating) };
+    }
 
+    /**
+     * Compute the wBSDF PDF for an already instantiated grating model.
+     */
+    Float pdf_grating(const SurfaceInteraction3f &si,
+                      const PLTSamplePhaseData3f &sd,
+                      const DiffractionGrating3f &grating) const {
         Float k;
         if constexpr (is_spectral_v<Spectrum>) {
+            DRJIT_MARK_USED(sd);
             k = dr::TwoPi<Float> / (si.wavelengths[0] * 1e-3f);
         } else {
             k = dr::TwoPi<Float> / (sd.sampling_wavelengths[0] * 1e-3f);
@@ -1033,6 +1103,23 @@ public:
         return grating.alpha(si.wi, k);
     }
 
+    /**
+     * Instantiate the grating model at the current surface position.
+     */
+    DiffractionGrating3f make_grating(const SurfaceInteraction3f &si,
+                                      Mask active) const {
+        return DiffractionGrating3f(
+            m_grating_angle->eval_1(si),
+            Vector2f(
+                m_inv_period_x->eval_1(si, active), 
+                m_inv_period_y->eval_1(si, active)),
+            m_height->eval_1(si, active), 
+            m_lobes, 
+            m_lobe_type,
+            m_multiplier->eval_1(si, active), 
+            si.uv);
+    }
+
     std::pair<Spectrum, Float> eval_pdf(const BSDFContext &ctx,
                                         const SurfaceInteraction3f &si,
                                         const Vector3f &wo,
@@ -1182,6 +1269,15 @@ private:
 
     /// @brief Scaling factor for outgoing radiance.
     ref<Texture> m_multiplier;
+
+    /// @brief Whether lobes are sampled from a precomputed distribution.
+    bool m_tabulate_lobes;
+
+    /// @brief Resolution of the lobe table along (|cos theta_i|, wavelength).
+    ScalarVector2u m_lobe_table_res;
+
+    /// @brief Precomputed lobe distribution (only if m_tabulate_lobes is set).
+    DiffractionLobeTable3f m_lobe_table;
 };
 
 MI_IMPLEMENT_CLASS_VARIANT(RoughGrating, BSDF)
@@ -0,0 +1,486 @@
+#include <mitsuba/core/properties.h>
+#include <mitsuba/core/string.h>
+#include <mitsuba/core/fresolver.h>
+#include <mitsuba/core/tensor.h>
+#include <mitsuba/core/distr_2d.h>
+#include <mitsuba/render/bsdf.h>
+#include <mitsuba/plt/fwd.h>
+#include <mitsuba/plt/sample_solve.h>
+#include <drjit-core/half.h>
+#include <vector>
+
+NAMESPACE_BEGIN(mitsuba)
+
+/**!
+
+.. _bsdf-tabulatedwbsdf:
+
+Tabulated wave BSDF (:monosp:`tabulatedwbsdf`)
+----------------------------------------------
+
+.. pluginparameters::
+
+ * - filename
+   - |string|
+   - Filename of the table to be loaded
+
+This plugin replaces an arbitrary wave BSDF (e.g. :monosp:`roughgrating`) by a
+table of its values, which is baked by ``mitsuba.util.bake_wbsdf()`` and
+written with ``mitsuba.util.write_tensor_file()`` (see
+``scripts/dispersion/bake.py``). The evaluation of expensive models, such as
+gratings with many diffraction lobes, becomes an interpolated lookup, and
+outgoing directions are importance sampled directly from the table.
+
+The table is stored as a tensor file with the following fields:
+
+- ``phi_i``, ``theta_i``: azimuth and elevation (in radians) of the incident
+  directions of the table.
+- ``wavelengths``: wavelengths (in nm) of the table.
+- ``values``: the (cosine-weighted) intensity of the BSDF, with shape
+  ``[phi_i, theta_i, wavelengths, theta_o, phi_o]``. The outgoing directions
+  cover the whole sphere, with ``theta_o`` in :math:`[0, \pi]` and ``phi_o`` in
+  :math:`[-\pi, \pi]`. Half-precision tables are supported to halve their size.
+
+Values in between entries are interpolated linearly in all dimensions. Only the
+intensity is stored, so the material is depolarizing in polarized variants. In
+RGB variants, the wave BSDF methods look up the sampling wavelengths of each
+channel, and the regular BSDF methods use a representative wavelength of each
+channel.
+
+.. tabs::
+    .. code-tab:: xml
+        :name: lst-tabulatedwbsdf
+
+        <bsdf type="tabulatedwbsdf">
+            <string name="filename" value="grating.tensor"/>
+        </bsdf>
+
+    .. code-tab:: python
+
+        'type': 'tabulatedwbsdf',
+        'filename': 'grating.tensor'
+
+*/
+template <typename Float, typename Spectrum>
+class TabulatedWBSDF final : public BSDF<Float, Spectrum> {
+public:
+    MI_IMPORT_BASE(BSDF, m_flags, m_components)
+    MI_IMPORT_TYPES()
+    MI_IMPORT_PLT_BASIC_TYPES()
+
+    using Warp2D2 = Marginal2D<Float, 2, true>;
+    using Warp2D3 = Marginal2D<Float, 3, true>;
+
+    TabulatedWBSDF(const Properties &props) : Base(props) {
+        auto fs            = Thread::thread()->file_resolver();
+        fs::path file_path = fs->resolve(props.string("filename"));
+        m_name             = file_path.filename().string();
+
+        ref<TensorFile> tf = new TensorFile(file_path);
+        using Field = TensorFile::Field;
+
+        const Field &phi_i       = tf->field("phi_i");
+        const Field &theta_i     = tf->field("theta_i");
+        const Field &wavelengths = tf->field("wavelengths");
+        const Field &values      = tf->field("values");
+
+        if (!(phi_i.shape.size() == 1 &&
+              phi_i.dtype == Struct::Type::Float32 &&
+              phi_i.shape[0] >= 2 &&
+
+              theta_i.shape.size() == 1 &&
+              theta_i.dtype == Struct::Type::Float32 &&
+              theta_i.shape[0] >= 2 &&
+
+              wavelengths.shape.size() == 1 &&
+              wavelengths.dtype == Struct::Type::Float32 &&
+              wavelengths.shape[0] >= 2 &&
+
+              (values.dtype == Struct::Type::Float32 ||
+               values.dtype == Struct::Type::Float16) &&
+              values.shape.size() == 5 &&
+              values.shape[0] == phi_i.shape[0] &&
+              values.shape[1] == theta_i.shape[0] &&
+              values.shape[2] == wavelengths.shape[0] &&
+              values.shape[3] >= 2 &&
+              values.shape[4] >= 2))
+            Throw("Invalid file structure: %s", tf);
+
+        size_t n_slices = values.shape[0] * values.shape[1],
+               n_wavelengths = values.shape[2],
+               res_theta = values.shape[3],
+               res_phi = values.shape[4],
+               n_dirs = res_theta * res_phi;
+
+        std::vector<ScalarFloat> data(n_slices * n_wavelengths * n_dirs);
+        for (size_t i = 0; i < data.size(); ++i) {
+            if (values.dtype == Struct::Type::Float16)
+                data[i] = (ScalarFloat) dr::half::from_binary(
+                    ((const uint16_t *) values.data)[i]);
+            else
+                data[i] = (ScalarFloat) ((const float *) values.data)[i];
+        }
+
+        /* Sampling density of the outgoing directions: the average over all
+           wavelengths, times the Jacobian of the spherical mapping. */
+        std::vector<ScalarFloat> sampling(n_slices * n_dirs, 0.f);
+        bool has_reflection = false, has_transmission = false;
+        ScalarFloat inv_wavelengths = 1.f / n_wavelengths;
+
+        for (size_t s = 0; s < n_slices; ++s) {
+            // Incident elevation of the slice (slices are ordered by phi_i, then theta_i)
+            ScalarFloat cos_theta_i = dr::cos(
+                ((const float *) theta_i.data)[s % theta_i.shape[0]]);
+
+            for (size_t w = 0; w < n_wavelengths; ++w) {
+                const ScalarFloat *slice = data.data() + (s * n_wavelengths + w) * n_dirs;
+                for (size_t j = 0; j < n_dirs; ++j) {
+                    if (slice[j] <= 0.f)
+                        continue;
+
+                    ScalarFloat cos_theta_o = dr::cos(u2theta(j / res_phi / (ScalarFloat) (res_theta - 1)));
+                    if (cos_theta_i * cos_theta_o >= 0.f)
+                        has_reflection = true;
+                    else
+                        has_transmission = true;
+
+                    sampling[s * n_dirs + j] += slice[j] * inv_wavelengths;
+                }
+            }
+
+            for (size_t j = 0; j < n_dirs; ++j) {
+                ScalarFloat sin_theta_o = dr::sin(u2theta(j / res_phi / (ScalarFloat) (res_theta - 1)));
+                // Keep a small floor, so that empty slices can be normalized
+                sampling[s * n_dirs + j] = sampling[s * n_dirs + j] * sin_theta_o + 1e-8f;
+            }
+        }
+
+        const float *theta_i_data = (const float *) theta_i.data;
+        m_two_sided = theta_i_data[theta_i.shape[0] - 1] > .5f * dr::Pi<ScalarFloat>;
+
+        m_flags = BSDFFlags::FrontSide;
+        if (m_two_sided)
+            m_flags = m_flags | BSDFFlags::BackSide;
+        if (has_reflection || !has_transmission)
+            m_flags = m_flags | BSDFFlags::GlossyReflection;
+        if (has_transmission)
+            m_flags = m_flags | BSDFFlags::GlossyTransmission;
+        m_flags = m_flags | BSDFFlags::Anisotropic;
+        m_components.push_back(m_flags);
+
+        std::vector<ScalarFloat> phi_i_values(phi_i.shape[0]),
+                                 theta_i_values(theta_i.shape[0]),
+                                 wavelength_values(wavelengths.shape[0]);
+        for (size_t i = 0; i < phi_i_values.size(); ++i)
+            phi_i_values[i] = ((const float *) phi_i.data)[i];
+        for (size_t i = 0; i < theta_i_values.size(); ++i)
+            theta_i_values[i] = theta_i_data[i];
+        for (size_t i = 0; i < wavelength_values.size(); ++i)
+            wavelength_values[i] = ((const float *) wavelengths.data)[i];
+
+        // Construct the interpolant of the values
+        m_values = Warp2D3(
+            data.data(),
+            ScalarVector2u((uint32_t) res_phi, (uint32_t) res_theta),
+            {{ (uint32_t) phi_i.shape[0],
+               (uint32_t) theta_i.shape[0],
+               (uint32_t) wavelengths.shape[0] }},
+            {{ phi_i_values.data(),
+               theta_i_values.data(),
+               wavelength_values.data() }},
+            false, false
+        );
+
+        // Construct the warp used to sample the outgoing directions
+        m_sampling = Warp2D2(
+            sampling.data(),
+            ScalarVector2u((uint32_t) res_phi, (uint32_t) res_theta),
+            {{ (uint32_t) phi_i.shape[0],
+               (uint32_t) theta_i.shape[0] }},
+            {{ phi_i_values.data(),
+               theta_i_values.data() }}
+        );
+
+        Log(Info, "Loaded wave BSDF table \"%s\" (resolution %i x %i x %i x %i x %i)",
+            m_name, values.shape[0], values.shape[1], values.shape[2],
+            values.shape[3], values.shape[4]);
+    }
+
+    std::pair<BSDFSample3f, Spectrum> sample(const BSDFContext &ctx,
+                                             const SurfaceInteraction3f &si,
+                                             Float /*sample1*/,
+                                             const Point2f &sample2,
+                                             Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::BSDFSample, active);
+
+        auto [bs, value] = sample_table(ctx, si, sample2,
+                                        channel_wavelengths(si, nullptr), active);
+
+        return { bs, depolarizer<Spectrum>(value) };
+    }
+
+    std::pair<PLTSamplePhaseData3f, GeneralizedRadiance3f>
+    wbsdf_sample(const BSDFContext &ctx, const SurfaceInteraction3f &si,
+                 Float /*sample1*/, const Point2f &sample2,
+                 const Point2f & /*lobe_sample2*/, Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::BSDFSample, active);
+
+        auto [bs, value] = sample_table(ctx, si, sample2,
+                                        channel_wavelengths(si, nullptr), active);
+
+        UnpolarizedSpectrum sampling_wavelengths(0.f);
+        if constexpr (is_spectral_v<Spectrum>)
+            sampling_wavelengths = si.wavelengths;
+
+        PLTSamplePhaseData3f sd(bs, Vector2i(0, 0), Vector3f(0.f),
+                                Coherence3f(Float(0.f), Float(0.f)),
+                                sampling_wavelengths);
+
+        return { sd, GeneralizedRadiance3f(depolarizer<Spectrum>(value)) };
+    }
+
+    Spectrum eval(const BSDFContext &ctx, const SurfaceInteraction3f &si,
+                  const Vector3f &wo, Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::BSDFEvaluate, active);
+
+        return depolarizer<Spectrum>(
+            eval_table(ctx, si, wo, channel_wavelengths(si, nullptr), active));
+    }
+
+    GeneralizedRadiance3f wbsdf_eval(const BSDFContext &ctx,
+                                     const SurfaceInteraction3f &si,
+                                     const Vector3f &wo,
+                                     const PLTSamplePhaseData3f &sd,
+                                     Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::BSDFEvaluate, active);
+
+        return GeneralizedRadiance3f(depolarizer<Spectrum>(
+            eval_table(ctx, si, wo, channel_wavelengths(si, &sd), active)));
+    }
+
+    Float pdf(const BSDFContext &ctx, const SurfaceInteraction3f &si,
+              const Vector3f &wo, Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::BSDFEvaluate, active);
+
+        return pdf_table(ctx, si, wo, active);
+    }
+
+    Float wbsdf_pdf(const BSDFContext &ctx, const SurfaceInteraction3f &si,
+                    const Vector3f &wo, const PLTSamplePhaseData3f & /*sd*/,
+                    Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::BSDFEvaluate, active);
+
+        return pdf_table(ctx, si, wo, active);
+    }
+
+    std::pair<Spectrum, Float> eval_pdf(const BSDFContext &ctx,
+                                        const SurfaceInteraction3f &si,
+                                        const Vector3f &wo,
+                                        Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::BSDFEvaluate, active);
+
+        return { depolarizer<Spectrum>(eval_table(
+                     ctx, si, wo, channel_wavelengths(si, nullptr), active)),
+                 pdf_table(ctx, si, wo, active) };
+    }
+
+    std::pair<GeneralizedRadiance3f, Float>
+    wbsdf_eval_pdf(const BSDFContext &ctx, const SurfaceInteraction3f &si,
+                   const Vector3f &wo, const PLTSamplePhaseData3f &sd,
+                   Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::BSDFEvaluate, active);
+
+        return { GeneralizedRadiance3f(depolarizer<Spectrum>(eval_table(
+                     ctx, si, wo, channel_wavelengths(si, &sd), active))),
+                 pdf_table(ctx, si, wo, active) };
+    }
+
+    GeneralizedRadiance3f wbsdf_weight(const BSDFContext &ctx,
+                                       const SurfaceInteraction3f &si,
+                                       const Vector3f &wo,
+                                       const PLTSamplePhaseData3f &sd,
+                                       Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::BSDFEvaluate, active);
+
+        UnpolarizedSpectrum value =
+            eval_table(ctx, si, wo, channel_wavelengths(si, &sd), active);
+        Float pdf = pdf_table(ctx, si, wo, active);
+
+        return GeneralizedRadiance3f(depolarizer<Spectrum>(
+            dr::select(pdf > 0.f, value / pdf, 0.f)));
+    }
+
+    std::string to_string() const override {
+        std::ostringstream oss;
+        oss << "TabulatedWBSDF[" << std::endl
+            << "  filename = \"" << m_name << "\"," << std::endl
+            << "  values = " << string::indent(m_values.to_string()) << "," << std::endl
+            << "  sampling = " << string::indent(m_sampling.to_string()) << std::endl
+            << "]";
+        return oss.str();
+    }
+
+    MI_DECLARE_CLASS()
+private:
+    /**
+     * Numerically stable method computing the elevation of the given
+     * (normalized) vector in the local frame.
+     * Conceptually equivalent to:
+     *     safe_acos(Frame3f::cos_theta(d))
+     */
+    auto elevation(const Vector3f &d) const {
+        auto dist = dr::sqrt(dr::square(d.x()) + dr::square(d.y()) + dr::square(d.z() - 1.f));
+        return 2.f * dr::safe_asin(.5f * dist);
+    }
+
+    /// Wavelengths at which each channel of the spectrum is looked up
+    UnpolarizedSpectrum channel_wavelengths(const SurfaceInteraction3f &si,
+                                            const PLTSamplePhaseData3f *sd) const {
+        if constexpr (is_spectral_v<Spectrum>) {
+            DRJIT_MARK_USED(sd);
+            return si.wavelengths;
+        } else {
+            DRJIT_MARK_USED(si);
+            if (sd)
+                return sd->sampling_wavelengths;
+            if constexpr (is_rgb_v<Spectrum>)
+                return UnpolarizedSpectrum(612.f, 549.f, 465.f);
+            else
+                return UnpolarizedSpectrum(549.f);
+        }
+    }
+
+    /// Whether the reflected or transmitted component is enabled in the context
+    Mask is_enabled(const BSDFContext &ctx, const Mask &reflection) const {
+        return dr::select(reflection,
+                          Mask(ctx.is_enabled(BSDFFlags::GlossyReflection)),
+                          Mask(ctx.is_enabled(BSDFFlags::GlossyTransmission)));
+    }
+
+    /// Probability density of the spherical mapping of the unit square
+    Float jacobian(const Float &sin_theta) const {
+        return dr::maximum(2.f * dr::square(dr::Pi<Float>) * sin_theta, 1e-6f);
+    }
+
+    UnpolarizedSpectrum lookup(const Point2f &u, const Float &phi_i,
+                               const Float &theta_i,
+                               const UnpolarizedSpectrum &wavelengths,
+                               Mask active) const {
+        UnpolarizedSpectrum value;
+        for (size_t i = 0; i < dr::size_v<UnpolarizedSpectrum>; ++i) {
+            Float params[3] = { phi_i, theta_i, wavelengths[i] };
+            value[i] = m_values.eval(u, params, active);
+        }
+        return value;
+    }
+
+    std::pair<BSDFSample3f, UnpolarizedSpectrum>
+    sample_table(const BSDFContext &ctx, const SurfaceInteraction3f &si,
+                 const Point2f &sample2, const UnpolarizedSpectrum &wavelengths,
+                 Mask active) const {
+        BSDFSample3f bs = dr::zeros<BSDFSample3f>();
+
+        if (!m_two_sided)
+            active &= Frame3f::cos_theta(si.wi) > 0.f;
+
+        if (!(ctx.is_enabled(BSDFFlags::GlossyReflection) ||
+              ctx.is_enabled(BSDFFlags::GlossyTransmission)) ||
+            dr::none_or<false>(active))
+            return { bs, 0.f };
+
+        Float theta_i = elevation(si.wi),
+              phi_i   = dr::atan2(si.wi.y(), si.wi.x());
+
+        Float params[2] = { phi_i, theta_i };
+        auto [u, pdf] = m_sampling.sample(sample2, params, active);
+
+        auto [sin_phi, cos_phi]     = dr::sincos(u2phi(u.x()));
+        auto [sin_theta, cos_theta] = dr::sincos(u2theta(u.y()));
+
+        bs.wo = Vector3f(cos_phi * sin_theta, sin_phi * sin_theta, cos_theta);
+        bs.pdf = pdf / jacobian(sin_theta);
+        bs.eta = 1.f;
+        bs.sampled_component = 0;
+
+        Mask reflection = Frame3f::cos_theta(si.wi) * cos_theta >= 0.f;
+        bs.sampled_type = dr::select(reflection,
+                                     UInt32(+BSDFFlags::GlossyReflection),
+                                     UInt32(+BSDFFlags::GlossyTransmission));
+
+        active &= is_enabled(ctx, reflection) && bs.pdf > 0.f;
+
+        UnpolarizedSpectrum value = lookup(u, phi_i, theta_i, wavelengths, active);
+
+        return { bs, dr::select(active, value / bs.pdf, 0.f) };
+    }
+
+    UnpolarizedSpectrum eval_table(const BSDFContext &ctx,
+                                   const SurfaceInteraction3f &si,
+                                   const Vector3f &wo,
+                                   const UnpolarizedSpectrum &wavelengths,
+                                   Mask active) const {
+        if (!m_two_sided)
+            active &= Frame3f::cos_theta(si.wi) > 0.f;
+        active &= is_enabled(ctx, Frame3f::cos_theta(si.wi) * Frame3f::cos_theta(wo) >= 0.f);
+
+        if (dr::none_or<false>(active))
+            return 0.f;
+
+        Float theta_i = elevation(si.wi),
+              phi_i   = dr::atan2(si.wi.y(), si.wi.x());
+
+        Point2f u(phi2u(dr::atan2(wo.y(), wo.x())), theta2u(elevation(wo)));
+
+        return dr::select(active, lookup(u, phi_i, theta_i, wavelengths, active), 0.f);
+    }
+
+    Float pdf_table(const BSDFContext &ctx, const SurfaceInteraction3f &si,
+                    const Vector3f &wo, Mask active) const {
+        if (!m_two_sided)
+            active &= Frame3f::cos_theta(si.wi) > 0.f;
+        active &= is_enabled(ctx, Frame3f::cos_theta(si.wi) * Frame3f::cos_theta(wo) >= 0.f);
+
+        if (dr::none_or<false>(active))
+            return 0.f;
+
+        Float theta_i = elevation(si.wi),
+              phi_i   = dr::atan2(si.wi.y(), si.wi.x());
+
+        Point2f u(phi2u(dr::atan2(wo.y(), wo.x())), theta2u(elevation(wo)));
+
+        Float params[2] = { phi_i, theta_i };
+        Float pdf = m_sampling.eval(u, params, active) /
+                    jacobian(Frame3f::sin_theta(wo));
+
+        return dr::select(active, pdf, 0.f);
+    }
+
+    template <typename Value> static Value u2theta(Value u) {
+        return u * dr::Pi<ScalarFloat>;
+    }
+
+    template <typename Value> static Value u2phi(Value u) {
+        return (2.f * u - 1.f) * dr::Pi<ScalarFloat>;
+    }
+
+    template <typename Value> static Value theta2u(Value theta) {
+        return theta * dr::InvPi<ScalarFloat>;
+    }
+
+    template <typename Value> static Value phi2u(Value phi) {
+        return (phi + dr::Pi<ScalarFloat>) * dr::InvTwoPi<ScalarFloat>;
+    }
+
+private:
+    std::string m_name;
+    /// Interpolant of the tabulated values
+    Warp2D3 m_values;
+    /// Warp to sample the outgoing directions
+    Warp2D2 m_sampling;
+    /// Whether the table covers incident directions below the surface
+    bool m_two_sided;
+};
+
+MI_IMPLEMENT_CLASS_VARIANT(TabulatedWBSDF, BSDF)
+MI_EXPORT_PLUGIN(TabulatedWBSDF, "Tabulated wave BSDF")
+NAMESPACE_END(mitsuba)
@@ -0,0 +1,84 @@
+import pytest
+import drjit as dr
+import mitsuba as mi
+
+import numpy as np
+
+SOURCE_BSDF = { 'type': 'roughconductor', 'material': 'Au', 'alpha': 0.3 }
+
+# table of the source BSDF
+PHI_I = np.linspace(-np.pi, np.pi, 5, dtype=np.float32)
+THETA_I = np.linspace(0, np.deg2rad(80), 3, dtype=np.float32)
+WAVELENGTHS = np.linspace(400, 700, 4, dtype=np.float32)
+RES_THETA, RES_PHI = 33, 65
+
+
+def bake_table(tmp_path):
+    table = mi.util.bake_wbsdf(mi.load_dict(SOURCE_BSDF), PHI_I, THETA_I,
+                               WAVELENGTHS, RES_THETA, RES_PHI)
+
+    filename = str(tmp_path / 'roughconductor.tensor')
+    mi.util.write_tensor_file(filename, {
+        'phi_i': PHI_I,
+        'theta_i': THETA_I,
+        'wavelengths': WAVELENGTHS,
+        'values': table
+    })
+    return filename
+
+
+def sph_to_dir(theta, phi):
+    st, ct = dr.sincos(theta)
+    sp, cp = dr.sincos(phi)
+    return mi.Vector3f(cp * st, sp * st, ct)
+
+
+def test01_eval_table_nodes(variants_vec_backends_once_spectral, tmp_path):
+    source = mi.load_dict(SOURCE_BSDF)
+    bsdf = mi.load_dict({ 'type': 'tabulatedwbsdf', 'filename': bake_table(tmp_path) })
+
+    # outgoing nodes, without the poles (where the azimuth is undefined)
+    j, k = dr.meshgrid(dr.arange(mi.Float, 1, RES_THETA - 1),
+                       dr.arange(mi.Float, RES_PHI))
+    wo = sph_to_dir(j * dr.pi / (RES_THETA - 1), k * 2 * dr.pi / (RES_PHI - 1) - dr.pi)
+    n = dr.width(wo)
+
+    ctx = mi.BSDFContext()
+    for phi_i in PHI_I[1:-1]:
+        for theta_i in THETA_I:
+            si = dr.zeros(mi.SurfaceInteraction3f, n)
+            si.wi = sph_to_dir(mi.Float(theta_i), mi.Float(phi_i))
+            # one table wavelength per channel
+            si.wavelengths = mi.UnpolarizedSpectrum(*WAVELENGTHS.tolist())
+
+            sd = mi.PLTSamplePhaseData3f(
+                dr.zeros(mi.BSDFSample3f, n),
+                mi.Vector2i(0),
+                mi.Vector3f(0),
+                mi.Coherence3f(mi.Float(0), mi.Float(0)),
+                si.wavelengths)
+
+            value = mi.unpolarized_spectrum(bsdf.wbsdf_eval(ctx, si, wo, sd).L)
+            ref = mi.unpolarized_spectrum(source.wbsdf_eval(ctx, si, wo, sd).L)
+
+            assert dr.allclose(value, ref, rtol=1e-2, atol=1e-3)
+
+
+@pytest.mark.parametrize('theta_i, phi_i', [(0.0, 0.0), (30.0, 0.3), (65.0, -2.0)])
+def test02_chi2_wbsdf_sampling(variants_vec_backends_once_spectral, tmp_path, theta_i, phi_i):
+    theta_i = np.deg2rad(theta_i)
+    wi = [np.cos(phi_i) * np.sin(theta_i), np.sin(phi_i) * np.sin(theta_i), np.cos(theta_i)]
+    sample_func, pdf_func = mi.chi2.WBSDFAdapter(
+        'tabulatedwbsdf',
+        { 'type': 'tabulatedwbsdf', 'filename': bake_table(tmp_path) },
+        wi=wi)
+
+    chi2 = mi.chi2.ChiSquareTest(
+        domain=mi.chi2.SphericalDomain(),
+        sample_func=sample_func,
+        pdf_func=pdf_func,
+        sample_dim=5,
+        ires=16
+    )
+
+    assert chi2.run()
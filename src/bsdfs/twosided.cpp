@@ -376,6 +376,50 @@ public:
         return result;
     }
 
+    std::pair<GeneralizedRadiance3f, Float>
+    wbsdf_eval_pdf(const BSDFContext &ctx_,
+                   const SurfaceInteraction3f &si_,
+                   const Vector3f &wo_,
+                   const PLTSamplePhaseData3f& sd,
+                   Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::BSDFEvaluate, active);
+
+        SurfaceInteraction3f si(si_);
+        BSDFContext ctx(ctx_);
+        Vector3f wo(wo_);
+
+        GeneralizedRadiance3f value(0.f);
+        Float pdf = 0.f;
+
+        if (m_brdf[0] == m_brdf[1]) {
+            wo.z() = dr::mulsign(wo.z(), si.wi.z());
+            si.wi.z() = dr::abs(si.wi.z());
+            std::tie(value, pdf) = m_brdf[0]->wbsdf_eval_pdf(ctx, si, wo, sd, active);
+        } else {
+            Mask front_side = Frame3f::cos_theta(si.wi) > 0.f && active,
+                 back_side  = Frame3f::cos_theta(si.wi) < 0.f && active;
+
+            if (dr::any_or<true>(front_side))
+                std::tie(value, pdf) = m_brdf[0]->wbsdf_eval_pdf(ctx, si, wo, sd, front_side);
+
+            if (dr::any_or<true>(back_side)) {
+                if (ctx.component != (uint32_t) -1)
+                    ctx.component -= (uint32_t) m_brdf[0]->component_count();
+
+                si.wi.z() *= -1.f;
+                wo.z() *= -1.f;
+
+                auto [back_value, back_pdf] =
+                    m_brdf[1]->wbsdf_eval_pdf(ctx, si, wo, sd, back_side);
+
+                dr::masked(value, back_side) = back_value;
+                dr::masked(pdf, back_side) = back_pdf;
+            }
+        }
+
+        return { value, pdf };
+    }
+
     GeneralizedRadiance3f
     wbsdf_weight(const BSDFContext &ctx_,
                  const SurfaceInteraction3f &si_,
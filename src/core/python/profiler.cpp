@@ -0,0 +1,56 @@
+#include <mitsuba/core/profiler.h>
+#include <mitsuba/python/python.h>
+
+#include <memory>
+
+/// Python-side scoped phase, usable as a context manager
+struct PyScopedPhase {
+    ProfilerPhase phase;
+    std::unique_ptr<ScopedPhase> scope;
+};
+
+MI_PY_EXPORT(ProfilerPhase) {
+    nb::enum_<ProfilerPhase>(m, "ProfilerPhase", D(ProfilerPhase))
+        .value("InitScene", ProfilerPhase::InitScene, D(ProfilerPhase, InitScene))
+        .value("LoadGeometry", ProfilerPhase::LoadGeometry, D(ProfilerPhase, LoadGeometry))
+        .value("BitmapRead", ProfilerPhase::BitmapRead, D(ProfilerPhase, BitmapRead))
+        .value("BitmapWrite", ProfilerPhase::BitmapWrite, D(ProfilerPhase, BitmapWrite))
+        .value("InitAccel", ProfilerPhase::InitAccel, D(ProfilerPhase, InitAccel))
+        .value("Render", ProfilerPhase::Render, D(ProfilerPhase, Render))
+        .value("SamplingIntegratorSample", ProfilerPhase::SamplingIntegratorSample, D(ProfilerPhase, SamplingIntegratorSample))
+        .value("PLTSamplePhase", ProfilerPhase::PLTSamplePhase, D(ProfilerPhase, PLTSamplePhase))
+        .value("PLTSolvePhase", ProfilerPhase::PLTSolvePhase, D(ProfilerPhase, PLTSolvePhase))
+        .value("PLTReplayPath", ProfilerPhase::PLTReplayPath, D(ProfilerPhase, PLTReplayPath))
+        .value("SampleEmitter", ProfilerPhase::SampleEmitter, D(ProfilerPhase, SampleEmitter))
+        .value("SampleEmitterRay", ProfilerPhase::SampleEmitterRay, D(ProfilerPhase, SampleEmitterRay))
+        .value("SampleEmitterDirection", ProfilerPhase::SampleEmitterDirection, D(ProfilerPhase, SampleEmitterDirection))
+        .value("RayTest", ProfilerPhase::RayTest, D(ProfilerPhase, RayTest))
+        .value("RayIntersect", ProfilerPhase::RayIntersect, D(ProfilerPhase, RayIntersect))
+        .value("CreateSurfaceInteraction", ProfilerPhase::CreateSurfaceInteraction, D(ProfilerPhase, CreateSurfaceInteraction))
+        .value("ImageBlockPut", ProfilerPhase::ImageBlockPut, D(ProfilerPhase, ImageBlockPut))
+        .value("BSDFEvaluate", ProfilerPhase::BSDFEvaluate, D(ProfilerPhase, BSDFEvaluate))
+        .value("BSDFSample", ProfilerPhase::BSDFSample, D(ProfilerPhase, BSDFSample))
+        .value("PhaseFunctionEvaluate", ProfilerPhase::PhaseFunctionEvaluate, D(ProfilerPhase, PhaseFunctionEvaluate))
+        .value("PhaseFunctionSample", ProfilerPhase::PhaseFunctionSample, D(ProfilerPhase, PhaseFunctionSample))
+        .value("MediumEvaluate", ProfilerPhase::MediumEvaluate, D(ProfilerPhase, MediumEvaluate))
+        .value("MediumSample", ProfilerPhase::MediumSample, D(ProfilerPhase, MediumSample))
+        .value("EndpointEvaluate", ProfilerPhase::EndpointEvaluate, D(ProfilerPhase, EndpointEvaluate))
+        .value("EndpointSampleRay", ProfilerPhase::EndpointSampleRay, D(ProfilerPhase, EndpointSampleRay))
+        .value("EndpointSampleDirection", ProfilerPhase::EndpointSampleDirection, D(ProfilerPhase, EndpointSampleDirection))
+        .value("EndpointSamplePosition", ProfilerPhase::EndpointSamplePosition, D(ProfilerPhase, EndpointSamplePosition))
+        .value("TextureSample", ProfilerPhase::TextureSample, D(ProfilerPhase, TextureSample))
+        .value("TextureEvaluate", ProfilerPhase::TextureEvaluate, D(ProfilerPhase, TextureEvaluate))
+        .value("GratingSampleLobe", ProfilerPhase::GratingSampleLobe, D(ProfilerPhase, GratingSampleLobe))
+        .value("CoherenceUpdate", ProfilerPhase::CoherenceUpdate, D(ProfilerPhase, CoherenceUpdate));
+
+    nb::class_<PyScopedPhase>(m, "ScopedPhase", D(ScopedPhase))
+        .def("__init__", [](PyScopedPhase *self, ProfilerPhase phase) {
+                 new (self) PyScopedPhase{ phase, nullptr };
+             }, "phase"_a)
+        .def("__enter__", [](PyScopedPhase &self) {
+            self.scope = std::make_unique<ScopedPhase>(self.phase);
+        })
+        .def("__exit__", [](PyScopedPhase &self, nb::handle, nb::handle, nb::handle) {
+            self.scope.reset();
+        }, "exc_type"_a.none(), "exc_val"_a.none(), "exc_tb"_a.none());
+}
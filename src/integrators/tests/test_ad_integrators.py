@@ -942,6 +942,48 @@ def test04_render_custom_op(variants_all_ad_rgb):
         mi.util.write_bitmap(filename, error)
         pytest.fail("Gradient values exceeded configuration's tolerances!")
 
+@pytest.mark.parametrize('budget, spp', [(1024, 4), (300, 3), (40, 2)])
+def test05_render_passes(variants_all_ad_rgb, budget, spp):
+    # A constant environment is seen by every pixel: a pixel skipped by the
+    # passes would not have unit radiance
+    scene = mi.load_dict({
+        'type': 'scene',
+        'emitter': { 'type': 'constant' },
+        'sensor': {
+            'type': 'perspective',
+            'film': {
+                'type': 'hdrfilm',
+                'width': 23,
+                'height': 17,
+                'rfilter': { 'type': 'gaussian' }
+            }
+        }
+    })
+
+    integrator = mi.load_dict({
+        'type': 'prb',
+        'wavefront_budget': budget
+    })
+
+    passes = integrator.plan_passes(scene.sensors()[0], spp)
+    assert len(passes) > 1
+    assert all(size[0] * size[1] * n <= budget for _, size, n in passes)
+
+    # Samples traced twice are averaged away by the film weights, so check
+    # that every pixel is sampled exactly spp times by the passes
+    samples = {}
+    for offset, size, n in passes:
+        for y in range(offset[1], offset[1] + size[1]):
+            for x in range(offset[0], offset[0] + size[0]):
+                samples[x, y] = samples.get((x, y), 0) + n
+    assert len(samples) == 23 * 17
+    assert all(n == spp for n in samples.values())
+
+    image = integrator.render(scene, spp=spp)
+    assert dr.allclose(image, 1.0)
+    assert len(integrator.pass_stats) == len(passes)
+    assert sum(s['wavefront_size'] for s in integrator.pass_stats) == 23 * 17 * spp
+
 # -------------------------------------------------------------------
 #                      Generate reference images
 # -------------------------------------------------------------------
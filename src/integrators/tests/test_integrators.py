@@ -23,3 +23,45 @@ def test01_trampoline_id(variants_vec_backends_once_rgb):
 
     params = mi.traverse(scene)
     assert 'my_integrator.depth' in params
+
+
+def render_constant_environment(integrator, spp):
+    # A constant environment is seen by every pixel: a pixel skipped by the
+    # passes would not have unit radiance. Samples traced twice are averaged
+    # away by the film weights, so this does not catch them.
+    scene = mi.load_dict({
+        'type': 'scene',
+        'emitter': { 'type': 'constant' },
+        'sensor': {
+            'type': 'perspective',
+            'film': {
+                'type': 'hdrfilm',
+                'width': 23,
+                'height': 17,
+                'rfilter': { 'type': 'box' }
+            }
+        }
+    })
+
+    return integrator.render(scene, spp=spp)
+
+
+@pytest.mark.parametrize('budget, spp', [(800, 6), (1200, 5), (100, 2)])
+def test02_wavefront_budget(variants_vec_backends_once_rgb, budget, spp):
+    integrator = mi.load_dict({ 'type': 'path', 'wavefront_budget': budget })
+
+    image = render_constant_environment(integrator, spp)
+    assert dr.allclose(image, 1.0)
+
+
+@pytest.mark.parametrize('budget, spp', [(800, 6), (100, 2)])
+def test03_wavefront_budget_stokes(variant_llvm_mono_polarized, budget, spp):
+    # the budget of the outer integrator bounds the samples of the nested one
+    integrator = mi.load_dict({
+        'type': 'stokes',
+        'wavefront_budget': budget,
+        'nested': { 'type': 'path' }
+    })
+
+    image = render_constant_environment(integrator, spp)
+    assert dr.allclose(image[:, :, :6], 1.0)
@@ -12,28 +12,35 @@ MI_PY_EXPORT(BounceData) {
 
     auto it =
         nb::class_<BounceData3f>(m, "BounceData3f", D(BounceData))
-            .def_field(BounceData3f, id, "id")
-            .def_field(BounceData3f, interaction, "interaction")
+            .def_field(BounceData3f, t, "t")
+            .def_field(BounceData3f, time, "time")
+            .def_field(BounceData3f, wavelengths, "wavelengths")
+            .def_field(BounceData3f, p, "p")
+            .def_field(BounceData3f, n, "n")
+            .def_field(BounceData3f, uv, "uv")
+            .def_field(BounceData3f, sh_n, "sh_n")
+            .def_field(BounceData3f, sh_s, "sh_s")
+            .def_field(BounceData3f, dp_du, "dp_du")
+            .def_field(BounceData3f, dp_dv, "dp_dv")
             .def_field(BounceData3f, wi, "wi")
+            .def_field(BounceData3f, shape, "shape")
+            .def_field(BounceData3f, prim_index, "prim_index")
             .def_field(BounceData3f, wo, "wo")
             .def_field(BounceData3f, bsdf_flags, "bsdf_flags")
-            .def_field(BounceData3f, rr_thp, "rr_thp")
-            .def_field(BounceData3f, throughput, "throughput")
-            .def_field(BounceData3f, bsdf_weight, "bsdf_weight")
-            .def_field(BounceData3f, is_emitter, "is_emitter")
             .def_field(BounceData3f, last_nd_pdf, "last_nd_pdf")
             .def_field(BounceData3f, sampled_lobe, "sampled_lobe")
             .def_field(BounceData3f, sampling_wavelengths, "sampling_wavelengths")
             .def_field(BounceData3f, active, "active")
+            .def_prop_ro("interaction", &BounceData3f::interaction, D(BounceData, interaction))
 
             .def(nb::init<>(), "Blank constructor")
-            .def(nb::init<UInt32, SurfaceInteraction3f, Vector3f, Vector3f, UInt32,
-                          Float, Spectrum, Spectrum, Mask, Float, Vector2i, UnpolarizedSpectrum, Mask>(),
-                 "id"_a, "interaction"_a, "wi"_a, "wo"_a, "bsdf_flags"_a,
-                 "rr_thp"_a, "throughput"_a, "bsdf_weight"_a, "is_emitter"_a,
+            .def(nb::init<SurfaceInteraction3f, Vector3f, UInt32,
+                          Float, Vector2i, UnpolarizedSpectrum, Mask>(),
+                 "interaction"_a, "wo"_a, "bsdf_flags"_a,
                  "last_nd_pdf"_a, "sampled_lobe"_a, "sampling_wavelengths"_a, "active"_a, D(BounceData, BounceData));
             // .def_repr(BounceData3f);
 
-    MI_PY_DRJIT_STRUCT(it, BounceData3f, id, interaction, wi, wo, bsdf_flags, 
-        rr_thp, throughput, bsdf_weight, is_emitter, last_nd_pdf, sampled_lobe, sampling_wavelengths, active)
+    MI_PY_DRJIT_STRUCT(it, BounceData3f, t, time, wavelengths, p, n, uv, sh_n, sh_s, 
+        dp_du, dp_dv, wi, shape, prim_index, wo, bsdf_flags, last_nd_pdf, sampled_lobe, 
+        sampling_wavelengths, active)
 }
@@ -3,6 +3,7 @@
 #include <mitsuba/plt/fwd.h>
 #include <mitsuba/python/python.h>
 #include <nanobind/stl/pair.h>
+#include <nanobind/stl/vector.h>
 
 MI_PY_EXPORT(DiffractionGrating) {
 
@@ -20,12 +21,47 @@ MI_PY_EXPORT(DiffractionGrating) {
              D(DiffractionGrating, is_1D_grating))
         .def("alpha", & DiffractionGrating3f::alpha, "wi"_a, "k"_a,
              D(DiffractionGrating, alpha))
-        .def("sample_lobe", &DiffractionGrating3f::sample_lobe, "sample2"_a,
-             "wi"_a, "wl"_a, D(DiffractionGrating, sample_lobe))
-        .def("lobe_pdf", &DiffractionGrating3f::lobe_pdf, "lobe"_a, "wi"_a,
-             "wl"_a, D(DiffractionGrating, sample_lobe))
+        .def("sample_lobe",
+             nb::overload_cast<const Vector2f &, const Vector3f &, const Float>(
+                 &DiffractionGrating3f::sample_lobe),
+             "sample2"_a, "wi"_a, "wl"_a, D(DiffractionGrating, sample_lobe))
+        .def("lobe_pmf",
+             [](DiffractionGrating3f &grating, const Vector3f &wi,
+                const Float wl) {
+                 std::vector<Float> pmf(grating.lobe_pmf_size());
+                 grating.lobe_pmf(wi, wl, pmf.data());
+                 return pmf;
+             },
+             "wi"_a, "wl"_a, D(DiffractionGrating, lobe_pmf))
+        .def("lobe_pmf_size", &DiffractionGrating3f::lobe_pmf_size,
+             D(DiffractionGrating, lobe_pmf_size))
+        .def("lobe_pdf",
+             nb::overload_cast<const Vector2i &, const Vector3f &, const Float>(
+                 &DiffractionGrating3f::lobe_pdf),
+             "lobe"_a, "wi"_a, "wl"_a, D(DiffractionGrating, lobe_pdf))
         .def("diffract", &DiffractionGrating3f::diffract, "wi"_a, "lobe"_a,
              "wl"_a, D(DiffractionGrating, diffract))
-        .def("lobe_intensity", &DiffractionGrating3f::lobe_intensity, "lobe"_a,
-             "wi"_a, "wl"_a, D(DiffractionGrating, lobe_intensity));
-}
\ No newline at end of file
+        .def("lobe_intensity",
+             nb::overload_cast<const Vector2i &, const Vector3f &, const Float>(
+                 &DiffractionGrating3f::lobe_intensity),
+             "lobe"_a, "wi"_a, "wl"_a, D(DiffractionGrating, lobe_intensity));
+
+    nb::class_<DiffractionLobeTable3f>(m, "DiffractionLobeTable3f",
+                                       D(DiffractionLobeTable))
+        .def(nb::init<const ScalarVector2f &, ScalarFloat, uint32_t,
+                      DiffractionGratingType, const ScalarVector2u &,
+                      const ScalarVector2f &>(),
+             "inv_period"_a, "q"_a, "lobes"_a, "type"_a, "resolution"_a,
+             "wl_range"_a, D(DiffractionLobeTable, DiffractionLobeTable))
+        .def("eval",
+             [](const DiffractionLobeTable3f &table, const Vector3f &wi,
+                const Float wl, Mask active) {
+                 Float pmf[diffractionGratingsMaxLobes];
+                 table.eval(wi, wl, pmf, active);
+                 return std::vector<Float>(
+                     pmf, pmf + table.channels());
+             },
+             "wi"_a, "wl"_a, "active"_a = true, D(DiffractionLobeTable, eval))
+        .def("resolution", &DiffractionLobeTable3f::resolution,
+             D(DiffractionLobeTable, resolution));
+}
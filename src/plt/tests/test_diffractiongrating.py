@@ -0,0 +1,175 @@
+import pytest
+import drjit as dr
+import mitsuba as mi
+
+
+def test01_lobe_pdf_normalized(variants_vec_backends_once_rgb):
+    grating = mi.DiffractionGrating3f(0.0, mi.Vector2f(1.0), 0.2, 5,
+                                      mi.DiffractionGratingType.Sinusoidal,
+                                      1, mi.Vector2f(0))
+
+    lx, ly = dr.meshgrid(dr.arange(mi.Int32, -2, 3), dr.arange(mi.Int32, -2, 3))
+    wi = dr.normalize(mi.Vector3f(0.3, 0.1, 1.0))
+    pdf = grating.lobe_pdf(mi.Vector2i(lx, ly), wi, 0.55)
+
+    assert dr.allclose(dr.sum(pdf), 1.0)
+
+
+@pytest.mark.parametrize("lobes", [3, 5, 7])
+def test02_chi2_lobe_sampling(variants_vec_backends_once_rgb, lobes):
+    sample_func, pdf_func = mi.chi2.DiffractionLobeAdapter(
+        inv_period=[1.0, 0.5], q=0.2, wl=0.55, wi=[0.3, 0.1, 0.948683], lobes=lobes)
+
+    domain = mi.chi2.LobeDomain(lobes)
+    chi2 = mi.chi2.ChiSquareTest(
+        domain=domain,
+        sample_func=sample_func,
+        pdf_func=pdf_func,
+        sample_dim=2,
+        res=domain.resolution(),
+        ires=2
+    )
+
+    assert chi2.run()
+
+
+def test03_chi2_lobe_sampling_batch(variants_vec_backends_once_rgb):
+    configs = [
+        (inv_period, q, wl, [0.5, 0.0, 0.866025])
+        for inv_period in [0.4, 2.0]
+        for q in [0.084, 0.3]
+        for wl in [0.45, 0.65]
+    ]
+
+    batch = mi.chi2.LobeChiSquareBatch(configs, lobes=5, sample_count=100000)
+    assert all(batch.run(quiet=True))
+    assert len(batch.p_values) == len(configs)
+
+
+def lobe_table_query(res, wl_range, offset):
+    '''
+    Incident directions and wavelengths of a regular grid over the texels of a
+    ``DiffractionLobeTable3f``, shifted by ``offset`` texels from their centers
+    '''
+    x, y = dr.meshgrid(dr.arange(mi.Float, int(res[0] - offset[0])),
+                       dr.arange(mi.Float, int(res[1] - offset[1])))
+    cos_theta = (x + 0.5 + offset[0]) / res[0]
+    wl = wl_range[0] + (y + 0.5 + offset[1]) / res[1] * (wl_range[1] - wl_range[0])
+    wi = mi.Vector3f(dr.safe_sqrt(1 - dr.square(cos_theta)), 0, cos_theta)
+    return wi, wl
+
+
+@pytest.mark.parametrize("lobes", [3, 7])
+def test04_lobe_table_eval(variants_vec_backends_once_rgb, lobes):
+    res, wl_range = [16, 8], [0.36, 0.83]
+    table = mi.DiffractionLobeTable3f([1.0, 0.5], 0.2, lobes,
+                                      mi.DiffractionGratingType.Sinusoidal,
+                                      res, wl_range)
+    grating = mi.DiffractionGrating3f(0.0, mi.Vector2f(1.0, 0.5), 0.2, lobes,
+                                      mi.DiffractionGratingType.Sinusoidal,
+                                      1, mi.Vector2f(0))
+
+    assert dr.all(table.resolution() == mi.ScalarVector2u(res))
+
+    # texel centers hold the exact distribution
+    wi, wl = lobe_table_query(res, wl_range, [0.0, 0.0])
+    pmf = table.eval(wi, wl)
+    assert len(pmf) == grating.lobe_pmf_size()
+    for p, ref in zip(pmf, grating.lobe_pmf(wi, wl)):
+        assert dr.allclose(p, ref, atol=1e-5)
+
+    # in between, the distribution is interpolated and still normalized
+    wi, wl = lobe_table_query(res, wl_range, [0.5, 0.5])
+    pmf = table.eval(wi, wl)
+    assert dr.allclose(dr.sum(pmf), 1.0)
+    for p, ref in zip(pmf, grating.lobe_pmf(wi, wl)):
+        assert dr.allclose(p, ref, atol=2e-2)
+
+
+@pytest.mark.parametrize("lobes", [3, 5, 7])
+def test05_chi2_lobe_sampling_tabulated(variants_vec_backends_once_rgb, lobes):
+    wi, wl = mi.ScalarVector3f(0.3, 0.1, 0.948683), 0.55
+    bsdf = mi.load_dict({
+        'type': 'roughgrating',
+        'lobe_type': 'sinusoidal',
+        'height': 0.2,
+        'inv_period_x': 1.0,
+        'inv_period_y': 0.5,
+        'lobes': lobes,
+        # (almost) smooth, so that the lobes are sampled around the normal
+        'alpha': 1e-4,
+        'tabulate_lobes': True
+    })
+
+    def sample_func(sample, *args):
+        n = dr.width(sample)
+        si = dr.zeros(mi.SurfaceInteraction3f, n)
+        si.wi = wi
+
+        # in RGB modes, `sample1` picks the sampling wavelength
+        sample1 = dr.full(mi.Float, (wl * 1e3 - mi.MI_CIE_MIN) /
+                          (mi.MI_CIE_MAX - 150 - mi.MI_CIE_MIN), n)
+        sd, _ = bsdf.wbsdf_sample(mi.BSDFContext(), si, sample1,
+                                  dr.full(mi.Point2f, 0.5, n), sample)
+        return mi.Vector2f(sd.diffraction_lobe)
+
+    def pdf_func(p, *args):
+        grating = mi.DiffractionGrating3f(0.0, mi.Vector2f(1.0, 0.5), 0.2, lobes,
+                                          mi.DiffractionGratingType.Sinusoidal,
+                                          1, mi.Vector2f(0))
+        return grating.lobe_pdf(mi.Vector2i(p), mi.Vector3f(wi), wl)
+
+    domain = mi.chi2.LobeDomain(lobes)
+    chi2 = mi.chi2.ChiSquareTest(
+        domain=domain,
+        sample_func=sample_func,
+        pdf_func=pdf_func,
+        sample_dim=2,
+        res=domain.resolution(),
+        ires=2
+    )
+
+    assert chi2.run()
+
+
+@pytest.mark.parametrize("lobe_type", ['sinusoidal', 'linear'])
+def test06_eval_tabulated(variants_vec_backends_once_spectral, lobe_type):
+    def load(tabulate_lobes):
+        return mi.load_dict({
+            'type': 'roughgrating',
+            'lobe_type': lobe_type,
+            'height': 0.2,
+            'inv_period_x': 1.0,
+            'inv_period_y': 0.5,
+            'lobes': 5,
+            'alpha': 0.2,
+            'tabulate_lobes': tabulate_lobes
+        })
+
+    bsdf, tabulated = load(False), load(True)
+
+    # outgoing directions over the upper hemisphere
+    theta, phi = dr.meshgrid(dr.linspace(mi.Float, 0.05, 1.5, 16),
+                             dr.linspace(mi.Float, -dr.pi, dr.pi, 32))
+    st, ct = dr.sincos(theta)
+    sp, cp = dr.sincos(phi)
+    wo = mi.Vector3f(cp * st, sp * st, ct)
+    n = dr.width(wo)
+
+    ctx = mi.BSDFContext()
+    for wi in [[0.0, 0.0, 1.0], [0.3, 0.1, 0.948683], [0.7, -0.2, 0.684836]]:
+        si = dr.zeros(mi.SurfaceInteraction3f, n)
+        si.wi = mi.Vector3f(wi)
+        si.wavelengths = mi.UnpolarizedSpectrum(420, 510, 580, 690)
+
+        sd = mi.PLTSamplePhaseData3f(
+            dr.zeros(mi.BSDFSample3f, n),
+            mi.Vector2i(0),
+            mi.Vector3f(0),
+            mi.Coherence3f(mi.Float(0), mi.Float(0)),
+            si.wavelengths)
+
+        # the lobe intensities are recovered from the interpolated distribution
+        value = mi.unpolarized_spectrum(tabulated.wbsdf_eval(ctx, si, wo, sd).L)
+        ref = mi.unpolarized_spectrum(bsdf.wbsdf_eval(ctx, si, wo, sd).L)
+        assert dr.allclose(value, ref, rtol=5e-2, atol=1e-2)
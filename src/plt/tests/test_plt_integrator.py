@@ -0,0 +1,81 @@
+import pytest
+import drjit as dr
+import mitsuba as mi
+
+
+def create_scene(bsdf):
+    return mi.load_dict({
+        'type': 'scene',
+        'sensor': {
+            'type': 'perspective',
+            'to_world': mi.ScalarTransform4f().look_at(origin=[0, 0, 4],
+                                                       target=[0, 0, 0],
+                                                       up=[0, 1, 0]),
+            'film': {
+                'type': 'hdrfilm',
+                'width': 16,
+                'height': 16,
+                'rfilter': { 'type': 'box' },
+                'pixel_format': 'rgb'
+            },
+            'sampler': { 'type': 'independent', 'sample_count': 4 }
+        },
+        'floor': {
+            'type': 'rectangle',
+            'to_world': mi.ScalarTransform4f().scale(2),
+            'bsdf': bsdf
+        },
+        'light': {
+            'type': 'sphere',
+            'center': [1, 1, 2],
+            'radius': 0.5,
+            'emitter': { 'type': 'area', 'radiance': { 'type': 'rgb', 'value': 5.0 } }
+        },
+        'env': { 'type': 'constant', 'radiance': { 'type': 'rgb', 'value': 0.2 } }
+    })
+
+
+def render(scene, **kwargs):
+    # registers the `plt` integrator
+    from scripts.rendering.integrators import PLTIntegrator
+    mi.register_integrator("plt", lambda props: PLTIntegrator(props))
+
+    integrator = mi.load_dict({ 'type': 'plt', 'max_depth': 4, **kwargs })
+    return integrator.render(scene, seed=0, spp=4)
+
+
+def test01_solve_modes_agree(variants_vec_backends_once_rgb):
+    # the weight of a rough conductor does not depend on the incoming coherence
+    scene = create_scene({ 'type': 'roughconductor', 'alpha': 0.2 })
+
+    replay = render(scene, solve_mode='replay')
+    incremental = render(scene, solve_mode='incremental')
+
+    assert dr.all(dr.isfinite(replay), axis=None)
+    assert dr.max(replay, axis=None) > 0
+    assert dr.allclose(replay, incremental, rtol=1e-3, atol=1e-5)
+
+
+def test02_solve_modes_agree_grating(variants_vec_backends_once_rgb):
+    scene = create_scene({
+        'type': 'roughgrating',
+        'lobe_type': 'sinusoidal',
+        'height': 0.05,
+        'inv_period_x': 0.65,
+        'inv_period_y': 0.65,
+        'lobes': 3,
+        'alpha': 0.1
+    })
+
+    replay = render(scene, solve_mode='replay')
+    incremental = render(scene, solve_mode='incremental')
+
+    assert dr.max(replay, axis=None) > 0
+    assert dr.allclose(replay, incremental, rtol=1e-3, atol=1e-5)
+    # the linear time solve is the default one
+    assert dr.allclose(render(scene), incremental)
+
+
+def test03_solve_mode_unknown(variants_vec_backends_once_rgb):
+    with pytest.raises(Exception, match='unknown solve_mode'):
+        render(create_scene({ 'type': 'diffuse' }), solve_mode='unknown')
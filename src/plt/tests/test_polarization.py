@@ -0,0 +1,25 @@
+import pytest
+import drjit as dr
+import mitsuba as mi
+
+
+def test01_stokes_components(variants_vec_backends_once_rgb):
+    from scripts.utils.polarization import stokes_bitmap, stokes_to_bitmaps
+
+    # output of the stokes integrator: RGB and the 4 stokes components
+    result = mi.TensorXf(dr.arange(mi.Float, 4 * 3 * 15), shape=(4, 3, 15))
+    L, sp = stokes_to_bitmaps(stokes_bitmap(result), result)
+
+    assert dr.all(L.size() == mi.ScalarVector2u(3, 4))
+    assert len(sp) == 4
+    for i, s in enumerate(sp):
+        assert type(s) is mi.TensorXf
+        assert s.shape == (4, 3, 3)
+        assert dr.all(s == result[:, :, 3 * (i + 1) : 3 * (i + 2)], axis=None)
+
+    # replacing a component updates its layer in the bitmap
+    denoised = dr.zeros(mi.TensorXf, (4, 3, 3))
+    sp[2] = denoised
+    assert sp[2] is denoised
+    assert dr.all(mi.TensorXf(sp.bitmap)[:, :, 9:12] == 0, axis=None)
+    assert dr.all(mi.TensorXf(sp.bitmap)[:, :, 6:9] == result[:, :, 6:9], axis=None)
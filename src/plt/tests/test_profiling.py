@@ -0,0 +1,34 @@
+import pytest
+import drjit as dr
+import mitsuba as mi
+
+
+def test01_report(variants_vec_backends_once_rgb):
+    from scripts.utils.profiling import StageProfiler, profile_count
+
+    profiler = StageProfiler(stages=["nee", "emissive"])
+    with profiler:
+        active = dr.arange(mi.UInt32, 10) < 4
+        profile_count("nee", active)
+        profile_count("nee", True)
+        profile_count("emissive", ~active)
+
+    # counted outside of the profiler
+    profile_count("nee", True)
+
+    assert profiler.calls == { "nee" : 2, "emissive" : 1 }
+
+    lines = profiler.report().splitlines()
+    assert lines[1].split() == ["nee", "2", "0.000", "5"]
+    assert lines[2].split() == ["emissive", "1", "0.000", "6"]
+    assert lines[-1].startswith("render time: 0.000 ms, 0 kernels")
+
+
+def test02_report_without_lanes(variants_vec_backends_once_rgb):
+    from scripts.utils.profiling import StageProfiler
+
+    profiler = StageProfiler(stages=["nee"], count_lanes=False)
+    with profiler:
+        profiler.count("nee")
+
+    assert profiler.report().splitlines()[1].split() == ["nee", "1", "0.000", "-"]
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pytest
+import drjit as dr
+import mitsuba as mi
+
+
+def create_session():
+    pytest.importorskip("ttkbootstrap")
+
+    # the GUI imports the modules of `scripts/rendering` as top-level ones
+    root = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'scripts', 'rendering')
+    if root not in sys.path:
+        sys.path.append(root)
+    from gui.controller.renderer import RenderSession
+
+    scene = mi.load_dict({
+        'type': 'scene',
+        'sensor': {
+            'type': 'perspective',
+            'film': { 'type': 'hdrfilm', 'width': 4, 'height': 4 },
+            'sampler': { 'type': 'independent', 'sample_count': 1 }
+        },
+        'sphere': {
+            'type': 'sphere',
+            'bsdf': {
+                'type': 'diffuse',
+                'reflectance': { 'type': 'rgb', 'value': [0.2, 0.3, 0.4] }
+            }
+        }
+    })
+    # the session always renders through the Stokes integrator
+    return RenderSession(scene, "path")
+
+
+def test01_edit_color(variant_llvm_spectral_polarized):
+    session = create_session()
+    key = 'sphere.bsdf.reflectance.value'
+    assert type(session.params[key]) is mi.Color3f
+
+    # as shown by the scene view
+    session.edit(key, repr(mi.Color3f(0.5, 0.25, 0.1)))
+    session.apply_edits()
+
+    assert type(session.params[key]) is mi.Color3f
+    assert dr.allclose(session.params[key], mi.Color3f(0.5, 0.25, 0.1))
+
+
+def test02_edit_invalid(variant_llvm_spectral_polarized):
+    session = create_session()
+
+    with pytest.raises((ValueError, SyntaxError, TypeError)):
+        session.edit('sphere.bsdf.reflectance.value', 'not a value')
+    assert not session.pending
@@ -0,0 +1,48 @@
+import pytest
+import drjit as dr
+import mitsuba as mi
+
+
+def test01_chi2_wbsdf_rough_conductor(variants_vec_backends_once_rgb):
+    xml = """<float name="alpha" value="0.2"/>"""
+    wi = dr.normalize(mi.ScalarVector3f(1.0, 1.0, 1.0))
+    sample_func, pdf_func = mi.chi2.WBSDFAdapter("roughconductor", xml, wi=wi)
+
+    chi2 = mi.chi2.ChiSquareTest(
+        domain=mi.chi2.SphericalDomain(),
+        sample_func=sample_func,
+        pdf_func=pdf_func,
+        sample_dim=5,
+        ires=16
+    )
+
+    assert chi2.run()
+
+
+def test02_chi2_wbsdf_batch(variants_vec_backends_once_spectral):
+    configs = mi.chi2.config_grid(alpha=[0.1, 0.3], theta_i=[0.0, 30.0, 60.0])
+
+    batch = mi.chi2.WBSDFChiSquareBatch({'type': 'roughconductor'}, configs,
+                                        sample_count=100000, ires=8)
+    assert all(batch.run(quiet=True))
+    assert len(batch.p_values) == len(configs)
+    assert len(batch.times) == len(configs)
+    assert [row['alpha'] for row in batch.results] == [0.1, 0.1, 0.1, 0.3, 0.3, 0.3]
+
+    # the wBSDF pdf of gratings is not a directional density, so their
+    # microfacet normals and their lobes are tested separately
+    grating = {
+        'type': 'roughgrating',
+        'height': 0.2,
+        'inv_period_x': 1.0,
+        'inv_period_y': 0.5
+    }
+    configs = mi.chi2.config_grid(alpha=[0.1, 0.3],
+                                  lobe_type=['rectangular', 'linear', 'sinusoidal'],
+                                  lobes=[3, 5], theta_i=[0.0, 30.0, 60.0])
+
+    for component in ['microfacet', 'lobes']:
+        batch = mi.chi2.WBSDFChiSquareBatch(grating, configs, sample_count=100000,
+                                            ires=8, component=component)
+        assert all(batch.run(quiet=True))
+        assert len(batch.p_values) == len(configs)
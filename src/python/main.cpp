@@ -31,6 +31,7 @@ MI_PY_DECLARE(DummyStream);
 MI_PY_DECLARE(FileStream);
 MI_PY_DECLARE(MemoryStream);
 MI_PY_DECLARE(ZStream);
+MI_PY_DECLARE(ProfilerPhase);
 MI_PY_DECLARE(ProgressReporter);
 MI_PY_DECLARE(rfilter);
 MI_PY_DECLARE(Thread);
@@ -160,6 +161,7 @@ NB_MODULE(mitsuba_ext, m) {
     MI_PY_IMPORT(FileStream);
     MI_PY_IMPORT(MemoryStream);
     MI_PY_IMPORT(ZStream);
+    MI_PY_IMPORT(ProfilerPhase);
     MI_PY_IMPORT(ProgressReporter);
     MI_PY_IMPORT(Thread);
     MI_PY_IMPORT(Timer);
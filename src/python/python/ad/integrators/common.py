@@ -3,6 +3,37 @@ from __future__ import annotations as __annotations__ # Delayed parsing of type
 import mitsuba as mi
 import drjit as dr
 import gc
+import time
+
+
+def _reset_peak_memory():
+    '''Reset the peak resident memory of the process (Linux only)'''
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _peak_memory() -> int:
+    '''
+    Peak resident memory of the process in bytes, since the last call to
+    ``_reset_peak_memory()`` when supported. On the LLVM backend, this
+    includes the memory of all Dr.Jit arrays.
+    '''
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return 0
 
 
 class ADIntegrator(mi.CppADIntegrator):
@@ -23,6 +54,14 @@ class ADIntegrator(mi.CppADIntegrator):
          the *russian roulette* path termination criterion. For example, if set to
          1, then path generation many randomly cease after encountering directly
          visible surfaces. (Default: 5)
+     * - wavefront_budget
+       - |int|
+       - Maximum number of Monte Carlo samples launched at once by the primal
+         rendering step. Larger renders are split into passes over batches of
+         samples per pixel and, if needed, tiles of the film, which are all
+         accumulated into a single image block. This bounds the memory used by
+         the wavefront (e.g. the path state of every lane). The value 0
+         renders everything in a single pass. (Default: 0)
     """
 
     def __init__(self, props):
@@ -39,6 +78,13 @@ class ADIntegrator(mi.CppADIntegrator):
         if self.rr_depth <= 0:
             raise Exception("\"rr_depth\" must be set to a value greater than zero!")
 
+        self.wavefront_budget = props.get('wavefront_budget', 0)
+        if self.wavefront_budget < 0:
+            raise Exception("\"wavefront_budget\" must be set to a value >= 0!")
+
+        # Statistics of the passes of the last primal render (see `render_passes`)
+        self.pass_stats = []
+
     def to_string(self):
         return f'{type(self).__name__}[max_depth = {self.max_depth},' \
                f' rr_depth = { self.rr_depth }]'
@@ -59,6 +105,11 @@ class ADIntegrator(mi.CppADIntegrator):
 
         film = sensor.film()
 
+        # Split large renders into several passes to bound memory usage
+        passes = self.plan_passes(sensor, spp)
+        if len(passes) > 1:
+            return self.render_passes(scene, sensor, seed, passes)
+
         # Disable derivatives in all of the following
         with dr.suspend_grad():
             # Prepare the film and sample generator for rendering
@@ -109,6 +160,148 @@ class ADIntegrator(mi.CppADIntegrator):
 
             return film.develop()
 
+    def plan_passes(self,
+                    sensor: mi.Sensor,
+                    spp: int = 0) -> List[Tuple[mi.ScalarVector2u, mi.ScalarVector2u, int]]:
+        """
+        Split the primal rendering step into passes whose wavefront fits in
+        ``wavefront_budget``.
+
+        Passes first render batches of samples per pixel over the whole film.
+        When even a single sample per pixel exceeds the budget, the film is
+        also split into square tiles.
+
+        Returns a list of ``(tile_offset, tile_size, spp)`` tuples, where the
+        tile is given in the sampled region of the film (including the border,
+        if sampled).
+        """
+
+        film = sensor.film()
+        film_size = mi.ScalarVector2u(film.crop_size())
+        if film.sample_border():
+            film_size += 2 * film.rfilter().border_size()
+
+        sampler = sensor.sampler().clone()
+        if spp != 0:
+            sampler.set_sample_count(spp)
+        spp = sampler.sample_count()
+
+        pixels = film_size[0] * film_size[1]
+        budget = self.wavefront_budget
+        if budget == 0 or pixels * spp <= budget:
+            return [(mi.ScalarVector2u(0), film_size, spp)]
+
+        # Batches of samples per pixel
+        spp_pass = max(1, min(spp, budget // pixels))
+        spp_passes = [spp_pass] * (spp // spp_pass)
+        if spp % spp_pass != 0:
+            spp_passes.append(spp % spp_pass)
+
+        # Tiles of the film
+        tile = max(1, int(budget ** 0.5)) if pixels > budget else max(film_size)
+        tiles = []
+        for y in range(0, film_size[1], tile):
+            for x in range(0, film_size[0], tile):
+                tiles.append((mi.ScalarVector2u(x, y),
+                              mi.ScalarVector2u(min(tile, film_size[0] - x),
+                                                min(tile, film_size[1] - y))))
+
+        return [(offset, size, n) for n in spp_passes for offset, size in tiles]
+
+    def render_passes(self: mi.SamplingIntegrator,
+                      scene: mi.Scene,
+                      sensor: mi.Sensor,
+                      seed: mi.UInt32,
+                      passes: List[Tuple[mi.ScalarVector2u, mi.ScalarVector2u, int]]) -> mi.TensorXf:
+        """
+        Primal rendering step split into several passes (see ``plan_passes``).
+
+        Every pass is evaluated before the next one is traced, and accumulated
+        into a single image block. The size, time and peak memory of each pass
+        are stored in ``pass_stats``.
+        """
+
+        film = sensor.film()
+        self.pass_stats = []
+
+        with dr.suspend_grad():
+            film.prepare(self.aov_names())
+
+            # Prepare an ImageBlock as specified by the film
+            block = film.create_block()
+
+            # Only use the coalescing feature when rendering enough samples
+            block.set_coalesce(block.coalesce() and min(p[2] for p in passes) >= 4)
+
+            for i, (tile_offset, tile_size, spp) in enumerate(passes):
+                _reset_peak_memory()
+                start = time.perf_counter()
+
+                sampler = sensor.sampler().clone()
+                sampler.set_sample_count(spp)
+                spp = sampler.sample_count()
+                sampler.set_samples_per_wavefront(spp)
+
+                # Decorrelate the samples of each pass
+                wavefront_size = tile_size[0] * tile_size[1] * spp
+                sampler.seed(mi.sample_tea_32(mi.UInt32(seed), mi.UInt32(i))[0],
+                             wavefront_size)
+
+                # Generate a set of rays starting at the sensor, within the tile
+                ray, weight, pos = self.sample_rays(scene, sensor, sampler,
+                                                    tile_offset, tile_size)
+
+                # Launch the Monte Carlo sampling process in primal mode
+                L, valid, aovs, _ = self.sample(
+                    mode=dr.ADMode.Primal,
+                    scene=scene,
+                    sampler=sampler,
+                    ray=ray,
+                    depth=mi.UInt32(0),
+                    δL=None,
+                    δaovs=None,
+                    state_in=None,
+                    active=mi.Bool(True)
+                )
+
+                # Accumulate into the image block
+                ADIntegrator._splat_to_block(
+                    block, film, pos,
+                    value=L * weight,
+                    weight=1.0,
+                    alpha=dr.select(valid, mi.Float(1), mi.Float(0)),
+                    aovs=aovs,
+                    wavelengths=ray.wavelengths
+                )
+
+                # Explicitly delete any remaining unused variables
+                del sampler, ray, weight, pos, L, valid, aovs
+
+                # Render this pass before tracing the next one
+                dr.eval(block.tensor())
+                dr.sync_thread()
+
+                stats = {
+                    'tile_offset': (int(tile_offset[0]), int(tile_offset[1])),
+                    'tile_size': (int(tile_size[0]), int(tile_size[1])),
+                    'spp': int(spp),
+                    'wavefront_size': int(wavefront_size),
+                    'time': time.perf_counter() - start,
+                    'peak_memory': _peak_memory()
+                }
+                self.pass_stats.append(stats)
+
+                mi.Log(mi.LogLevel.Info,
+                       f"Pass {i + 1}/{len(passes)}: tile {stats['tile_offset']} "
+                       f"{stats['tile_size']}, {stats['spp']} spp, "
+                       f"{stats['wavefront_size']} samples, peak memory "
+                       f"{stats['peak_memory'] / 2**20:.1f} MiB")
+
+            # Perform the weight division and return an image tensor
+            film.put_block(block)
+
+            return film.develop()
+
     def render_forward(self: mi.SamplingIntegrator,
                        scene: mi.Scene,
                        params: Any,
@@ -233,10 +426,16 @@ class ADIntegrator(mi.CppADIntegrator):
         scene: mi.Scene,
         sensor: mi.Sensor,
         sampler: mi.Sampler,
+        tile_offset: Optional[mi.ScalarVector2u] = None,
+        tile_size: Optional[mi.ScalarVector2u] = None
     ) -> Tuple[mi.RayDifferential3f, mi.Spectrum, mi.Vector2f, mi.Float]:
         """
         Sample a 2D grid of primary rays for a given sensor
 
+        If ``tile_offset`` and ``tile_size`` are given, only the pixels of that
+        tile of the sampled region of the film (including the border, if
+        sampled) are considered.
+
         Returns a tuple containing
 
         - the set of sampled rays
@@ -253,10 +452,13 @@ class ADIntegrator(mi.CppADIntegrator):
         if film.sample_border():
             film_size += 2 * border_size
 
+        if tile_size is None:
+            tile_offset, tile_size = mi.ScalarVector2u(0), film_size
+
         spp = sampler.sample_count()
 
         # Compute discrete sample position
-        idx = dr.arange(mi.UInt32, dr.prod(film_size) * spp)
+        idx = dr.arange(mi.UInt32, dr.prod(tile_size) * spp)
 
         # Try to avoid a division by an unknown constant if we can help it
         log_spp = dr.log2i(spp)
@@ -267,8 +469,9 @@ class ADIntegrator(mi.CppADIntegrator):
 
         # Compute the position on the image plane
         pos = mi.Vector2i()
-        pos.y = idx // film_size[0]
-        pos.x = dr.fma(mi.UInt32(mi.Int32(-film_size[0])), pos.y, idx)
+        pos.y = idx // tile_size[0]
+        pos.x = dr.fma(mi.UInt32(mi.Int32(-tile_size[0])), pos.y, idx)
+        pos += mi.Vector2i(tile_offset)
 
         if film.sample_border():
             pos -= border_size
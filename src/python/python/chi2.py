@@ -115,7 +115,11 @@ class ChiSquareTest:
         # does not produce a sufficiently statistically independent set of streams
         rng = mi.PCG32(initstate=v0, initseq=v1)
 
-        samples_in = getattr(mi, 'Vector%if' % self.sample_dim)()
+        # Mitsuba only binds vectors of up to 4 dimensions
+        if self.sample_dim <= 4:
+            samples_in = getattr(mi, 'Vector%if' % self.sample_dim)()
+        else:
+            samples_in = dr.zeros(mi.ArrayXf, (self.sample_dim, self.sample_count))
         for i in range(self.sample_dim):
             samples_in[i] = rng.next_float32() if mi.Float is mi.Float32 \
                 else rng.next_float64()
@@ -437,6 +441,36 @@ class SphericalDomain:
         return mi.Vector2f(dr.atan2(p.y, p.x), -p.z)
 
 
+class LobeDomain:
+    '''
+    Discrete domain of the diffraction lobes :math:`(l_x, l_y)` of a grating.
+
+    Each lobe covers a unit cell centered at its integer coordinates, so a
+    ``ChiSquareTest`` with ``res=domain.resolution()`` has one histogram cell
+    per lobe, and integrating a piecewise constant probability mass function
+    over each cell yields the probability of its lobe.
+    '''
+
+    def __init__(self, lobes=5):
+        self.half = lobes // 2
+
+    def resolution(self):
+        return 2 * self.half + 1
+
+    def bounds(self):
+        h = self.half + 0.5
+        return mi.ScalarBoundingBox2f([-h, -h], [h, h])
+
+    def aspect(self):
+        return 1
+
+    def map_forward(self, p):
+        return dr.round(p)
+
+    def map_backward(self, p):
+        return p
+
+
 # --------------------------------------
 #                Adapters
 # --------------------------------------
@@ -645,6 +679,664 @@ def PhaseFunctionAdapter(phase_type, extra, wi=[0, 0, 1], ctx=None):
     return sample_functor, pdf_functor
 
 
+def DiffractionLobeAdapter(inv_period, q, wl, wi=[0, 0, 1], lobes=5,
+                           grating_type=None, angle=0.0):
+    """
+    Adapter to test the lobe sampling of diffraction gratings using the Chi^2
+    test, over a ``LobeDomain``.
+
+    Parameter ``inv_period`` (array(2,)):
+        Inverse period of the grating, in um^(-1).
+
+    Parameter ``q`` (float):
+        Height of the grating, in um.
+
+    Parameter ``wl`` (float):
+        Sampling wavelength, in um.
+
+    Parameter ``wi`` (array(3,)):
+        Incoming direction, in local coordinates.
+    """
+
+    if grating_type is None:
+        grating_type = mi.DiffractionGratingType.Sinusoidal
+
+    def instantiate():
+        return mi.DiffractionGrating3f(angle, mi.Vector2f(inv_period), q, lobes,
+                                       grating_type, 1, mi.Vector2f(0))
+
+    def sample_functor(sample, *args):
+        lobe, _ = instantiate().sample_lobe(sample, mi.Vector3f(wi), wl)
+        return mi.Vector2f(lobe)
+
+    def pdf_functor(p, *args):
+        return instantiate().lobe_pdf(mi.Vector2i(p), mi.Vector3f(wi), wl)
+
+    return sample_functor, pdf_functor
+
+
+def _wbsdf_query(n, wi, uv, wavelength):
+    '''
+    Surface interaction and phase data of a wBSDF query, with the given
+    incident direction and (per-lane) wavelength, in nm
+    '''
+    si = dr.zeros(mi.SurfaceInteraction3f, n)
+    si.wi = wi
+    si.uv = uv
+
+    wavelengths = mi.UnpolarizedSpectrum(wavelength)
+    if mi.is_spectral:
+        si.wavelengths = wavelengths
+
+    sd = mi.PLTSamplePhaseData3f(
+        dr.zeros(mi.BSDFSample3f, n),
+        mi.Vector2i(0),
+        mi.Vector3f(0),
+        mi.Coherence3f(mi.Float(0), mi.Float(0)),
+        wavelengths)
+    return si, sd
+
+
+def WBSDFAdapter(bsdf_type, extra, wi=[0, 0, 1], uv=[0.5, 0.5],
+                 wavelength=550.0, ctx=None):
+    """
+    Adapter to test the sampling of the wave BSDF interface (``wbsdf_sample``
+    and ``wbsdf_pdf``) using the Chi^2 test. The sampling function consumes
+    5 random dimensions (``sample_dim=5``): ``sample1``, ``sample2`` and
+    ``lobe_sample2``.
+
+    Parameter ``bsdf_type`` (string):
+        Name of the BSDF plugin to instantiate.
+
+    Parameter ``extra`` (string|dict):
+        Additional XML used to specify the BSDF's parameters, or a Python
+        dictionary as used by the ``load_dict`` routine.
+
+    Parameter ``wi`` (array(3,)):
+        Incoming direction, in local coordinates.
+
+    Parameter ``wavelength`` (float):
+        Wavelength of the queries, in nm. It is used by all the channels of
+        the spectrum, and as the sampling wavelength of the phase data.
+    """
+
+    if ctx is None:
+        ctx = mi.BSDFContext()
+
+    def instantiate(args):
+        if isinstance(extra, dict):
+            assert extra['type'] == bsdf_type
+            return mi.load_dict(extra)
+        else:
+            xml = """<bsdf version="3.0.0" type="%s">
+                %s
+            </bsdf>""" % (bsdf_type, extra)
+            return mi.load_string(xml % args)
+
+    def sample_functor(sample, *args):
+        n = dr.width(sample)
+        plugin = instantiate(args)
+        si, _ = _wbsdf_query(n, wi, uv, wavelength)
+        sd, weight = plugin.wbsdf_sample(ctx, si, sample[0],
+                                         mi.Vector2f(sample[1], sample[2]),
+                                         mi.Vector2f(sample[3], sample[4]))
+
+        w = dr.full(mi.Float, 1.0, n)
+        w[dr.all(mi.unpolarized_spectrum(weight.L) == 0)] = 0
+        return sd.bsdf_sample.wo, w
+
+    def pdf_functor(wo, *args):
+        n = dr.width(wo)
+        plugin = instantiate(args)
+        si, sd = _wbsdf_query(n, wi, uv, wavelength)
+        return plugin.wbsdf_pdf(ctx, si, wo, sd)
+
+    return sample_functor, pdf_functor
+
+
+def _batch_row_test(domain, res, ires, histogram, pdf, k, sample_count,
+                    start, end):
+    '''
+    Set up the ``ChiSquareTest`` of the ``k``-th configuration of a batch, from
+    tables with the histograms (and expected frequencies) of all
+    configurations, one row after the other.
+    '''
+    chi2 = ChiSquareTest(domain, None, None, sample_count=sample_count,
+                         res=res, ires=ires)
+    cells = chi2.res.x * chi2.res.y
+
+    index = dr.arange(mi.UInt32, cells) + k * cells
+    chi2.histogram = dr.gather(mi.Float, histogram, index)
+    chi2.pdf = dr.gather(mi.Float, pdf, index)
+    chi2.histogram_sum = dr.sum(chi2.histogram) / sample_count
+    chi2.pdf_sum = dr.sum(chi2.pdf) / sample_count
+    chi2.pdf_start, chi2.pdf_end = start, end
+    chi2.histogram_start, chi2.histogram_end = start, end
+
+    if chi2.histogram_sum[0] > 1.1:
+        chi2._log('Sample weights add up to a value greater '
+                  'than 1.0: %f' % chi2.histogram_sum[0])
+        chi2.fail = True
+
+    if chi2.pdf_sum[0] > 1.1:
+        chi2._log('Failure: PDF integrates to a value greater '
+                  'than 1.0: %f' % chi2.pdf_sum[0])
+        chi2.fail = True
+
+    return chi2
+
+
+class LobeChiSquareBatch:
+    """
+    Runs the Chi^2 test of the lobe sampling of diffraction gratings for a
+    batch of configurations at once.
+
+    The histograms of all configurations are tabulated in a single kernel
+    (one ``dr.scatter_reduce`` into a table with one row per configuration),
+    and so are their expected frequencies. Every row is then checked with
+    ``ChiSquareTest.run()``, correcting the significance level for the amount
+    of configurations.
+
+    Parameter ``configs`` (list):
+        Configurations to test, as ``(inv_period, q, wl, wi)`` tuples (see
+        ``DiffractionLobeAdapter``).
+
+    Parameter ``lobes`` (int):
+        Number of lobes of the gratings. The default value is ``5``.
+
+    Parameter ``sample_count`` (int):
+        Number of samples generated for each configuration. The default value
+        is ``1000000``.
+
+    Parameter ``seed`` (int):
+        Seed value for the PCG32 random number generator. The default value is
+        ``0``.
+
+    Parameters ``grating_type`` and ``angle`` are shared by all the
+    configurations (see ``DiffractionLobeAdapter``).
+
+    The results of ``run()`` are also stored in the ``p_values`` and
+    ``messages`` attributes (one entry per configuration).
+    """
+
+    def __init__(self, configs, lobes=5, sample_count=1000000, seed=0,
+                 grating_type=None, angle=0.0):
+        self.configs = list(configs)
+        self.lobes = lobes
+        self.sample_count = sample_count
+        self.seed = seed
+        self.grating_type = grating_type if grating_type is not None \
+            else mi.DiffractionGratingType.Sinusoidal
+        self.angle = angle
+        self.domain = LobeDomain(lobes)
+        self.histogram = None
+        self.pdf = None
+        self.p_values = []
+        self.messages = []
+
+    def _instantiate(self, config):
+        '''Gather the grating, wavelength and direction of each lane'''
+        def table(values):
+            return dr.gather(mi.Float, mi.Float(values), config)
+
+        inv_period = [(c[0], c[0]) if isinstance(c[0], (int, float)) else c[0]
+                      for c in self.configs]
+        grating = mi.DiffractionGrating3f(
+            self.angle,
+            mi.Vector2f(table([v[0] for v in inv_period]),
+                        table([v[1] for v in inv_period])),
+            table([c[1] for c in self.configs]),
+            self.lobes, self.grating_type, 1, mi.Vector2f(0))
+        wl = table([c[2] for c in self.configs])
+        wi = mi.Vector3f(*[table([c[3][i] for c in self.configs]) for i in range(3)])
+        return grating, wl, wi
+
+    def tabulate(self):
+        '''Tabulate the histograms and expected frequencies of all configurations'''
+        self.start = time.time()
+        res = self.domain.resolution()
+        cells = res * res
+        n = len(self.configs)
+
+        # Sample lobes for all configurations, in as few launches as the
+        # 32-bit sample indices allow
+        per_launch = max(1, (2**32 - 1) // self.sample_count)
+        self.histogram = dr.zeros(mi.Float, n * cells)
+
+        for first in range(0, n, per_launch):
+            count = min(per_launch, n - first)
+            idx = dr.arange(mi.UInt32, count * self.sample_count)
+            v0, v1 = mi.sample_tea_32(idx, self.seed + first)
+            rng = mi.PCG32(initstate=v0, initseq=v1)
+            sample = mi.Vector2f(rng.next_float32(), rng.next_float32())
+
+            config = idx // self.sample_count + first
+            grating, wl, wi = self._instantiate(config)
+            lobe, _ = grating.sample_lobe(sample, wi, wl)
+
+            lobe += self.domain.half
+            in_domain = dr.all((lobe >= 0) & (lobe < res))
+            cell = mi.UInt32(lobe.x) + mi.UInt32(lobe.y) * res
+
+            dr.scatter_reduce(dr.ReduceOp.Add, self.histogram, mi.Float(1.0),
+                              config * cells + cell, in_domain)
+            dr.eval(self.histogram)
+
+        # Expected frequency of each lobe
+        idx = dr.arange(mi.UInt32, n * cells)
+        config = idx // cells
+        cell = idx - config * cells
+        lobe = mi.Vector2i(cell % res, cell // res) - self.domain.half
+        grating, wl, wi = self._instantiate(config)
+        self.pdf = grating.lobe_pdf(lobe, wi, wl) * self.sample_count
+
+        dr.eval(self.histogram, self.pdf)
+        self.end = time.time()
+
+    def run(self, significance_level=0.01, quiet=False):
+        """
+        Run the Chi^2 test of every configuration
+
+        Returns → list(bool):
+            For each configuration, ``True`` upon success, ``False`` if the
+            null hypothesis was rejected.
+        """
+        if self.histogram is None or self.pdf is None:
+            self.tabulate()
+
+        results, self.p_values, self.messages = [], [], []
+        for k, config in enumerate(self.configs):
+            chi2 = _batch_row_test(self.domain, self.domain.resolution(), 4,
+                                   self.histogram, self.pdf, k,
+                                   self.sample_count, self.start, self.end)
+
+            chi2._log('Configuration %i: inv_period = %s, q = %s, wl = %s, wi = %s'
+                      % (k, *[str(c) for c in config]))
+            results.append(chi2.run(significance_level, len(self.configs), quiet=True))
+            self.p_values.append(chi2.p_value)
+            self.messages.append(chi2.messages)
+
+            if not quiet and not results[-1]:
+                print(chi2.messages)
+
+        if not quiet:
+            print('Tested %i configurations (%i samples each, %.2f ms): %i rejected'
+                  % (len(self.configs), self.sample_count,
+                     (self.end - self.start) * 1000, results.count(False)))
+        return results
+
+
+def config_grid(**values):
+    '''
+    Expand lists of values of named parameters into all their combinations,
+    e.g. ``config_grid(alpha=[0.1, 0.2], theta_i=[0, 45])`` yields 4
+    configurations for ``WBSDFChiSquareBatch``.
+    '''
+    import itertools
+    names = list(values.keys())
+    return [dict(zip(names, point))
+            for point in itertools.product(*values.values())]
+
+
+class WBSDFChiSquareBatch:
+    """
+    Runs the Chi^2 test of the wave BSDF interface (see ``WBSDFAdapter``) for
+    a batch of configurations at once.
+
+    Every configuration instantiates its own plugin, and the lanes of all
+    configurations are dispatched to their plugin through a ``BSDFPtr`` array,
+    so that the histograms (and the expected frequencies) of the whole batch
+    are tabulated in a single kernel per launch.
+
+    Parameter ``bsdf`` (dict):
+        Dictionary of the BSDF, as used by the ``load_dict`` routine, shared
+        by all the configurations.
+
+    Parameter ``configs`` (list):
+        Configurations to test, as dictionaries (see ``config_grid``). The
+        entries ``theta_i`` and ``phi_i`` (incident direction, in degrees) and
+        ``wavelength`` (in nm) are set per lane. Every other entry overrides a
+        parameter of the BSDF dictionary (e.g. ``alpha``, ``lobe_type`` or
+        ``lobes``).
+
+    Parameter ``wavelength`` (float):
+        Wavelength of the configurations that don't specify it, in nm. The
+        default value is ``550``.
+
+    Parameter ``sample_count`` (int):
+        Number of samples generated for each configuration. The default value
+        is ``1000000``.
+
+    Parameters ``res``, ``ires`` and ``seed`` are those of ``ChiSquareTest``.
+
+    Parameter ``component`` (string):
+        Part of ``wbsdf_sample`` that is tested. By default (``None``), the
+        outgoing directions are tested against the density of ``wbsdf_pdf``.
+        Diffraction gratings such as ``roughgrating`` sample a microfacet
+        normal and then a diffraction lobe around its reflection direction,
+        and their ``wbsdf_pdf`` is not a density over the outgoing
+        directions, so each part is tested on its own:
+
+        - ``'microfacet'``: the reflection direction of the sampled microfacet
+          normal (``sd.internal_frame``) against the density of ``pdf()``.
+        - ``'lobes'``: the sampled diffraction lobes, over a ``LobeDomain``,
+          against the lobe distribution of the grating (see
+          ``DiffractionLobeAdapter``) given the microfacet normal of each
+          sample. The configurations must set the parameters that the lobe
+          distribution depends on (``height``, ``inv_period_x`` and
+          ``inv_period_y`` or ``inv_period``, ``lobes`` and ``lobe_type``),
+          and a spectral variant is required, where the sampling wavelength
+          is that of the configuration.
+
+    The results of ``run()`` are also stored in the ``p_values``,
+    ``messages`` and ``times`` attributes (one entry per configuration), and
+    in ``results``, as a table with one row per configuration. The histograms
+    of all configurations are tabulated together, so ``times`` holds the
+    amortized time of each configuration: an equal share of the tabulation,
+    plus the check of its row.
+    """
+
+    # Parameters of a configuration that are set per lane, and their defaults
+    LANE_PARAMETERS = ('theta_i', 'phi_i', 'wavelength')
+
+    def __init__(self, bsdf, configs, wavelength=550.0, sample_count=1000000,
+                 res=101, ires=4, seed=0, uv=[0.5, 0.5], ctx=None,
+                 component=None):
+        assert component in (None, 'microfacet', 'lobes')
+        assert component != 'lobes' or mi.is_spectral, \
+            "The lobe test requires a spectral variant!"
+        self.bsdf = bsdf
+        self.configs = list(configs)
+        self.wavelength = wavelength
+        self.sample_count = sample_count
+        self.ires = ires
+        self.seed = seed
+        self.uv = uv
+        self.ctx = ctx if ctx is not None else mi.BSDFContext()
+        self.component = component
+        self.histogram = None
+        self.pdf = None
+        self.p_values = []
+        self.messages = []
+        self.times = []
+        self.results = []
+
+        # Instantiate the plugin of every configuration (shared by the
+        # configurations that only differ in their per-lane parameters)
+        plugins, keys, self.instance, self.props = [], {}, [], []
+        for config in self.configs:
+            props = dict(bsdf)
+            props.update({name: value for name, value in config.items()
+                          if name not in WBSDFChiSquareBatch.LANE_PARAMETERS})
+            self.props.append(props)
+            key = repr(sorted(props.items(), key=lambda t: t[0]))
+            if key not in keys:
+                keys[key] = len(plugins)
+                plugins.append(mi.load_dict(props))
+            self.instance.append(keys[key])
+        self.plugins = mi.BSDFPtr(plugins)
+
+        if component == 'lobes':
+            self.gratings = [self._grating_parameters(p) for p in self.props]
+            self.domain = LobeDomain(max(g[2] for g in self.gratings))
+            res = self.domain.resolution()
+        else:
+            self.domain = SphericalDomain()
+        self.res_arg = res
+        self.res = ChiSquareTest(self.domain, None, None, res=res).res
+
+    def _instantiate(self, config):
+        '''Gather the plugin, incident direction and wavelength of each lane'''
+        def table(name, default):
+            values = [c.get(name, default) for c in self.configs]
+            return dr.gather(mi.Float, mi.Float(values), config)
+
+        bsdf = dr.gather(mi.BSDFPtr, self.plugins,
+                         dr.gather(mi.UInt32, mi.UInt32(self.instance), config))
+
+        theta_i = dr.deg2rad(table('theta_i', 0.0))
+        phi_i = dr.deg2rad(table('phi_i', 0.0))
+        sin_theta, cos_theta = dr.sincos(theta_i)
+        sin_phi, cos_phi = dr.sincos(phi_i)
+        wi = mi.Vector3f(cos_phi * sin_theta, sin_phi * sin_theta, cos_theta)
+
+        return bsdf, wi, table('wavelength', self.wavelength)
+
+    @staticmethod
+    def _grating_parameters(props):
+        '''
+        Height, inverse period, lobe count and type of the grating of a
+        configuration, which its lobe distribution depends on
+        '''
+        for name in ('height', 'lobes', 'lobe_type'):
+            assert name in props, \
+                "The lobe test requires the grating parameter '%s'!" % name
+        inv_period = props.get('inv_period')
+        inv_period = (props.get('inv_period_x', inv_period),
+                      props.get('inv_period_y', inv_period))
+        assert None not in inv_period, \
+            "The lobe test requires the grating parameter 'inv_period'!"
+        return props['height'], inv_period, props['lobes'], props['lobe_type']
+
+    def _accumulate_lobe_pdf(self, config, wi, wl, sd):
+        '''
+        Add the lobe distribution of the grating of each lane, given its
+        sampled microfacet normal, to the expected frequencies
+        '''
+        res = self.domain.resolution()
+        cells = res * res
+
+        def table(values):
+            return dr.gather(mi.Float, mi.Float(values), config)
+
+        # Incident direction in the frame of the microfacet normal
+        m = dr.normalize(wi + sd.internal_frame.n)
+        wi_m = mi.Frame3f(m).to_local(wi)
+        q = table([g[0] for g in self.gratings])
+        inv_period = mi.Vector2f(table([g[1][0] for g in self.gratings]),
+                                 table([g[1][1] for g in self.gratings]))
+
+        # The lobe count and type of the gratings are scalar parameters
+        for lobes, lobe_type in sorted(set(g[2:] for g in self.gratings)):
+            in_group = [g[2:] == (lobes, lobe_type) for g in self.gratings]
+            active = dr.gather(mi.Bool, mi.Bool(in_group), config)
+
+            grating = mi.DiffractionGrating3f(
+                0.0, inv_period, q, lobes,
+                getattr(mi.DiffractionGratingType, lobe_type.capitalize()),
+                1.0, mi.Vector2f(0))
+            pmf = grating.lobe_pmf(wi_m, wl * 1e-3)
+
+            # Lobes l and -l share the probability of entry l (see lobe_pdf())
+            half = lobes // 2
+            pdf = [pmf[abs(l)] if l == 0 else pmf[abs(l)] / 2
+                   for l in range(-half, half + 1)]
+            for y in range(-half, half + 1):
+                for x in range(-half, half + 1):
+                    cell = (x + self.domain.half) + (y + self.domain.half) * res
+                    dr.scatter_reduce(dr.ReduceOp.Add, self.pdf,
+                                      pdf[x + half] * pdf[y + half],
+                                      config * cells + cell, active)
+
+    def tabulate_histogram(self):
+        '''
+        Sample outgoing directions (or the tested component) for all
+        configurations
+        '''
+        res = self.res
+        cells = res.x * res.y
+        n = len(self.configs)
+        bounds = self.domain.bounds()
+
+        per_launch = max(1, (2**32 - 1) // self.sample_count)
+        self.histogram = dr.zeros(mi.Float, n * cells)
+        if self.component == 'lobes':
+            self.pdf = dr.zeros(mi.Float, n * cells)
+
+        for first in range(0, n, per_launch):
+            count = min(per_launch, n - first)
+            idx = dr.arange(mi.UInt32, count * self.sample_count)
+            v0, v1 = mi.sample_tea_32(idx, self.seed + first)
+            rng = mi.PCG32(initstate=v0, initseq=v1)
+            sample = [rng.next_float32() for _ in range(5)]
+
+            config = idx // self.sample_count + first
+            bsdf, wi, wl = self._instantiate(config)
+            si, _ = _wbsdf_query(dr.width(idx), wi, self.uv, wl)
+            sd, weight = bsdf.wbsdf_sample(self.ctx, si, sample[0],
+                                           mi.Vector2f(sample[1], sample[2]),
+                                           mi.Vector2f(sample[3], sample[4]))
+            if self.component is None:
+                valid = dr.any(mi.unpolarized_spectrum(weight.L) != 0)
+                xy = sd.bsdf_sample.wo
+            elif self.component == 'microfacet':
+                # Reflection direction of the sampled microfacet normal
+                xy = sd.internal_frame.n
+                valid = mi.Frame3f.cos_theta(xy) > 0
+            else:
+                # Evanescent lobes are sampled as well (with a zero weight)
+                valid = dr.full(mi.Bool, True, dr.width(idx))
+                xy = mi.Vector2f(sd.diffraction_lobe)
+                self._accumulate_lobe_pdf(config, wi, wl, sd)
+
+            # Map samples into the parameter domain
+            xy = self.domain.map_backward(xy)
+            xy = (xy - bounds.min) / bounds.extents()
+            xy = mi.Vector2u(dr.clip(xy * mi.Vector2f(res), 0,
+                                     mi.Vector2f(res - 1)))
+
+            dr.scatter_reduce(dr.ReduceOp.Add, self.histogram, mi.Float(1.0),
+                              config * cells + xy.x + xy.y * res.x, valid)
+            if self.component == 'lobes':
+                dr.eval(self.histogram, self.pdf)
+            else:
+                dr.eval(self.histogram)
+
+    def tabulate_pdf(self):
+        '''
+        Integrate the density of all configurations over each cell (see
+        ``ChiSquareTest.tabulate_pdf()``). The expected frequencies of the
+        lobes are accumulated with the histograms instead.
+        '''
+        if self.component == 'lobes':
+            return
+
+        res = self.res
+        cells = res.x * res.y
+        n = len(self.configs)
+        bounds = self.domain.bounds()
+
+        sample_count = self.ires**2
+        cell_size = bounds.extents() / res
+        sample_spacing = cell_size / (self.ires - 1)
+
+        per_launch = max(1, (2**32 - 1) // (cells * sample_count))
+        self.pdf = dr.zeros(mi.Float, n * cells)
+
+        for first in range(0, n, per_launch):
+            count = min(per_launch, n - first)
+            index = dr.arange(mi.UInt32, count * cells * sample_count)
+
+            # Determine configuration, cell and integration sample indices
+            cell_index = index // sample_count
+            sample_index = index - cell_index * sample_count
+            config = cell_index // cells
+            cell_index -= config * cells
+            config += first
+            cell_y = cell_index // res.x
+            cell_x = cell_index - cell_y * res.x
+            sample_y = sample_index // self.ires
+            sample_x = sample_index - sample_y * self.ires
+            cell_index_2d = mi.Vector2u(cell_x, cell_y)
+            sample_index_2d = mi.Vector2u(sample_x, sample_y)
+
+            # Compute the position of each sample
+            p = bounds.min + cell_index_2d * cell_size
+            p += (sample_index_2d + 1e-4) * (1-2e-4) * sample_spacing
+
+            # Trapezoid rule integration weights
+            weights = dr.prod(dr.select((sample_index_2d == 0) |
+                                        (sample_index_2d == self.ires - 1), 0.5, 1))
+            weights *= dr.prod(sample_spacing) * self.sample_count
+
+            wo = self.domain.map_forward(p)
+            bsdf, wi, wl = self._instantiate(config)
+            si, sd = _wbsdf_query(dr.width(index), wi, self.uv, wl)
+            if self.component is None:
+                pdf = bsdf.wbsdf_pdf(self.ctx, si, wo, sd)
+            else:
+                pdf = bsdf.pdf(self.ctx, si, wo)
+
+            # Sum over each cell
+            dr.scatter(self.pdf, dr.block_sum(pdf * weights, sample_count),
+                       dr.arange(mi.UInt32, count * cells) + first * cells)
+            dr.eval(self.pdf)
+
+    def tabulate(self):
+        '''Tabulate the histograms and expected frequencies of all configurations'''
+        self.start = time.time()
+        self.tabulate_histogram()
+        self.tabulate_pdf()
+        self.end = time.time()
+
+    def run(self, significance_level=0.01, quiet=False):
+        """
+        Run the Chi^2 test of every configuration
+
+        Returns → list(bool):
+            For each configuration, ``True`` upon success, ``False`` if the
+            null hypothesis was rejected.
+        """
+        if self.histogram is None or self.pdf is None:
+            self.tabulate()
+
+        # The tabulation is shared by the whole batch, so every configuration
+        # is charged an equal share of it
+        shared_time = (self.end - self.start) / len(self.configs)
+
+        results, self.p_values, self.messages, self.times = [], [], [], []
+        self.results = []
+        for k, config in enumerate(self.configs):
+            start = time.time()
+            chi2 = _batch_row_test(self.domain, self.res_arg, self.ires,
+                                   self.histogram, self.pdf, k,
+                                   self.sample_count, self.start, self.end)
+
+            chi2._log('Configuration %i: %s' % (k, config))
+            results.append(chi2.run(significance_level, len(self.configs), quiet=True))
+            self.p_values.append(chi2.p_value)
+            self.messages.append(chi2.messages)
+            self.times.append(shared_time + time.time() - start)
+            self.results.append({**config, 'passed': results[-1],
+                                 'p_value': float(chi2.p_value),
+                                 'time': self.times[-1]})
+
+            if not quiet and not results[-1]:
+                print(chi2.messages)
+
+        if not quiet:
+            print(self.summary())
+            print('Tested %i configurations (%i samples each, %.2f ms): %i rejected'
+                  % (len(self.configs), self.sample_count,
+                     (self.end - self.start) * 1000, results.count(False)))
+        return results
+
+    def summary(self):
+        '''Table with the outcome, p-value and amortized time of every configuration'''
+        names = []
+        for config in self.configs:
+            names += [name for name in config if name not in names]
+
+        lines = ['  '.join(['%12s' % name for name in names] +
+                           ['%8s' % 'result', '%10s' % 'p-value', '%14s' % 'amortized (ms)'])]
+        for row in self.results:
+            lines.append('  '.join(['%12s' % str(row.get(name, '-')) for name in names] +
+                                   ['%8s' % ('pass' if row['passed'] else 'FAIL'),
+                                    '%10.4g' % row['p_value'],
+                                    '%14.2f' % (row['time'] * 1000)]))
+        return '\n'.join(lines)
+
+
 if __name__ == '__main__':
     import mitsuba as mi
     mi.set_variant('llvm_ad_rgb')
@@ -325,3 +325,24 @@ def test06_variant_context():
     except RuntimeError:
         pass
     assert mi.variant() == "scalar_rgb"
+
+
+def test07_scene_parameters_update_dirty_only(variants_all_ad_rgb):
+    bsdf = mi.load_dict({'type': 'principled'})
+    params = mi.traverse(bsdf)
+
+    params['clearcoat.value'] = 0.5
+    assert params.dirty_keys == {'clearcoat.value'}
+
+    ret = params.update()
+
+    # Only the modified texture and its parent are notified, bottom to top
+    assert [keys for _, keys in ret] == [{'value'}, {'clearcoat'}]
+    assert [node for node, _ in params.update_times] == [node for node, _ in ret]
+    assert all(t >= 0 for _, t in params.update_times)
+    assert len(params.dirty_keys) == 0
+
+    # Reading parameters without modifying them does not trigger an update
+    params['flatness.value']
+    assert params.update() == []
+    assert params.update_times == []
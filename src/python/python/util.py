@@ -1,6 +1,7 @@
 from __future__ import annotations as __annotations__ # Delayed parsing of type annotations
 
 import contextlib
+import time
 from collections.abc import Mapping
 
 import drjit as dr
@@ -28,7 +29,11 @@ class SceneParameters(Mapping):
         self.properties = properties if properties is not None else {}
         self.hierarchy  = hierarchy  if hierarchy  is not None else {}
         self.update_candidates = {}
+        # Modified parameters, and the nodes to notify (grouped by depth)
+        self.dirty_keys = set()
         self.nodes_to_update = {}
+        # Time spent in the `parameters_changed` callback of each node
+        self.update_times = []
 
         self.set_property = mi.set_property
         self.get_property = mi.get_property
@@ -90,6 +95,8 @@ class SceneParameters(Mapping):
 
     def __delitem__(self, key: str) -> None:
         del self.properties[key]
+        self.update_candidates.pop(key, None)
+        self.dirty_keys.discard(key)
 
     def __len__(self) -> int:
         return len(self.properties)
@@ -168,6 +175,11 @@ class SceneParameters(Mapping):
                 "gradients enabled, unexpected results may occur!"
             )
 
+        # Its parent objects have already been flagged
+        if key in self.dirty_keys:
+            return self.properties[key]
+        self.dirty_keys.add(key)
+
         node_key = key
         while node is not None:
             parent, depth = self.hierarchy[node]
@@ -176,8 +188,7 @@ class SceneParameters(Mapping):
             if parent is not None:
                 node_key, name = node_key.rsplit('.', 1)
 
-            self.nodes_to_update.setdefault((depth, node), set())
-            self.nodes_to_update[(depth, node)].add(name)
+            self.nodes_to_update.setdefault(depth, {}).setdefault(node, set()).add(name)
 
             node = parent
 
@@ -196,6 +207,11 @@ class SceneParameters(Mapping):
         element is the node itself. The second element is the set of keys that
         the node is being updated for.
 
+        Only the modified parameters are evaluated, and only their nodes are
+        notified. The time spent in the ``parameters_changed()`` callback of
+        each node is stored in the ``update_times`` attribute, as a list of
+        ``(node, seconds)`` tuples.
+
         Parameter ``values`` (``dict``):
             Optional dictionary-like object containing a set of keys and values
             to be used to overwrite scene parameters. This operation will happen
@@ -215,19 +231,22 @@ class SceneParameters(Mapping):
 
             self.set_dirty(key)
 
-        for key in self.keys():
+        for key in self.dirty_keys:
             dr.schedule(self.__get_value(key))
 
         # Notify nodes from bottom to top
-        work_list = [(d, n, k) for (d, n), k in self.nodes_to_update.items()]
-        work_list = reversed(sorted(work_list, key=lambda x: x[0]))
         out = []
-        for _, node, keys in work_list:
-            node.parameters_changed(list(keys))
-            out.append((node, keys))
+        self.update_times = []
+        for depth in sorted(self.nodes_to_update.keys(), reverse=True):
+            for node, keys in self.nodes_to_update[depth].items():
+                start = time.perf_counter()
+                node.parameters_changed(list(keys))
+                self.update_times.append((node, time.perf_counter() - start))
+                out.append((node, keys))
 
         self.nodes_to_update.clear()
         self.update_candidates.clear()
+        self.dirty_keys.clear()
         dr.eval()
 
         return out
@@ -252,6 +271,10 @@ class SceneParameters(Mapping):
         self.properties = {
             k: v for k, v in self.properties.items() if k in keys
         }
+        self.update_candidates = {
+            k: v for k, v in self.update_candidates.items() if k in keys
+        }
+        self.dirty_keys &= set(keys)
 
 def _jit_id_hash(value: Any) -> int:
     """
@@ -544,6 +567,114 @@ def write_bitmap(filename, data, write_async=True, quality=-1):
     else:
         bitmap.write(filename, quality=quality)
 
+# ------------------------------------------------------------------------------
+#                          Tabulated wave BSDFs
+# ------------------------------------------------------------------------------
+
+def write_tensor_file(filename, fields):
+    """
+    Write a set of arrays to a tensor file (the format read by ``TensorFile``
+    in C++, e.g. by the ``tabulatedwbsdf`` plugin).
+
+    `fields` maps the name of each field to its array (``np.uint8``,
+    ``np.float16`` or ``np.float32``).
+    """
+    import struct
+    import numpy as np
+
+    dtypes = {
+        np.dtype(np.uint8) : int(mi.Struct.Type.UInt8),
+        np.dtype(np.float16) : int(mi.Struct.Type.Float16),
+        np.dtype(np.float32) : int(mi.Struct.Type.Float32)
+    }
+    arrays = { name : np.ascontiguousarray(value) for name, value in fields.items() }
+
+    # size of the header and of the description of every field
+    offset = 12 + 2 + 4
+    for name, value in arrays.items():
+        offset += 2 + len(name.encode("utf-8")) + 2 + 1 + 8 + 8 * value.ndim
+
+    with open(filename, "wb") as f:
+        f.write(b"tensor_file\0")
+        f.write(struct.pack("<BBI", 1, 0, len(arrays)))
+
+        for name, value in arrays.items():
+            encoded = name.encode("utf-8")
+            f.write(struct.pack("<H", len(encoded)))
+            f.write(encoded)
+            f.write(struct.pack("<HBQ", value.ndim, dtypes[value.dtype], offset))
+            f.write(struct.pack(f"<{value.ndim}Q", *value.shape))
+            offset += value.nbytes
+
+        for value in arrays.values():
+            f.write(value.tobytes())
+
+def _sph_to_dir(theta, phi):
+    st, ct = dr.sincos(theta)
+    sp, cp = dr.sincos(phi)
+    return mi.Vector3f(cp * st, sp * st, ct)
+
+def bake_wbsdf_slice(bsdf, wi, wavelengths, res_theta, res_phi):
+    """
+    Evaluate a wave BSDF over all the outgoing directions and wavelengths of
+    a table (see :py:func:`bake_wbsdf`), for the incident direction `wi`.
+
+    Returns the intensity of each (wavelength, theta_o, phi_o), as a NumPy
+    array. Requires a spectral variant.
+    """
+    import numpy as np
+
+    # RGB variants evaluate the reflectance of fixed RGB bands, whatever the wavelength
+    if not mi.is_spectral:
+        raise RuntimeError("Baking a wBSDF requires a spectral variant!")
+
+    theta_o, phi_o = np.meshgrid(np.linspace(0, np.pi, res_theta),
+                                 np.linspace(-np.pi, np.pi, res_phi), indexing="ij")
+
+    # evaluate every wavelength at once, one lane per (wavelength, direction)
+    n = theta_o.size
+    wo = _sph_to_dir(mi.Float(np.tile(theta_o.ravel(), len(wavelengths))),
+                     mi.Float(np.tile(phi_o.ravel(), len(wavelengths))))
+    wl = mi.Float(np.repeat(wavelengths, n))
+
+    si = dr.zeros(mi.SurfaceInteraction3f)
+    si.wi = wi
+    si.uv = mi.Vector2f(0.0)
+    si.wavelengths = mi.UnpolarizedSpectrum(wl)
+
+    sd = mi.PLTSamplePhaseData3f(
+        dr.zeros(mi.BSDFSample3f),
+        mi.Vector2i(0),
+        mi.Vector3f(0.0),
+        mi.Coherence3f(mi.Float(0.0), mi.Float(0.0)),
+        mi.UnpolarizedSpectrum(wl))
+    values = mi.unpolarized_spectrum(bsdf.wbsdf_eval(mi.BSDFContext(), si, wo, sd).L)
+
+    # all channels share the same wavelength
+    return np.array(values[0]).reshape(len(wavelengths), res_theta, res_phi)
+
+def bake_wbsdf(bsdf, phi_i, theta_i, wavelengths, res_theta, res_phi):
+    """
+    Tabulate a wave BSDF over incident directions, wavelengths and outgoing
+    directions, as read by the ``tabulatedwbsdf`` plugin (see
+    :py:func:`write_tensor_file`).
+
+    `phi_i`, `theta_i` (in radians) and `wavelengths` (in nm) are the nodes of
+    the table, and `res_theta`, `res_phi` the amount of outgoing elevations
+    (in [0, pi]) and azimuths (in [-pi, pi]). Returns the table of values, of
+    shape [phi_i, theta_i, wavelengths, theta_o, phi_o].
+    """
+    import numpy as np
+
+    table = np.zeros((len(phi_i), len(theta_i), len(wavelengths), res_theta, res_phi), dtype=np.float32)
+
+    for i, p in enumerate(phi_i):
+        for j, t in enumerate(theta_i):
+            wi = _sph_to_dir(mi.Float(t), mi.Float(p))
+            table[i, j] = bake_wbsdf_slice(bsdf, wi, wavelengths, res_theta, res_phi)
+
+    return table
+
 # ------------------------------------------------------------------------------
 #                            Cornell Box scene
 # ------------------------------------------------------------------------------
@@ -113,6 +113,8 @@ MI_VARIANT SamplingIntegrator<Float, Spectrum>::SamplingIntegrator(const Propert
                   "Please leave it undefined; Mitsuba will then automatically "
                   "choose the necessary number of passes.");
     }
+
+    m_wavefront_budget = props.get<uint32_t>("wavefront_budget", 0);
 }
 
 MI_VARIANT SamplingIntegrator<Float, Spectrum>::~SamplingIntegrator() { }
@@ -248,6 +250,27 @@ SamplingIntegrator<Float, Spectrum>::render(Scene *scene,
                                 (size_t) film_size.y() * (size_t) spp_per_pass,
                wavefront_size_limit = 0xffffffffu;
 
+        if (m_wavefront_budget > 0 && wavefront_size > m_wavefront_budget) {
+            // Largest batch of samples per pixel within the budget that
+            // divides the sample count
+            size_t pixels = (size_t) film_size.x() * (size_t) film_size.y();
+            spp_per_pass = (uint32_t) std::min(
+                std::max(m_wavefront_budget / pixels, (size_t) 1),
+                (size_t) spp_per_pass);
+            while (spp % spp_per_pass != 0)
+                spp_per_pass--;
+
+            n_passes       = spp / spp_per_pass;
+            wavefront_size = pixels * (size_t) spp_per_pass;
+
+            if (wavefront_size > m_wavefront_budget)
+                Log(Warn,
+                    "A single sample per pixel (%zu samples) exceeds the "
+                    "wavefront budget (%u samples), rendering %u passes of "
+                    "one sample per pixel.",
+                    wavefront_size, m_wavefront_budget, n_passes);
+        }
+
         if (wavefront_size > wavefront_size_limit) {
             spp_per_pass /=
                 (uint32_t)((wavefront_size + wavefront_size_limit - 1) /
@@ -0,0 +1,352 @@
+#include <mitsuba/core/fwd.h>
+#include <mitsuba/core/properties.h>
+#include <mitsuba/core/transform.h>
+#include <mitsuba/render/fwd.h>
+#include <mitsuba/render/sensor.h>
+
+NAMESPACE_BEGIN(mitsuba)
+
+/**!
+
+.. _sensor-spectrograph:
+
+Spectrograph (:monosp:`spectrograph`)
+-------------------------------------
+
+.. pluginparameters::
+
+ * - directions
+   - |tensor|
+   - Tensor of shape ``[N, 3]`` with the (world space) direction in which each
+     of the N channels is placed, as seen from ``target``.
+
+ * - target
+   - |point|
+   - Center of the aperture that all the channels are looking at.
+     (Default: :monosp:`[0, 0, 0]`)
+
+ * - distance
+   - |float|
+   - Distance from ``target`` at which the channels are placed. (Default: 1.0)
+
+ * - up
+   - |vector|
+   - Up vector used to orient the aperture of each channel. (Default: :monosp:`[0, 0, 1]`)
+
+ * - aperture
+   - |float|
+   - Half-extent of the square aperture of each channel. The default value
+     matches the footprint of an :monosp:`orthographic` sensor. (Default: 1.0)
+
+ * - srfs
+   - |tensor|
+   - Optional tensor of shape ``[N, M]`` with the Sensor Response Function of
+     each channel, sampled at M regularly spaced wavelengths between
+     ``wavelength_min`` and ``wavelength_max``. Only supported in spectral
+     variants. (Default: none)
+
+ * - wavelength_min, wavelength_max
+   - |float|
+   - Wavelength range (in nm) of the SRF samples. (Default: 360, 830)
+
+This sensor simulates the detector of a spectrograph in a single pass. Each
+column of the film is a channel which records, through an orthographic
+aperture, the radiance arriving from its own direction (e.g. the direction in
+which a grating diffracts a given wavelength). In spectral variants, each
+channel samples wavelengths from its own SRF, which is given in memory instead
+of as a separate spectrum object per channel. This keeps the scene size and
+the number of virtual function calls constant regardless of the number of
+channels.
+
+The film must have a width equal to the number of channels and a height of
+one pixel. A box reconstruction filter should be used to avoid mixing nearby
+channels.
+
+.. tabs::
+
+    .. code-tab:: python
+
+        'type': 'spectrograph',
+        'directions': mi.TensorXf(directions),   # [N, 3]
+        'distance': 0.4,
+        'srfs': mi.TensorXf(srfs),               # [N, M]
+        'wavelength_min': 380,
+        'wavelength_max': 750,
+        'film': {
+            'type': 'hdrfilm',
+            'width': N,
+            'height': 1,
+            'rfilter': { 'type': 'box' }
+        }
+
+*/
+
+MI_VARIANT class Spectrograph final : public Sensor<Float, Spectrum> {
+public:
+    MI_IMPORT_BASE(Sensor, m_film, m_needs_sample_3, sample_wavelengths)
+    MI_IMPORT_TYPES()
+    using FloatStorage = DynamicBuffer<Float>;
+
+    Spectrograph(const Properties &props) : Base(props) {
+        TensorXf *directions = props.tensor<TensorXf>("directions");
+        if (directions->ndim() != 2 || directions->shape(1) != 3)
+            Throw("The \"directions\" tensor must have shape [N, 3]!");
+
+        m_channels = (uint32_t) directions->shape(0);
+        if (m_channels == 0)
+            Throw("At least one channel should be defined!");
+
+        if (m_film->size().x() != m_channels || m_film->size().y() != 1)
+            Throw("This sensor requires a film of size %u x 1 pixels (one "
+                  "pixel per channel)!", m_channels);
+
+        if (m_film->rfilter()->radius() > 0.5f + math::RayEpsilon<Float>)
+            Log(Warn, "This sensor should be used with a reconstruction filter "
+                      "with a radius of 0.5 or lower (e.g. default box)");
+
+        ScalarPoint3f target  = props.get<ScalarPoint3f>("target", 0.f);
+        ScalarVector3f up     = props.get<ScalarVector3f>("up", ScalarVector3f(0.f, 0.f, 1.f));
+        ScalarFloat distance  = props.get<ScalarFloat>("distance", 1.f);
+        ScalarFloat aperture  = props.get<ScalarFloat>("aperture", 1.f);
+
+        // Build the aperture frame of every channel on the host
+        auto &&dirs = dr::migrate(directions->array(), AllocType::Host);
+        if constexpr (dr::is_jit_v<Float>)
+            dr::sync_thread();
+
+        std::vector<ScalarFloat> origins(3 * m_channels), axis_x(3 * m_channels),
+                                 axis_y(3 * m_channels), ray_dirs(3 * m_channels);
+
+        for (uint32_t i = 0; i < m_channels; ++i) {
+            ScalarVector3f d = dr::normalize(ScalarVector3f(
+                dirs.data()[3 * i], dirs.data()[3 * i + 1], dirs.data()[3 * i + 2]));
+
+            ScalarTransform4f to_world =
+                ScalarTransform4f::look_at(target + d * distance, target, up);
+
+            ScalarPoint3f o  = to_world.transform_affine(ScalarPoint3f(0.f));
+            ScalarVector3f x = to_world.transform_affine(ScalarVector3f(aperture, 0.f, 0.f)),
+                           y = to_world.transform_affine(ScalarVector3f(0.f, aperture, 0.f));
+
+            for (uint32_t k = 0; k < 3; ++k) {
+                origins[3 * i + k]  = o[k];
+                axis_x[3 * i + k]   = x[k];
+                axis_y[3 * i + k]   = y[k];
+                ray_dirs[3 * i + k] = -d[k];
+            }
+        }
+
+        m_origins  = dr::load<FloatStorage>(origins.data(), origins.size());
+        m_axis_x   = dr::load<FloatStorage>(axis_x.data(), axis_x.size());
+        m_axis_y   = dr::load<FloatStorage>(axis_y.data(), axis_y.size());
+        m_ray_dirs = dr::load<FloatStorage>(ray_dirs.data(), ray_dirs.size());
+
+        m_wavelength_range = ScalarVector2f(
+            props.get<ScalarFloat>("wavelength_min", MI_CIE_MIN),
+            props.get<ScalarFloat>("wavelength_max", MI_CIE_MAX));
+
+        if (props.has_property("srfs")) {
+            if constexpr (is_spectral_v<Spectrum>) {
+                TensorXf *srfs = props.tensor<TensorXf>("srfs");
+                if (srfs->ndim() != 2 || srfs->shape(0) != m_channels)
+                    Throw("The \"srfs\" tensor must have shape [%u, M]!", m_channels);
+                if (srfs->shape(1) < 2)
+                    Throw("The SRFs need at least two entries!");
+                if (!(m_wavelength_range.x() < m_wavelength_range.y()))
+                    Throw("Invalid SRF wavelength range!");
+
+                compute_srf_sampling(*srfs);
+            } else {
+                Throw("Spectrograph(): Spectral Response Functions should be "
+                      "used in combination with a spectral variant");
+            }
+        }
+
+        m_needs_sample_3 = false;
+    }
+
+    std::pair<Ray3f, Spectrum> sample_ray(Float time, Float wavelength_sample,
+                                          const Point2f &position_sample,
+                                          const Point2f & /*aperture_sample*/,
+                                          Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::EndpointSampleRay, active);
+        Ray3f ray;
+        ray.time = time;
+
+        // 1. Find the channel (film column) and the position within its aperture
+        Float x = position_sample.x() * m_film->crop_size().x();
+        UInt32 channel = dr::minimum(UInt32(dr::floor(x)) + m_film->crop_offset().x(),
+                                     m_channels - 1);
+        Point2f uv(dr::fmadd(x - dr::floor(x), 2.f, -1.f),
+                   dr::fmadd(position_sample.y(), 2.f, -1.f));
+
+        // 2. Sample spectrum from the SRF of the channel
+        auto [wavelengths, wav_weight] =
+            sample_channel_wavelengths(channel, wavelength_sample, active);
+        ray.wavelengths = wavelengths;
+
+        // 3. Set ray origin and direction
+        Vector3f axis_x = dr::gather<Vector3f>(m_axis_x, channel, active),
+                 axis_y = dr::gather<Vector3f>(m_axis_y, channel, active);
+
+        ray.o = dr::gather<Point3f>(m_origins, channel, active) +
+                axis_x * uv.x() + axis_y * uv.y();
+        ray.d = dr::gather<Vector3f>(m_ray_dirs, channel, active);
+
+        return { ray, wav_weight };
+    }
+
+    std::pair<RayDifferential3f, Spectrum>
+    sample_ray_differential(Float time, Float wavelength_sample,
+                            const Point2f &position_sample,
+                            const Point2f &aperture_sample,
+                            Mask active) const override {
+        MI_MASKED_FUNCTION(ProfilerPhase::EndpointSampleRay, active);
+
+        auto [ray, wav_weight] = sample_ray(time, wavelength_sample,
+                                            position_sample, aperture_sample,
+                                            active);
+
+        // Channels are independent, there are no meaningful differentials
+        RayDifferential3f ray_diff(ray);
+        ray_diff.has_differentials = false;
+
+        return { ray_diff, wav_weight };
+    }
+
+    ScalarBoundingBox3f bbox() const override {
+        // Return an invalid bounding box
+        return ScalarBoundingBox3f();
+    }
+
+    std::string to_string() const override {
+        std::ostringstream oss;
+        oss << "Spectrograph[" << std::endl
+            << "  channels = " << m_channels << "," << std::endl
+            << "  srfs = " << (m_srf_points > 0 ? "yes" : "no") << "," << std::endl
+            << "  film = " << m_film << "," << std::endl
+            << "]";
+        return oss.str();
+    }
+
+    MI_DECLARE_CLASS()
+
+private:
+    /**
+     * \brief Sample wavelengths from the (piecewise linear) SRF of each channel
+     *
+     * All SRFs share the same regular discretization, so the PDF and CDF of
+     * every channel are stored back to back and sampled with a binary search
+     * restricted to the row of the channel.
+     */
+    std::pair<Wavelength, Spectrum>
+    sample_channel_wavelengths(const UInt32 &channel, Float sample,
+                               Mask active) const {
+        if constexpr (is_spectral_v<Spectrum>) {
+            if (m_srf_points > 0) {
+                using Index = dr::uint32_array_t<Wavelength>;
+
+                uint32_t n_intervals = m_srf_points - 1;
+                Wavelength u = math::sample_shifted<Wavelength>(sample);
+                Index pdf_offset = channel * m_srf_points,
+                      cdf_offset = channel * n_intervals;
+
+                Index index = dr::binary_search<Index>(
+                    0, n_intervals - 1,
+                    [&](Index index) DRJIT_INLINE_LAMBDA {
+                        return dr::gather<Wavelength>(m_srf_cdf, cdf_offset + index, active) < u;
+                    }
+                );
+
+                Wavelength y0 = dr::gather<Wavelength>(m_srf_pdf, pdf_offset + index,      active),
+                           y1 = dr::gather<Wavelength>(m_srf_pdf, pdf_offset + index + 1u, active),
+                           c0 = dr::gather<Wavelength>(m_srf_cdf, cdf_offset + index - 1u, active && index > 0);
+
+                u = (u - c0) * m_inv_interval_size;
+
+                Wavelength t_linear = (y0 - dr::safe_sqrt(dr::fmadd(y0, y0, 2.f * u * (y1 - y0)))) * dr::rcp(y0 - y1),
+                           t_const  = u * dr::rcp(y0),
+                           t        = dr::clip(dr::select(y0 == y1, t_const, t_linear), 0.f, 1.f);
+
+                Wavelength wavelengths =
+                    dr::fmadd(Wavelength(index) + t, m_interval_size, m_wavelength_range.x());
+
+                // Importance sampling the SRF leaves only its integral as weight
+                Float integral = dr::gather<Float>(m_srf_integral, channel, active);
+
+                return { wavelengths, depolarizer<Spectrum>(UnpolarizedSpectrum(integral)) };
+            }
+        } else {
+            DRJIT_MARK_USED(channel);
+        }
+
+        return sample_wavelengths(dr::zeros<SurfaceInteraction3f>(), sample, active);
+    }
+
+    void compute_srf_sampling(const TensorXf &srfs) {
+        m_srf_points = (uint32_t) srfs.shape(1);
+        uint32_t n_intervals = m_srf_points - 1;
+
+        m_interval_size = (m_wavelength_range.y() - m_wavelength_range.x()) / n_intervals;
+        m_inv_interval_size = dr::rcp(m_interval_size);
+
+        auto &&values = dr::migrate(srfs.array(), AllocType::Host);
+        if constexpr (dr::is_jit_v<Float>)
+            dr::sync_thread();
+
+        std::vector<ScalarFloat> pdf(m_channels * m_srf_points),
+                                 cdf(m_channels * n_intervals),
+                                 integral(m_channels);
+
+        for (uint32_t i = 0; i < m_channels; ++i) {
+            const ScalarFloat *row = values.data() + i * m_srf_points;
+
+            // Trapezoidal integration of the SRF of the channel
+            double sum = 0.0;
+            for (uint32_t j = 0; j < n_intervals; ++j) {
+                if (row[j] < 0.f || row[j + 1] < 0.f)
+                    Throw("The SRF of channel %u has negative entries!", i);
+                sum += 0.5 * ((double) row[j] + (double) row[j + 1]) * m_interval_size;
+                cdf[i * n_intervals + j] = (ScalarFloat) sum;
+            }
+
+            // Normalize the PDF and CDF of the channel
+            ScalarFloat inv_sum = sum > 0.0 ? (ScalarFloat) (1.0 / sum) : 0.f;
+            for (uint32_t j = 0; j < m_srf_points; ++j)
+                pdf[i * m_srf_points + j] = row[j] * inv_sum;
+            for (uint32_t j = 0; j < n_intervals; ++j)
+                cdf[i * n_intervals + j] *= inv_sum;
+
+            if (sum == 0.0)
+                Log(Warn, "The SRF of channel %u has no probability mass.", i);
+
+            integral[i] = (ScalarFloat) sum;
+        }
+
+        m_srf_pdf      = dr::load<FloatStorage>(pdf.data(), pdf.size());
+        m_srf_cdf      = dr::load<FloatStorage>(cdf.data(), cdf.size());
+        m_srf_integral = dr::load<FloatStorage>(integral.data(), integral.size());
+    }
+
+private:
+    uint32_t m_channels;
+
+    // Aperture frame of each channel, stored as flattened 3D vectors
+    FloatStorage m_origins;
+    FloatStorage m_axis_x;
+    FloatStorage m_axis_y;
+    FloatStorage m_ray_dirs;
+
+    // Per-channel SRF sampling data
+    uint32_t m_srf_points = 0;
+    ScalarVector2f m_wavelength_range;
+    ScalarFloat m_interval_size = 0.f;
+    ScalarFloat m_inv_interval_size = 0.f;
+    FloatStorage m_srf_pdf;
+    FloatStorage m_srf_cdf;
+    FloatStorage m_srf_integral;
+};
+
+MI_IMPLEMENT_CLASS_VARIANT(Spectrograph, Sensor)
+MI_EXPORT_PLUGIN(Spectrograph, "Spectrograph");
+NAMESPACE_END(mitsuba)
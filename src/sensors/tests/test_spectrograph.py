@@ -0,0 +1,121 @@
+import pytest
+import drjit as dr
+import mitsuba as mi
+import numpy as np
+
+
+def make_sensor(directions, distance=1.0, srfs=None, pixels=None):
+    d = {
+        "type": "spectrograph",
+        "directions": mi.TensorXf(np.array(directions, dtype=np.float32)),
+        "distance": distance,
+        "film": {
+            "type": "hdrfilm",
+            "width": len(directions) if pixels is None else pixels,
+            "height": 1,
+            "rfilter": {"type": "box"}
+        }
+    }
+
+    if srfs is not None:
+        d["srfs"] = mi.TensorXf(np.array(srfs, dtype=np.float32))
+        d["wavelength_min"] = 400.0
+        d["wavelength_max"] = 700.0
+
+    return mi.load_dict(d)
+
+
+def test01_construct(variant_scalar_rgb):
+    sensor = make_sensor([[1, 0, 0], [0, 1, 0], [0, 0, 1]])
+    assert not sensor.bbox().valid()  # Degenerate bounding box
+    assert dr.all(sensor.film().size() == [3, 1])
+
+    # Test raise on film size not matching the channel count
+    with pytest.raises(RuntimeError):
+        sensor = make_sensor([[1, 0, 0], [0, 1, 0]], pixels=3)
+
+    # Test raise on SRFs in a non-spectral variant
+    with pytest.raises(RuntimeError):
+        sensor = make_sensor([[1, 0, 0]], srfs=[[1, 1]])
+
+
+@pytest.mark.parametrize("distance", [0.4, 2.0])
+def test02_sample_ray(variant_scalar_rgb, distance):
+    directions = [[1, 0, 0], [0, 1, 0], [-1, -1, 0]]
+    sensor = make_sensor(directions, distance=distance)
+
+    for i, d in enumerate(directions):
+        d = dr.normalize(mi.ScalarVector3f(d))
+
+        # Sample the center of the pixel of the channel
+        ray, _ = sensor.sample_ray(1., 0.5, [(i + 0.5) / len(directions), 0.5], [0.5, 0.5], True)
+        assert dr.allclose(ray.o, d * distance, atol=1e-5)
+        assert dr.allclose(ray.d, -d)
+
+        # Positions within the aperture stay on the aperture plane
+        ray, _ = sensor.sample_ray_differential(1., 0.5, [(i + 0.1) / len(directions), 0.9], [0.5, 0.5], True)
+        assert dr.allclose(dr.dot(ray.o, d), distance, atol=1e-5)
+        assert dr.allclose(ray.d, -d)
+        assert not ray.has_differentials
+
+
+def test03_sample_srfs(variants_vec_spectral):
+    # Two box SRFs covering disjoint halves of the wavelength range
+    points = 31
+    srfs = np.zeros((2, points))
+    srfs[0, :15] = 1.0
+    srfs[1, 16:] = 2.0
+    sensor = make_sensor([[1, 0, 0], [0, 1, 0]], srfs=srfs)
+
+    n = 1000
+    sample = dr.linspace(mi.Float, 0, 1, n, endpoint=False)
+
+    for i, (lo, hi) in enumerate([(400.0, 550.0), (550.0, 700.0)]):
+        pos = mi.Point2f((i + 0.5) / 2, 0.5)
+        ray, weight = sensor.sample_ray(0., sample, pos, mi.Point2f(0.5), True)
+
+        for k in range(4):
+            assert dr.all((ray.wavelengths[k] >= lo - 1e-3) & (ray.wavelengths[k] <= hi + 1e-3))
+
+        # The weight is the integral of the SRF of the channel
+        integral = np.trapezoid(srfs[i], np.linspace(400, 700, points))
+        assert dr.allclose(mi.unpolarized_spectrum(weight), integral)
+
+
+@pytest.mark.parametrize("radiance", [10**x for x in range(-3, 4, 3)])
+def test04_render(variant_scalar_rgb, radiance):
+    """Test render results with a simple scene"""
+    scene_dict = {
+        'type': 'scene',
+        'integrator': {
+            'type': 'path'
+        },
+        'sensor': {
+            'type': 'spectrograph',
+            'directions': mi.TensorXf(np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 1]], dtype=np.float32)),
+            'film': {
+                'type': 'hdrfilm',
+                'width': 4,
+                'height': 1,
+                'pixel_format': 'rgb',
+                'rfilter': {
+                    'type': 'box'
+                }
+            },
+            'sampler': {
+                'type': 'independent',
+                'sample_count': 1
+            }
+        },
+        'emitter': {
+            'type': 'constant',
+            'radiance': {
+                'type': 'uniform',
+                'value': radiance
+            }
+        }
+    }
+
+    scene = mi.load_dict(scene_dict)
+    img = mi.render(scene)
+    assert dr.allclose(img, radiance)